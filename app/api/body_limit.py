@@ -0,0 +1,100 @@
+import logging
+from typing import Dict, Optional
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class RequestBodyTooLarge(HTTPException):
+    """Raised while reading a request body that exceeds its size limit."""
+
+    def __init__(self, limit: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Request body exceeds limit of {limit // 1024 // 1024}MB",
+        )
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies larger than a limit while they are being received.
+
+    A declared ``Content-Length`` above the limit is rejected before any of
+    the body is read. Otherwise bytes are counted as they arrive, and the
+    read that crosses the limit raises :class:`RequestBodyTooLarge`, so the
+    multipart parser stops spooling the upload and FastAPI answers 413.
+
+    Args:
+        app: ASGI application to wrap.
+        max_body_size: Default limit in bytes.
+        path_limits: Limits for paths ending with the given suffixes, e.g.
+            endpoints that accept many files.
+    """
+
+    def __init__(
+        self, app: ASGIApp, max_body_size: int, path_limits: Optional[Dict[str, int]] = None
+    ):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.path_limits = path_limits or {}
+
+    def limit_for(self, path: str) -> int:
+        """Return the body size limit of a request path."""
+        path = path.rstrip("/")
+        for suffix, limit in self.path_limits.items():
+            if path.endswith(suffix.rstrip("/")):
+                return limit
+        return self.max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limit_for(scope["path"])
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            logger.warning("Rejecting %s: declared body of %s bytes", scope["path"], declared.decode())
+            await self._reject(limit, scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    logger.warning("Rejecting %s: body exceeds %d bytes", scope["path"], limit)
+                    raise RequestBodyTooLarge(limit)
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestBodyTooLarge:
+            # Applications without an HTTPException handler end up here
+            if response_started:
+                raise
+            await self._reject(limit, scope, receive, send)
+
+    @staticmethod
+    async def _reject(limit: int, scope: Scope, receive: Receive, send: Send) -> None:
+        error = RequestBodyTooLarge(limit)
+        response = JSONResponse(
+            {"detail": error.detail},
+            status_code=error.status_code,
+            headers={"Connection": "close"},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,59 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.config import COMPARE_RETRY_AFTER
+from app.core.melody_engine import (EngineBusyError, EngineTimeoutError,
+                                    EngineWorkerError, MelodyEngine)
+from app.core.metrics import run_instrumented
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+async def run_melody_job(
+    engine: MelodyEngine, fn, *args, timings: Optional[List[Dict[str, Any]]] = None
+):
+    """
+    Run a melody analysis job on the engine and map engine errors to HTTP.
+
+    Stage timings of the job are always recorded in the Prometheus metrics.
+
+    Args:
+        engine: Process pool running the job.
+        fn: Module-level function from app.core.compare_melodies.
+        *args: Arguments for ``fn``.
+        timings: List that receives the stage timings of the job, if given.
+
+    Returns:
+        Any: Result of ``fn``.
+
+    Raises:
+        HTTPException: 503 with Retry-After if the queue is full or the
+            worker died, 504 if the job timed out.
+    """
+    try:
+        result, stages = await run_instrumented(engine, fn, *args)
+        if timings is not None:
+            timings.extend(stages)
+        return result
+    except EngineBusyError:
+        logger.warning("Comparison queue is full, rejecting request")
+        raise HTTPException(
+            status_code=503,
+            detail="Comparison queue is full, try again later",
+            headers={"Retry-After": str(COMPARE_RETRY_AFTER)},
+        )
+    except EngineTimeoutError:
+        logger.error("Melody job timed out")
+        raise HTTPException(status_code=504, detail="Melody comparison timed out")
+    except EngineWorkerError:
+        # Only a job whose own worker died ends up here: jobs killed because
+        # another job in the same pool timed out are resubmitted by the engine
+        logger.error("Melody worker died, the pool is being restarted")
+        raise HTTPException(
+            status_code=503,
+            detail="Comparison worker crashed, try again later",
+            headers={"Retry-After": str(COMPARE_RETRY_AFTER)},
+        )
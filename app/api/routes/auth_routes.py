@@ -1,12 +1,12 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, ExpiredSignatureError
 
 from app.config import JWT_ACCESS_COOKIE_NAME, JWT_REFRESH_COOKIE_NAME
 from app.core.auth import check_token, login, register, security
-from app.data.database import get_db
+from app.data.database import get_async_db
 from app.data.models import User
 from app.data.schemas import AuthResponse, Login, Register
 
@@ -18,7 +18,7 @@ auth_router = APIRouter(prefix="/v2/auth", tags=["auth"])
 
 @auth_router.post("/register", response_model=AuthResponse)
 async def register_endpoint(
-    response: Response, request: Register, db: Session = Depends(get_db)
+    response: Response, request: Register, db: AsyncSession = Depends(get_async_db)
 ) -> AuthResponse:
     """
     Register a new user and set authentication cookies.
@@ -26,7 +26,7 @@ async def register_endpoint(
     Args:
         response: FastAPI Response object to set cookies.
         request: Register schema containing user registration data.
-        db: SQLAlchemy database session.
+        db: SQLAlchemy async database session.
 
     Returns:
         AuthResponse: Authentication response with access and refresh tokens.
@@ -36,7 +36,7 @@ async def register_endpoint(
     """
     logger.info("Received registration request for user: %s", request.email)
     try:
-        result = register(request, db)
+        result = await register(request, db)
         response.set_cookie(
             key="access_token",
             value=result.access_token,
@@ -63,7 +63,7 @@ async def register_endpoint(
 
 @auth_router.post("/login", response_model=AuthResponse)
 async def login_endpoint(
-    response: Response, request: Login, db: Session = Depends(get_db)
+    response: Response, request: Login, db: AsyncSession = Depends(get_async_db)
 ) -> AuthResponse:
     """
     Log in a user and set authentication cookies.
@@ -71,7 +71,7 @@ async def login_endpoint(
     Args:
         response: FastAPI Response object to set cookies.
         request: Login schema containing user credentials.
-        db: SQLAlchemy database session.
+        db: SQLAlchemy async database session.
 
     Returns:
         AuthResponse: Authentication response with access and refresh tokens.
@@ -81,7 +81,7 @@ async def login_endpoint(
     """
     logger.info("Received login request for user: %s", request.email)
     try:
-        result = login(request, db)
+        result = await login(request, db)
         response.set_cookie(
             key="access_token",
             value=result.access_token,
@@ -143,13 +143,13 @@ async def check_token_endpoint(request: Request) -> dict:
 
 
 @auth_router.get("/refresh")
-async def refresh_token_endpoint(request: Request, db: Session = Depends(get_db)) -> JSONResponse:
+async def refresh_token_endpoint(request: Request, db: AsyncSession = Depends(get_async_db)) -> JSONResponse:
     """
     Refresh the access token using the refresh token.
 
     Args:
         request: FastAPI Request object containing cookies.
-        db: SQLAlchemy database session.
+        db: SQLAlchemy async database session.
 
     Returns:
         JSONResponse: New access token and updated refresh token cookie.
@@ -170,7 +170,7 @@ async def refresh_token_endpoint(request: Request, db: Session = Depends(get_db)
             logger.warning("Invalid refresh token: missing user ID")
             raise HTTPException(status_code=401, detail="Invalid refresh token")
 
-        user = db.query(User).filter(User.id == int(user_id)).first()
+        user = await db.get(User, int(user_id))
         if not user:
             logger.warning("User not found for ID: %s", user_id)
             raise HTTPException(status_code=404, detail="User not found")
@@ -0,0 +1,108 @@
+import logging
+
+from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import COMPARE_RETRY_AFTER, MAX_FILE_SIZE
+from app.core.auth import authenticate_request, get_current_user
+from app.core.compare_jobs import (JOB_DONE, JOB_FAILED, JobBackend,
+                                   get_job_backend)
+from app.data.database import get_async_db
+from app.data.models import CompareJob, User
+from app.data.schemas import CompareJobResponse
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+compare_job_router = APIRouter(prefix="/api/api/v1/compare_jobs", tags=["compare"])
+
+
+def to_response(job: CompareJob) -> CompareJobResponse:
+    return CompareJobResponse(
+        id=job.id,
+        status=job.status,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        result=job.result,
+        error=job.error,
+    )
+
+
+@compare_job_router.post("/", response_model=CompareJobResponse, status_code=202,
+                         summary="Queue a melody comparison and return its job ID",
+                         dependencies=[Depends(authenticate_request)])
+async def submit_compare_job(
+    response: Response,
+    file1: UploadFile = File(..., media_type="audio/mpeg"),
+    file2: UploadFile = File(..., media_type="audio/mpeg"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    backend: JobBackend = Depends(get_job_backend),
+) -> CompareJobResponse:
+    """
+    Queue a comparison of two audio files without waiting for the result.
+
+    Args:
+        response: Outgoing response, used to set the Location header.
+        file1: Teacher recording.
+        file2: Student recording.
+        user: Current authenticated user, owner of the job.
+        db: SQLAlchemy async database session.
+        backend: Job backend running the comparison.
+
+    Returns:
+        CompareJobResponse: Queued job; poll ``GET /{id}`` for the result.
+
+    Raises:
+        HTTPException: If a file is too large or the job cannot be stored.
+    """
+    logger.info("Queueing comparison for user %s: %s, %s", user.id, file1.filename, file2.filename)
+    if file1.size > MAX_FILE_SIZE or file2.size > MAX_FILE_SIZE:
+        logger.warning("File too large: %s or %s", file1.filename, file2.filename)
+        raise HTTPException(status_code=413, detail="File size exceeds limit of 10MB")
+
+    try:
+        job = await backend.submit(db, user.id, await file1.read(), await file2.read())
+    except Exception as e:
+        logger.error("Failed to queue comparison job: %s", str(e))
+        raise HTTPException(status_code=500, detail="Failed to queue comparison job")
+
+    response.headers["Location"] = f"{compare_job_router.prefix}/{job.id}"
+    return to_response(job)
+
+
+@compare_job_router.get("/{job_id}", response_model=CompareJobResponse,
+                        summary="Get the status and result of a comparison job",
+                        dependencies=[Depends(authenticate_request)])
+async def get_compare_job(
+    job_id: str,
+    response: Response,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> CompareJobResponse:
+    """
+    Return the status of a comparison job and, once finished, its result.
+
+    Unfinished jobs carry a Retry-After header with the suggested polling
+    interval. Finished jobs are read from the database and never recomputed.
+
+    Args:
+        job_id: ID returned when the job was queued.
+        response: Outgoing response, used to set the Retry-After header.
+        user: Current authenticated user.
+        db: SQLAlchemy async database session.
+
+    Returns:
+        CompareJobResponse: Job status, result or error.
+
+    Raises:
+        HTTPException: If the job does not exist or belongs to another user.
+    """
+    job = await db.get(CompareJob, job_id)
+    if job is None or job.owner_id != user.id:
+        logger.warning("Comparison job not found: %s", job_id)
+        raise HTTPException(status_code=404, detail="Comparison job not found")
+
+    if job.status not in (JOB_DONE, JOB_FAILED):
+        response.headers["Retry-After"] = str(COMPARE_RETRY_AFTER)
+    return to_response(job)
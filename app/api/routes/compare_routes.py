@@ -1,35 +1,76 @@
 import asyncio
+import json
 import logging
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from app.core.auth import security
-from app.config import MAX_FILE_SIZE
-from app.core.compare_melodies import compare_melodies
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, File, Header, UploadFile, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from app.api.melody_jobs import run_melody_job
+from app.core.auth import authenticate_request
+from app.config import COMPARE_BATCH_MAX_FILES, MAX_FILE_SIZE
+from app.core.compare_melodies import analyze_reference, compare_with_reference
+from app.core.melody_engine import MelodyEngine, get_melody_engine
+from app.core.result_cache import ResultCache, get_result_cache
+from app.core.spooled_audio import (AudioSource, SpoolUnavailableError,
+                                    compare_melodies_sources, open_source,
+                                    read_upload, upload_source)
 
 logger = logging.getLogger(__name__)
 
 compare_router = APIRouter(tags=["compare"])
 
+
+def source_cache_key(cache: ResultCache, source1: AudioSource, source2: AudioSource):
+    """Build the result cache key of two audio sources."""
+    with open_source(source1) as file1, open_source(source2) as file2:
+        return cache.key(file1, file2)
+
+
+def with_timings(
+    response: Dict[str, Any], timings: Optional[List[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """Attach stage timings to a response body when they were requested."""
+    if timings is not None:
+        response["timings"] = timings
+    return response
+
+
 @compare_router.post("/api/api/v1/compare_melodies",
                      summary="Compare two audio files for melody similarity",
-                     dependencies=[Depends(security.get_token_from_request)])
+                     dependencies=[Depends(authenticate_request)])
 async def compare_melodies_route(
-    file1: UploadFile = File(..., media_type="audio/mpeg"), file2: UploadFile = File(..., media_type="audio/mpeg")
+    file1: UploadFile = File(..., media_type="audio/mpeg"), file2: UploadFile = File(..., media_type="audio/mpeg"),
+    engine: MelodyEngine = Depends(get_melody_engine),
+    cache: ResultCache = Depends(get_result_cache),
+    x_debug_timings: Optional[str] = Header(None),
 ):
     """
     Compare two uploaded audio files to determine melody similarity.
 
+    Resubmitting the same pair of files returns the cached result without
+    running the comparison again.
+
+    With an ``X-Debug-Timings: 1`` header the response also carries a
+    ``timings`` list with the wall time, CPU time and input size of every
+    pipeline stage; it is empty for cached results.
+
     Args:
         file1: First audio file to compare.
         file2: Second audio file to compare.
+        engine: Process pool running the comparison.
+        cache: Cache of comparison results.
+        x_debug_timings: Debug header requesting stage timings.
 
     Returns:
         dict: Comparison result or error message.
 
     Raises:
-        HTTPException: If file validation fails, file is too large, or comparison fails.
+        HTTPException: If file validation fails, file is too large, the
+            comparison queue is full, or comparison fails.
     """
     logger.info("Received request to compare melodies: %s, %s", file1.filename, file2.filename)
-    
+
     try:
         # Validate file size
         if file1.size > MAX_FILE_SIZE or file2.size > MAX_FILE_SIZE:
@@ -38,14 +79,32 @@ async def compare_melodies_route(
                 status_code=413, detail="File size exceeds limit of 10MB"
             )
 
-        # Read file contents without async with (UploadFile doesn't require async context)
-        logger.debug("Reading files: %s, %s", file1.filename, file2.filename)
-        file1_content = await file1.read()
-        file2_content = await file2.read()
+        # Large uploads stay in their spool files; workers map them directly
+        logger.debug("Preparing files: %s, %s", file1.filename, file2.filename)
+        source1 = await upload_source(file1)
+        source2 = await upload_source(file2)
+
+        # Repeated submissions of the same attempt skip the comparison
+        key = await asyncio.to_thread(source_cache_key, cache, source1, source2)
+        timings = [] if x_debug_timings and x_debug_timings != "0" else None
+        result = cache.get(key)
+        if result is not None:
+            logger.info("Returning cached comparison result")
+            return with_timings({"result": result}, timings)
 
-        # Compare melodies in a separate thread to avoid blocking
+        # Compare melodies in a worker process to keep the event loop and GIL free
         logger.debug("Starting melody comparison")
-        result = await asyncio.to_thread(compare_melodies, file1_content, file2_content)
+        try:
+            result = await run_melody_job(
+                engine, compare_melodies_sources, source1, source2, timings=timings
+            )
+        except SpoolUnavailableError as e:
+            # The worker cannot open the spool files: send their content instead
+            logger.warning("Sending upload content to the worker: %s", str(e))
+            result = await run_melody_job(
+                engine, compare_melodies_sources,
+                await read_upload(file1), await read_upload(file2), timings=timings,
+            )
 
         if result is None:
             logger.error("Melody comparison returned None")
@@ -53,9 +112,147 @@ async def compare_melodies_route(
                 status_code=500, detail="Error during melody comparison"
             )
 
+        cache.put(key, result)
         logger.info("Melody comparison completed successfully")
-        return {"result": result}
+        return with_timings({"result": result}, timings)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Unexpected error during melody comparison: %s", str(e))
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+async def compare_student(
+    engine: MelodyEngine, reference: Dict[str, Any], index: int, filename: str, content: bytes
+) -> Dict[str, Any]:
+    """
+    Compare one student recording with an analyzed reference.
+
+    Errors are reported in the returned record instead of being raised, so
+    one failing recording does not abort the rest of the batch.
+
+    Args:
+        engine: Process pool running the comparison.
+        reference: Result of ``analyze_reference``.
+        index: Position of the file in the request.
+        filename: Name of the uploaded file.
+        content: Student recording.
+
+    Returns:
+        dict: ``result`` on success, ``status_code`` and ``detail`` otherwise.
+    """
+    record: Dict[str, Any] = {"index": index, "filename": filename}
+    try:
+        result = await run_melody_job(engine, compare_with_reference, reference, content)
+    except HTTPException as e:
+        record.update(status_code=e.status_code, detail=e.detail)
+        return record
+    except Exception as e:
+        logger.error("Comparison of %s failed: %s", filename, str(e))
+        record.update(status_code=500, detail="Internal server error")
+        return record
+
+    if result is None:
+        logger.error("Melody comparison returned None for %s", filename)
+        record.update(status_code=500, detail="Error during melody comparison")
+    else:
+        record["result"] = result
+    return record
+
+
+async def stream_batch_results(
+    engine: MelodyEngine, reference: Dict[str, Any], students: List[Tuple[str, bytes]]
+) -> AsyncIterator[str]:
+    """
+    Compare student recordings in parallel and yield NDJSON lines as they finish.
+
+    At most ``engine.workers`` recordings of the batch are in flight, so a
+    large class does not fill the engine queue and starve other requests.
+
+    Args:
+        engine: Process pool running the comparisons.
+        reference: Result of ``analyze_reference``.
+        students: File names and contents of the student recordings.
+
+    Yields:
+        str: One JSON record per student, in completion order.
+    """
+    queue = iter(enumerate(students))
+    running = set()
+
+    def schedule() -> None:
+        for index, (filename, content) in queue:
+            running.add(asyncio.ensure_future(
+                compare_student(engine, reference, index, filename, content)
+            ))
+            if len(running) >= engine.workers:
+                return
+
+    schedule()
+    try:
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                running.discard(task)
+                yield json.dumps(jsonable_encoder(task.result())) + "\n"
+            schedule()
+    finally:
+        # The client went away: drop comparisons that have not finished
+        for task in running:
+            task.cancel()
+
+
+@compare_router.post("/api/api/v1/compare_melodies/batch",
+                     summary="Compare many student recordings with one reference",
+                     dependencies=[Depends(authenticate_request)])
+async def compare_melodies_batch_route(
+    reference: UploadFile = File(..., media_type="audio/mpeg"),
+    students: List[UploadFile] = File(..., media_type="audio/mpeg"),
+    engine: MelodyEngine = Depends(get_melody_engine),
+) -> StreamingResponse:
+    """
+    Compare a batch of student recordings with one reference recording.
+
+    The reference is analyzed once; student recordings are compared in
+    parallel worker processes and each result is streamed back as a line
+    of NDJSON as soon as it is ready:
+    ``{"index": 0, "filename": "a.mp3", "result": [...]}`` or
+    ``{"index": 1, "filename": "b.mp3", "status_code": 504, "detail": "..."}``.
+
+    Args:
+        reference: Teacher recording.
+        students: Student recordings.
+        engine: Process pool running the comparisons.
+
+    Returns:
+        StreamingResponse: ``application/x-ndjson`` stream of per-student results.
+
+    Raises:
+        HTTPException: If there are too many files, a file is too large, or
+            the reference cannot be analyzed.
+    """
+    logger.info("Received batch comparison: %s vs %d students", reference.filename, len(students))
+
+    if len(students) > COMPARE_BATCH_MAX_FILES:
+        logger.warning("Too many files in batch: %d", len(students))
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {COMPARE_BATCH_MAX_FILES} student files per request",
+        )
+    for file in [reference, *students]:
+        if file.size > MAX_FILE_SIZE:
+            logger.warning("File too large: %s", file.filename)
+            raise HTTPException(status_code=413, detail="File size exceeds limit of 10MB")
+
+    features = await run_melody_job(engine, analyze_reference, await reference.read())
+    if features is None:
+        logger.error("Reference analysis returned None")
+        raise HTTPException(status_code=422, detail="Could not extract melody from reference")
+
+    # Read uploads before streaming: they are closed once the handler returns
+    contents = [(file.filename, await file.read()) for file in students]
+    return StreamingResponse(
+        stream_batch_results(engine, features, contents),
+        media_type="application/x-ndjson",
+    )
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import random
 from datetime import datetime
@@ -5,25 +6,29 @@ from typing import Optional
 
 from jsonschema import ValidationError
 
-from authx import RequestToken
 from fastapi import APIRouter, Body, Depends, File, Response, UploadFile, HTTPException, Request, Cookie
 from fastapi.responses import JSONResponse
+from minio import Minio
 from pydantic import BaseModel, EmailStr
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import jwt
 
 from app.config import JWT_REFRESH_COOKIE_NAME, MINIO_BUCKET_NAME, MAX_FILE_SIZE
-from app.core.auth import get_current_user, pwd_context, security
+from app.core.auth import (authenticate_request, get_current_user_for_update, hash_password,
+                           rehash_password, security, verify_access_token,
+                           verify_and_update_password, verify_password)
+from app.core.user_cache import user_cache
 from app.core.email_sender import send_verification_email
-from app.data.database import get_db
+from app.data.database import get_async_db, get_db
 from app.data.models import User
 from app.data.storage import get_minio_client
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-minio_client = get_minio_client()
-
 router = APIRouter(prefix="/api/v1", tags=["legacy"])
 
 class Register(BaseModel):
@@ -61,27 +66,27 @@ class PasswordUpdate(BaseModel):
     current_password: str
     new_password: str
 
-def register(data: Register, db: Session) -> dict:
+async def register(data: Register, db: AsyncSession) -> User:
     """
     Register a new user and send a verification email.
 
     Args:
         data: Registration data (email, password).
-        db: SQLAlchemy database session.
+        db: SQLAlchemy async database session.
 
     Returns:
-        dict: User ID.
+        User: Inserted user; its ID is assigned by the insert.
 
     Raises:
         HTTPException: If email is already registered.
     """
     logger.info("Registering user: %s", data.email)
-    existing_user = db.query(User).filter(User.email == data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == data.email))
     if existing_user:
         logger.warning("Email already registered: %s", data.email)
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = pwd_context.hash(data.password)
+    hashed_password = await hash_password(data.password)
     code = 100 # TODO: Заменть на нормальное создание кода
     code_date = datetime.utcnow()
     user = User(
@@ -93,14 +98,18 @@ def register(data: Register, db: Session) -> dict:
     )
     try:
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
         send_verification_email(user.email, code) # TODO сделать чтобы работало
         logger.info("User registered successfully: %s", data.email)
-        return {"id": user.id}
+        return user
+    except IntegrityError:
+        # Registered concurrently after the check above
+        logger.warning("Email already registered: %s", data.email)
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
     except Exception as e:
         logger.error("Failed to register user %s: %s", data.email, str(e))
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to register user")
 
 
@@ -129,6 +138,7 @@ def verify_user(data: VerifyUser, db: Session) -> dict:
     #if str(user.code) == data.code:
     user.status = "active"
     db.commit()
+    user_cache.invalidate(user.id)
     logger.info("User verified successfully: %s", data.email)
     return {"message": "User activated"}
     #logger.warning("Invalid verification code for user: %s", data.email)
@@ -168,13 +178,13 @@ def send_code(data: SendCode, db: Session) -> dict:
         raise HTTPException(status_code=500, detail="Failed to send code")
 
 
-def login(data: Login, db: Session) -> AuthResponse:
+async def login(data: Login, db: AsyncSession) -> AuthResponse:
     """
     Log in a user and generate access and refresh tokens.
 
     Args:
         data: Login data (email, password).
-        db: SQLAlchemy database session.
+        db: SQLAlchemy async database session.
 
     Returns:
         AuthResponse: Access and refresh tokens.
@@ -183,23 +193,41 @@ def login(data: Login, db: Session) -> AuthResponse:
         HTTPException: If credentials are invalid.
     """
     logger.info("Login attempt for user: %s", data.email)
-    user = db.query(User).filter(User.email == data.email).first()
-    if not user or not pwd_context.verify(data.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == data.email))
+    if not user:
         logger.warning("Invalid credentials for user: %s", data.email)
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await verify_and_update_password(data.password, user.hashed_password)
+    if not valid:
+        logger.warning("Invalid credentials for user: %s", data.email)
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    await rehash_password(user, new_hash, db)
+    logger.info("User logged in successfully: %s", data.email)
+    return issue_tokens(user)
+
+
+def issue_tokens(user: User) -> AuthResponse:
+    """
+    Create access and refresh tokens for an authenticated user.
+
+    Args:
+        user: User whose identity was already established.
+
+    Returns:
+        AuthResponse: Access and refresh tokens.
+    """
     access_token = security.create_access_token(uid=str(user.id))
     refresh_token = security.create_refresh_token(uid=str(user.id))
-    logger.info("User logged in successfully: %s", data.email)
     return AuthResponse(access_token=access_token, refresh_token=refresh_token)
 
 
-def check_token(access_token: str, db: Session) -> User:
+async def check_token(access_token: str, db: AsyncSession) -> User:
     """
     Check if the provided access token is valid.
 
     Args:
         access_token: JWT access token.
-        db: SQLAlchemy database session.
+        db: SQLAlchemy async database session.
 
     Returns:
         User: User object if token is valid.
@@ -209,10 +237,10 @@ def check_token(access_token: str, db: Session) -> User:
     """
     logger.debug("Checking token validity")
     try:
-        payload = security._decode_token(access_token)
+        payload = verify_access_token(access_token)
         user_id = payload.sub
-        user = db.query(User).filter(User.id == user_id).first()
-        if user and payload.time_until_expiry.total_seconds() > 0:
+        user = await db.get(User, int(user_id))
+        if user:
             logger.info("Token valid for user ID: %s", user_id)
             return user
         logger.warning("User not found for ID: %s", user_id)
@@ -266,7 +294,7 @@ def refresh_token(request: Request, db: Session) -> JSONResponse:
         raise HTTPException(status_code=403, detail="Invalid or expired refresh token")
 
 
-def password_update(current_password: str, new_password: str, user: User, db: Session) -> dict:
+async def password_update(current_password: str, new_password: str, user: User, db: AsyncSession) -> dict:
     """
     Update the user's password.
 
@@ -274,7 +302,7 @@ def password_update(current_password: str, new_password: str, user: User, db: Se
         current_password: Current password.
         new_password: New password.
         user: Current authenticated user.
-        db: SQLAlchemy database session.
+        db: SQLAlchemy async database session.
 
     Returns:
         dict: Success message.
@@ -283,29 +311,30 @@ def password_update(current_password: str, new_password: str, user: User, db: Se
         HTTPException: If current password is invalid.
     """
     logger.info("Password update request for user: %s", user.email)
-    if not pwd_context.verify(current_password, user.hashed_password):
+    if not await verify_password(current_password, user.hashed_password):
         logger.warning("Invalid current password for user: %s", user.email)
         raise HTTPException(status_code=400, detail="Invalid current password")
-    hashed_new_password = pwd_context.hash(new_password)
+    hashed_new_password = await hash_password(new_password)
     user.hashed_password = hashed_new_password
     try:
-        db.commit()
+        await db.commit()
+        user_cache.invalidate(user.id)
         logger.info("Password updated successfully for user: %s", user.email)
         return {"message": "Password updated"}
     except Exception as e:
         logger.error("Failed to update password for %s: %s", user.email, str(e))
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to update password")
 
 
-def update_user(data: UpdateUser, user: User, db: Session) -> User:
+async def update_user(data: UpdateUser, user: User, db: AsyncSession) -> User:
     """
     Update user profile information.
 
     Args:
         data: Update data (first_name, second_name, email).
         user: Current authenticated user.
-        db: SQLAlchemy database session.
+        db: SQLAlchemy async database session.
 
     Returns:
         User: Updated user object.
@@ -315,7 +344,7 @@ def update_user(data: UpdateUser, user: User, db: Session) -> User:
     """
     logger.info("Updating profile for user: %s", user.email)
     if data.email and data.email != user.email:
-        existing_user = db.query(User).filter(User.email == data.email).first()
+        existing_user = await db.scalar(select(User).where(User.email == data.email))
         if existing_user:
             logger.warning("Email already taken: %s", data.email)
             raise HTTPException(status_code=400, detail="Email already taken")
@@ -325,23 +354,25 @@ def update_user(data: UpdateUser, user: User, db: Session) -> User:
     if data.second_name is not None:
         user.second_name = data.second_name
     try:
-        db.commit()
+        await db.commit()
+        user_cache.invalidate(user.id)
         logger.info("Profile updated successfully for user: %s", user.email)
         return user
     except Exception as e:
         logger.error("Failed to update profile for %s: %s", user.email, str(e))
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to update profile")
 
 
-def update_avatar(avatar: UploadFile, user: User, db: Session) -> User:
+async def update_avatar(avatar: UploadFile, user: User, db: AsyncSession, minio_client: Minio) -> User:
     """
     Update the user's avatar and store it in MinIO.
 
     Args:
         avatar: Uploaded avatar file.
         user: Current authenticated user.
-        db: SQLAlchemy database session.
+        db: SQLAlchemy async database session.
+        minio_client: Shared MinIO client.
 
     Returns:
         User: Updated user object.
@@ -362,16 +393,21 @@ def update_avatar(avatar: UploadFile, user: User, db: Session) -> User:
         avatar.file.seek(0, 2)
         file_size = avatar.file.tell()
         avatar.file.seek(0)
-        minio_client.put_object(
+        # MinIO calls are blocking: keep them off the event loop
+        await asyncio.to_thread(
+            minio_client.put_object,
             bucket_name=MINIO_BUCKET_NAME,
             object_name=object_name,
             data=avatar.file,
             length=file_size,
             content_type=avatar.content_type or "application/octet-stream",
         )
-        avatar_url = minio_client.presigned_get_object(MINIO_BUCKET_NAME, object_name)
+        avatar_url = await asyncio.to_thread(
+            minio_client.presigned_get_object, MINIO_BUCKET_NAME, object_name
+        )
         user.avatar = avatar_url
-        db.commit()
+        await db.commit()
+        user_cache.invalidate(user.id)
         logger.info("Avatar updated successfully for user: %s", user.email)
         return user
     except Exception as e:
@@ -383,7 +419,7 @@ def update_avatar(avatar: UploadFile, user: User, db: Session) -> User:
 async def register_user(
     request: Request,
     response: Response,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     content_type = request.headers.get("Content-Type", "")
 
@@ -407,8 +443,9 @@ async def register_user(
     else:
         return JSONResponse(status_code=415, content={"detail": "Unsupported Media Type"})
 
-    register(data, db)
-    result = login(data, db)
+    # The new row already identifies the user: no lookup or password check is needed
+    user = await register(data, db)
+    result = issue_tokens(user)
 
     response.set_cookie(key="access_token", value=result.access_token)
     response.set_cookie(key="refresh_token", value=result.refresh_token)
@@ -431,13 +468,13 @@ def send_code_endpoint(data: SendCode, db: Session = Depends(get_db)):
 from fastapi import Form
 
 @router.post("/auth/login", response_model=AuthResponse)
-def login_user(
+async def login_user(
     response: Response,
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    result = login(Login(email=email, password=password), db)
+    result = await login(Login(email=email, password=password), db)
 
     response.set_cookie(key="access_token", value=result.access_token)
     response.set_cookie(key="refresh_token", value=result.refresh_token)
@@ -453,7 +490,7 @@ from typing import Optional
 async def check_token_endpoint(
     access_token: Optional[str] = Body(None),
     cookie_token: Optional[str] = Cookie(None, alias="access_token"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Проверяет валидность токена. Принимает токен:
@@ -476,7 +513,7 @@ async def check_token_endpoint(
     # Проверяем токены по порядку
     for token in tokens:
         try:
-            result = check_token(token, db)
+            result = await check_token(token, db)
             # Если токен валиден, возвращаем результат
             return result
         except HTTPException:
@@ -496,47 +533,33 @@ def refresh_token_endpoint(request: Request, db: Session = Depends(get_db)):
     return refresh_token(request, db)
 
 
-@router.put("/auth/password", response_model=dict, dependencies=[Depends(security.get_token_from_request)])
-def update_password(
+@router.put("/auth/password", response_model=dict, dependencies=[Depends(authenticate_request)])
+async def update_password(
     data: PasswordUpdate,
-    token: RequestToken = Depends(),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Update the user's password."""
-    try: 
-        security.verify_token(token=token)
-        return password_update(data.current_password, data.new_password, user, db)
-    except Exception as e:
-          raise HTTPException(401, detail={"message": str(e)}) from e
+    return await password_update(data.current_password, data.new_password, user, db)
 
 
-@router.put("/auth", dependencies=[Depends(security.get_token_from_request)])
-def update_user_endpoint(
+@router.put("/auth", dependencies=[Depends(authenticate_request)])
+async def update_user_endpoint(
     data: UpdateUser,
-    token: RequestToken = Depends(),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Update the user's profile."""
-    try: 
-        security.verify_token(token=token)
-        return update_user(data, user, db)
-    except Exception as e:
-          raise HTTPException(401, detail={"message": str(e)}) from e
+    return await update_user(data, user, db)
     
 
 
-@router.put("/auth/avatar", dependencies=[Depends(security.get_token_from_request)])
-def update_avatar_endpoint(
-    token: RequestToken = Depends(),
+@router.put("/auth/avatar", dependencies=[Depends(authenticate_request)])
+async def update_avatar_endpoint(
     avatar: UploadFile = File(...),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db),
+    minio_client: Minio = Depends(get_minio_client),
 ):
     """Update the user's avatar."""
-    try: 
-        security.verify_token(token=token)
-        return update_avatar(avatar, user, db)
-    except Exception as e:
-          raise HTTPException(401, detail={"message": str(e)}) from e
\ No newline at end of file
+    return await update_avatar(avatar, user, db, minio_client)
\ No newline at end of file
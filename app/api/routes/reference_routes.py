@@ -0,0 +1,167 @@
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.melody_jobs import run_melody_job
+from app.config import MAX_FILE_SIZE
+from app.core.auth import authenticate_request, get_current_user
+from app.core.compare_melodies import analyze_reference, compare_with_reference
+from app.core.melody_engine import MelodyEngine, get_melody_engine
+from app.data.database import get_async_db
+from app.data.models import ReferenceTrack, User
+from app.data.schemas import ReferenceTrackResponse
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+reference_router = APIRouter(prefix="/api/api/v1/references", tags=["compare"])
+
+
+def to_response(reference: ReferenceTrack) -> ReferenceTrackResponse:
+    return ReferenceTrackResponse(
+        id=reference.id,
+        title=reference.title,
+        created_at=reference.created_at,
+        notes_count=len(reference.notes),
+    )
+
+
+@reference_router.post("/", response_model=ReferenceTrackResponse,
+                       summary="Register a teacher recording as a reference track",
+                       dependencies=[Depends(authenticate_request)])
+async def create_reference(
+    file: UploadFile = File(..., media_type="audio/mpeg"),
+    title: Optional[str] = Form(None),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    engine: MelodyEngine = Depends(get_melody_engine),
+) -> ReferenceTrackResponse:
+    """
+    Analyze a teacher recording once and store its melody and notes.
+
+    Args:
+        file: Teacher recording.
+        title: Optional human-readable title.
+        user: Current authenticated user, owner of the reference.
+        db: SQLAlchemy async database session.
+        engine: Process pool running the analysis.
+
+    Returns:
+        ReferenceTrackResponse: Stored reference track.
+
+    Raises:
+        HTTPException: If the file is too large or cannot be analyzed.
+    """
+    logger.info("Registering reference track for user %s: %s", user.id, file.filename)
+    if file.size > MAX_FILE_SIZE:
+        logger.warning("File too large: %s", file.filename)
+        raise HTTPException(status_code=413, detail="File size exceeds limit of 10MB")
+
+    content = await file.read()
+    features = await run_melody_job(engine, analyze_reference, content)
+    if features is None:
+        logger.error("Reference analysis returned None")
+        raise HTTPException(status_code=422, detail="Could not extract melody from file")
+
+    reference = ReferenceTrack(owner_id=user.id, title=title or file.filename, **features)
+    try:
+        db.add(reference)
+        await db.commit()
+        await db.refresh(reference)
+    except Exception as e:
+        logger.error("Failed to store reference track: %s", str(e))
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Failed to store reference track")
+
+    logger.info("Reference track %s registered", reference.id)
+    return to_response(reference)
+
+
+@reference_router.get("/", response_model=List[ReferenceTrackResponse],
+                      dependencies=[Depends(authenticate_request)])
+async def list_references(
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> List[ReferenceTrackResponse]:
+    """
+    List reference tracks registered by the current user.
+
+    Only the listed columns are loaded: the melody and notes JSON of a
+    reference are large, and the database counts the notes itself.
+    """
+    rows = await db.execute(
+        select(
+            ReferenceTrack.id,
+            ReferenceTrack.title,
+            ReferenceTrack.created_at,
+            func.json_array_length(ReferenceTrack.notes).label("notes_count"),
+        )
+        .where(ReferenceTrack.owner_id == user.id)
+        .order_by(ReferenceTrack.id)
+    )
+    return [ReferenceTrackResponse(**row._mapping) for row in rows]
+
+
+@reference_router.post("/{reference_id}/compare",
+                       summary="Compare a student recording with a reference track",
+                       dependencies=[Depends(authenticate_request)])
+async def compare_with_reference_route(
+    reference_id: int,
+    file: UploadFile = File(..., media_type="audio/mpeg"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    engine: MelodyEngine = Depends(get_melody_engine),
+):
+    """
+    Compare a student recording with a stored reference track.
+
+    Only the student's file is uploaded and decoded; the teacher's melody
+    and notes come from the database. Reference tracks are private: the
+    reference of another user is reported as missing.
+
+    Args:
+        reference_id: ID of the reference track.
+        file: Student recording.
+        user: Current authenticated user, owner of the reference.
+        db: SQLAlchemy async database session.
+        engine: Process pool running the comparison.
+
+    Returns:
+        dict: Comparison result.
+
+    Raises:
+        HTTPException: If the reference is missing, the file is too large,
+            or comparison fails.
+    """
+    logger.info("User %s compares %s with reference %s", user.id, file.filename, reference_id)
+    reference = await db.scalar(
+        select(ReferenceTrack).where(
+            ReferenceTrack.id == reference_id, ReferenceTrack.owner_id == user.id
+        )
+    )
+    if not reference:
+        logger.warning("Reference track not found: %s", reference_id)
+        raise HTTPException(status_code=404, detail="Reference track not found")
+
+    if file.size > MAX_FILE_SIZE:
+        logger.warning("File too large: %s", file.filename)
+        raise HTTPException(status_code=413, detail="File size exceeds limit of 10MB")
+
+    features = {
+        "melody": reference.melody,
+        "min_per": reference.min_per,
+        "notes": reference.notes,
+        "frequencies": reference.frequencies,
+        "lengths": reference.lengths,
+    }
+    content = await file.read()
+    result = await run_melody_job(engine, compare_with_reference, features, content)
+    if result is None:
+        logger.error("Melody comparison returned None")
+        raise HTTPException(status_code=500, detail="Error during melody comparison")
+
+    logger.info("Comparison with reference %s completed successfully", reference_id)
+    return {"result": result}
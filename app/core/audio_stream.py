@@ -0,0 +1,306 @@
+import io
+import itertools
+import logging
+import math
+from typing import Iterator, Optional, Tuple
+
+import librosa
+import numpy as np
+import soundfile as sf
+import soxr
+
+from app.core.mel_bands import band_filterbank, band_mel
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class MemoryReader(io.RawIOBase):
+    """
+    Seekable read-only file over a bytes-like object.
+
+    Unlike ``io.BytesIO``, which copies anything but ``bytes``, reads go
+    straight from the underlying buffer (e.g. an ``mmap``) into the
+    decoder's buffer.
+
+    Args:
+        data: Bytes-like object holding an encoded audio file.
+    """
+
+    def __init__(self, data):
+        super().__init__()
+        self._view = memoryview(data).cast("B")
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = max(0, min(len(buffer), len(self._view) - self._position))
+        buffer[:count] = self._view[self._position:self._position + count]
+        self._position += count
+        return count
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError("Negative seek position")
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        self._view.release()
+        super().close()
+
+
+def read_mono_blocks(
+    sound_file: sf.SoundFile, start: int, stop: int, blocksize: int
+) -> Iterator[np.ndarray]:
+    """
+    Read samples ``[start, stop)`` as float32 mono blocks.
+
+    Channels are averaged the same way ``librosa.load`` does, so the
+    concatenated blocks equal the signal librosa would load.
+
+    Args:
+        sound_file: Open seekable sound file.
+        start: First sample to read.
+        stop: Sample after the last one to read.
+        blocksize: Maximum number of samples per block.
+
+    Yields:
+        np.ndarray: Mono block of at most ``blocksize`` samples.
+    """
+    sound_file.seek(start)
+    remaining = stop - start
+    while remaining > 0:
+        block = sound_file.read(min(blocksize, remaining), dtype="float32", always_2d=True)
+        if not len(block):
+            break
+        remaining -= len(block)
+        yield np.mean(block.T, axis=0)
+
+
+class BlockReader:
+    """
+    Mono blocks of a sound file at the analysis sample rate.
+
+    Without resampling, blocks are read after seeking to the requested
+    sample. With resampling, the file is passed through a streaming soxr
+    resampler, which gives the same samples as ``librosa.load(sr=...)``
+    with the matching ``res_type``.
+
+    Args:
+        sound_file: Open seekable sound file.
+        blocksize: Maximum number of samples decoded at once.
+        sr: Analysis sample rate; ``None`` keeps the native rate.
+        res_type: soxr quality in librosa notation, e.g. ``"soxr_hq"``.
+    """
+
+    def __init__(
+        self,
+        sound_file: sf.SoundFile,
+        blocksize: int,
+        sr: Optional[int] = None,
+        res_type: str = "soxr_hq",
+    ):
+        self.sound_file = sound_file
+        self.blocksize = blocksize
+        self.sr = sr or sound_file.samplerate
+        self.res_type = res_type
+        if self.resampling:
+            # Same length as librosa.resample produces (fix_length)
+            self.frames = int(math.ceil(sound_file.frames * self.sr / sound_file.samplerate))
+        else:
+            self.frames = sound_file.frames
+
+    @property
+    def resampling(self) -> bool:
+        return self.sr != self.sound_file.samplerate
+
+    def blocks(self, start: int, stop: int) -> Iterator[np.ndarray]:
+        """
+        Yield samples ``[start, stop)`` at the analysis rate.
+
+        Args:
+            start: First sample to read.
+            stop: Sample after the last one to read.
+
+        Yields:
+            np.ndarray: Consecutive float32 mono blocks.
+        """
+        stop = min(stop, self.frames)
+        if not self.resampling:
+            yield from read_mono_blocks(self.sound_file, start, stop, self.blocksize)
+            return
+
+        position = 0
+        for block in self._resampled():
+            first, last = max(start - position, 0), min(stop - position, len(block))
+            position += len(block)
+            if first < last:
+                yield block[first:last]
+            if position >= stop:
+                return
+        if position < stop:
+            yield np.zeros(stop - max(position, start), dtype=np.float32)
+
+    def _resampled(self) -> Iterator[np.ndarray]:
+        resampler = soxr.ResampleStream(
+            self.sound_file.samplerate, self.sr, 1, dtype="float32", quality=self.res_type
+        )
+        native = read_mono_blocks(self.sound_file, 0, self.sound_file.frames, self.blocksize)
+        block = next(native, None)
+        while block is not None:
+            following = next(native, None)
+            yield resampler.resample_chunk(block, last=following is None)
+            block = following
+
+
+def iter_frame_segments(
+    blocks: Iterator[np.ndarray], frame_length: int, hop_length: int
+) -> Iterator[np.ndarray]:
+    """
+    Cut a stream of samples into segments of whole analysis frames.
+
+    The stream is zero-padded by ``frame_length // 2`` on both sides, as
+    librosa does with ``center=True``. Framing the yielded segments with
+    ``center=False`` gives exactly the frames of the whole padded signal,
+    in order and without duplicates. Every segment holds at least two
+    frames (unless the whole signal has one), so NumPy reduces each frame
+    in the same order as it does for the full frame matrix.
+
+    Args:
+        blocks: Consecutive sample blocks.
+        frame_length: Frame length in samples.
+        hop_length: Hop between frames in samples.
+
+    Yields:
+        np.ndarray: Signal segment covering consecutive frames.
+    """
+    padding = np.zeros(frame_length // 2, dtype=np.float32)
+    buffer = padding
+    pending: Optional[np.ndarray] = None
+    for block in itertools.chain(blocks, [padding]):
+        buffer = np.concatenate((buffer, block))
+        if len(buffer) < frame_length + hop_length:
+            continue
+        count = 1 + (len(buffer) - frame_length) // hop_length
+        if pending is not None:
+            yield pending
+        pending = buffer[: (count - 1) * hop_length + frame_length]
+        buffer = buffer[count * hop_length :]
+
+    if len(buffer) >= frame_length:
+        # A single frame is left: attach it to the previous segment
+        if pending is not None:
+            count = 1 + (len(pending) - frame_length) // hop_length
+            pending = np.concatenate((pending[: count * hop_length], buffer[:frame_length]))
+        else:
+            pending = buffer[:frame_length]
+    if pending is not None:
+        yield pending
+
+
+def stream_trim_bounds(
+    reader: BlockReader,
+    top_db: float,
+    frame_length: int = 2048,
+    hop_length: int = 512,
+) -> Tuple[int, int]:
+    """
+    Find the non-silent region of a file the way ``librosa.effects.trim`` does.
+
+    Only the framewise RMS values are kept in memory, one float per hop.
+
+    Args:
+        reader: Source of analysis-rate blocks.
+        top_db: Threshold in decibels below the loudest frame.
+        frame_length: Frame length in samples.
+        hop_length: Hop between frames in samples.
+
+    Returns:
+        Tuple[int, int]: Start and end sample of the non-silent region;
+        ``(0, 0)`` if the whole file is silent.
+    """
+    blocks = reader.blocks(0, reader.frames)
+    rms = [
+        librosa.feature.rms(
+            y=segment, frame_length=frame_length, hop_length=hop_length, center=False
+        )[0]
+        for segment in iter_frame_segments(blocks, frame_length, hop_length)
+    ]
+    if not rms:
+        return 0, 0
+
+    db = librosa.amplitude_to_db(np.concatenate(rms), ref=np.max, top_db=None)
+    nonzero = np.flatnonzero(db > -top_db)
+    if not len(nonzero):
+        return 0, 0
+
+    start = int(librosa.frames_to_samples(nonzero[0], hop_length=hop_length))
+    end = min(
+        reader.frames,
+        int(librosa.frames_to_samples(nonzero[-1] + 1, hop_length=hop_length)),
+    )
+    return start, end
+
+
+def stream_mel_db(
+    reader: BlockReader,
+    start: int,
+    stop: int,
+    n_mels: int,
+    bands: slice,
+    n_fft: int = 2048,
+    hop_length: int = 512,
+    top_db: float = 80.0,
+) -> np.ndarray:
+    """
+    Compute selected bands of the dB mel spectrogram block by block.
+
+    Mirrors ``amplitude_to_db(melspectrogram(y=y[start:stop]))[bands]``
+    up to float32 rounding. Only the selected filters are applied to each
+    block; the ``top_db`` floor, which depends on the peak over all bands
+    and frames, is applied at the end.
+
+    Args:
+        reader: Source of analysis-rate blocks.
+        start: First sample of the analyzed region.
+        stop: Sample after the last one of the analyzed region.
+        n_mels: Number of mel bands of the filterbank.
+        bands: Bands to keep.
+        n_fft: FFT window size.
+        hop_length: Hop between frames in samples.
+        top_db: Dynamic range kept below the maximum.
+
+    Returns:
+        np.ndarray: Array of shape (selected bands, frames) in decibels.
+    """
+    first, last, _ = bands.indices(n_mels)
+    filterbank = band_filterbank(reader.sr, n_fft, n_mels, first, last)
+    selected = []
+    peak = 0.0
+    blocks = reader.blocks(start, stop)
+    for segment in iter_frame_segments(blocks, n_fft, hop_length):
+        power = (
+            np.abs(librosa.stft(segment, n_fft=n_fft, hop_length=hop_length, center=False))
+            ** 2.0
+        )
+        mel, peak = band_mel(power, filterbank, peak)
+        selected.append(librosa.amplitude_to_db(mel, top_db=None))
+
+    if not selected:
+        raise ValueError("Empty audio region")
+    db = np.concatenate(selected, axis=1)
+    peak_db = librosa.amplitude_to_db(np.array([peak], dtype=db.dtype), top_db=None)[0]
+    return np.maximum(db, peak_db - top_db)
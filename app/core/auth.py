@@ -1,12 +1,20 @@
 import logging
+from typing import Optional, Tuple
+
 from fastapi import Depends, HTTPException, Request, status
-from jose import ExpiredSignatureError, JWTError
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from authx import AuthX, AuthXConfig
-from app.config import JWT_ACCESS_COOKIE_NAME, JWT_REFRESH_COOKIE_NAME, JWT_SECRET_KEY
-from app.data.database import get_db
+from authx.exceptions import AuthXException
+from authx.schema import TokenPayload
+from app.config import (JWT_ACCESS_COOKIE_NAME, JWT_REFRESH_COOKIE_NAME,
+                        JWT_SECRET_KEY, PASSWORD_HASH_RETRY_AFTER)
+from app.core.password_hasher import HasherBusyError, password_hasher
+from app.core.password_hasher import pwd_context  # noqa: F401 - re-exported for existing imports
+from app.core.token_cache import token_cache
+from app.core.user_cache import user_cache
+from app.data.database import get_async_db
 from app.data.models import User
 from app.data.schemas import AuthResponse, Login, Register
 
@@ -21,16 +29,109 @@ config.JWT_REFRESH_COOKIE_NAME = JWT_REFRESH_COOKIE_NAME
 config.JWT_TOKEN_LOCATION = ["cookies", "headers"]
 
 security = AuthX(config=config)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def register(data: Register, db: Session) -> AuthResponse:
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Too many password operations in progress, retry later",
+        headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)},
+    )
+
+
+async def hash_password(password: str) -> str:
+    """
+    Hash a password on the password hashing pool.
+
+    Args:
+        password: Plain-text password.
+
+    Returns:
+        str: Password hash.
+
+    Raises:
+        HTTPException: 503 with Retry-After if the pool is full.
+    """
+    try:
+        return await password_hasher.hash(password)
+    except HasherBusyError:
+        raise _hasher_busy()
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    """
+    Check a password against its hash on the password hashing pool.
+
+    Args:
+        password: Plain-text password.
+        hashed_password: Stored hash.
+
+    Returns:
+        bool: True if the password matches.
+
+    Raises:
+        HTTPException: 503 with Retry-After if the pool is full.
+    """
+    try:
+        return await password_hasher.verify(password, hashed_password)
+    except HasherBusyError:
+        raise _hasher_busy()
+
+
+async def verify_and_update_password(
+    password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password and produce a new hash if the stored one is outdated.
+
+    Args:
+        password: Plain-text password.
+        hashed_password: Stored hash.
+
+    Returns:
+        Tuple[bool, Optional[str]]: Whether the password matches, and the
+        replacement hash if the scheme or cost of ``hashed_password`` changed.
+
+    Raises:
+        HTTPException: 503 with Retry-After if the pool is full.
+    """
+    try:
+        return await password_hasher.verify_and_update(password, hashed_password)
+    except HasherBusyError:
+        raise _hasher_busy()
+
+
+async def rehash_password(user: User, new_hash: Optional[str], db: AsyncSession) -> None:
+    """
+    Store the replacement hash produced at login.
+
+    A failure is logged and does not fail the login: the old hash still
+    verifies and is replaced on a later login.
+
+    Args:
+        user: User bound to ``db``.
+        new_hash: Replacement hash, or None if the stored one is current.
+        db: SQLAlchemy async database session.
+    """
+    if new_hash is None:
+        return
+    user.hashed_password = new_hash
+    try:
+        await db.commit()
+        user_cache.invalidate(user.id)
+        logger.info("Password rehashed for user: %s", user.email)
+    except Exception as e:
+        logger.warning("Failed to rehash password for %s: %s", user.email, str(e))
+        await db.rollback()
+
+
+async def register(data: Register, db: AsyncSession) -> AuthResponse:
     """
     Register a new user and generate access and refresh tokens.
 
     Args:
         data: Registration data (email, password).
-        db: SQLAlchemy database session.
+        db: SQLAlchemy async database session.
 
     Returns:
         AuthResponse: Access and refresh tokens.
@@ -39,36 +140,35 @@ def register(data: Register, db: Session) -> AuthResponse:
         HTTPException: If email is already registered or registration fails.
     """
     logger.info("Registering user: %s", data.email)
-    existing_user = db.query(User).filter(User.email == data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == data.email))
     if existing_user:
         logger.warning("Email already registered: %s", data.email)
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = pwd_context.hash(data.password)
+    hashed_password = await hash_password(data.password)
     user = User(email=data.email, hashed_password=hashed_password, status="active") 
     # TODO для начала пользователь активируется автоматитчески. Потом добавим проверку
 
     try:
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
         access_token = security.create_access_token(uid=str(user.id))
         refresh_token = security.create_refresh_token(uid=str(user.id))
         logger.info("User registered successfully: %s", data.email)
         return AuthResponse(access_token=access_token, refresh_token=refresh_token)
     except Exception as e:
         logger.error("Failed to register user %s: %s", data.email, str(e))
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to register user")
 
 
-def login(data: Login, db: Session) -> AuthResponse:
+async def login(data: Login, db: AsyncSession) -> AuthResponse:
     """
     Log in a user and generate access and refresh tokens.
 
     Args:
         data: Login data (email, password).
-        db: SQLAlchemy database session.
+        db: SQLAlchemy async database session.
 
     Returns:
         AuthResponse: Access and refresh tokens.
@@ -77,14 +177,16 @@ def login(data: Login, db: Session) -> AuthResponse:
         HTTPException: If credentials are invalid or user is not active.
     """
     logger.info("Login attempt for user: %s", data.email)
-    user = db.query(User).filter(User.email == data.email).first()
+    user = await db.scalar(select(User).where(User.email == data.email))
     if not user:
         logger.warning("User not found: %s", data.email)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     
-    if not pwd_context.verify(data.password, user.hashed_password):
+    valid, new_hash = await verify_and_update_password(data.password, user.hashed_password)
+    if not valid:
         logger.warning("Invalid password for user: %s", data.email)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    await rehash_password(user, new_hash, db)
     
     if user.status != "active":
         logger.warning("User account not active: %s", data.email)
@@ -100,6 +202,85 @@ def login(data: Login, db: Session) -> AuthResponse:
         raise HTTPException(status_code=500, detail="Failed to log in")
 
 
+def request_access_token(request: Request) -> Optional[str]:
+    """
+    Read the access token from the Authorization header or the access cookie.
+
+    Args:
+        request: FastAPI request object containing cookies or headers.
+
+    Returns:
+        Optional[str]: Encoded token, or None if the request carries none.
+    """
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        logger.debug("Token found in Authorization header")
+        return auth_header[7:]  # Remove "Bearer " prefix
+    logger.debug("Token found in cookie: %s", JWT_ACCESS_COOKIE_NAME)
+    return request.cookies.get(JWT_ACCESS_COOKIE_NAME)
+
+
+def verify_access_token(token: str) -> TokenPayload:
+    """
+    Verify the signature, expiry and type of an access token.
+
+    Tokens verified earlier are served from the token cache until they
+    expire, so a token is decoded once per process, not once per request.
+
+    Args:
+        token: Encoded JWT.
+
+    Returns:
+        TokenPayload: Decoded payload.
+
+    Raises:
+        HTTPException: If the token is invalid, expired or not an access token.
+    """
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    try:
+        payload = security._decode_token(token)
+    except AuthXException as e:
+        logger.warning("Invalid token: %s", str(e))
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    except Exception as e:
+        logger.error("Unexpected error while decoding token: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal error while decoding token")
+    if payload.type != "access":
+        logger.warning("Token of type %s used as access token", payload.type)
+        raise HTTPException(status_code=401, detail="Invalid token")
+    token_cache.put(token, payload)
+    return payload
+
+
+async def authenticate_request(request: Request) -> TokenPayload:
+    """
+    Verify the access token of a request once per request.
+
+    The payload is kept in ``request.state``, so the route-level dependency
+    and ``get_current_user`` share one verification.
+
+    Args:
+        request: FastAPI request object containing cookies or headers.
+
+    Returns:
+        TokenPayload: Payload of the request's access token.
+
+    Raises:
+        HTTPException: If the token is missing or invalid.
+    """
+    payload = getattr(request.state, "token_payload", None)
+    if payload is None:
+        token = request_access_token(request)
+        if not token:
+            logger.warning("No token provided")
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        payload = verify_access_token(token)
+        request.state.token_payload = payload
+    return payload
+
+
 def check_token(access_token: str) -> bool:
     """
     Check if the provided access token is valid.
@@ -108,39 +289,82 @@ def check_token(access_token: str) -> bool:
         access_token: JWT access token.
 
     Returns:
-        bool: True if token is valid, False otherwise.
+        bool: True if token is valid.
 
     Raises:
         HTTPException: If token is invalid, expired, or an error occurs.
     """
     logger.debug("Checking token validity")
     try:
-        payload = security._decode_token(access_token)
-        # TODO нормально проверять TokenPayload
-        security.verify_token(access_token)
-        if not payload or "uid" not in payload:
-            logger.warning("Invalid token payload")
-            raise HTTPException(status_code=403, detail="Invalid token")
-        logger.info("Token is valid")
-        return True
-    except ExpiredSignatureError:
-        logger.warning("Token has expired")
-        raise HTTPException(status_code=403, detail="Token has expired")
-    except JWTError as e:
-        logger.warning("Invalid token: %s", str(e))
-        raise HTTPException(status_code=403, detail="Invalid token signature or structure")
-    except Exception as e:
-        logger.error("Unexpected error while decoding token: %s", str(e))
-        raise HTTPException(status_code=500, detail="Internal error while decoding token")
+        payload = verify_access_token(access_token)
+    except HTTPException as e:
+        if e.status_code != 401:
+            raise
+        raise HTTPException(status_code=403, detail=e.detail)
+    if not payload.sub:
+        logger.warning("Invalid token payload")
+        raise HTTPException(status_code=403, detail="Invalid token")
+    logger.info("Token is valid")
+    return True
+
+
+async def _token_user_id(request: Request) -> int:
+    """
+    Extract the user ID from the access token of a request.
+
+    Args:
+        request: FastAPI request object containing cookies or headers.
+
+    Returns:
+        int: ID of the token's user.
 
+    Raises:
+        HTTPException: If token is missing or invalid.
+    """
+    payload = await authenticate_request(request)
+    user_id_str = payload.sub
+    if not user_id_str:
+        logger.warning("Invalid token: missing user ID")
+        raise HTTPException(status_code=401, detail="Invalid token")
+    try:
+        return int(user_id_str)
+    except ValueError:
+        logger.warning("Invalid user ID format: %s", user_id_str)
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+
+async def _load_user(user_id: int, db: AsyncSession) -> User:
+    """
+    Load a user by ID through the given session.
+
+    Args:
+        user_id: ID of the user.
+        db: SQLAlchemy async database session.
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
+    Returns:
+        User: User bound to the session.
+
+    Raises:
+        HTTPException: If the user does not exist.
+    """
+    user = await db.get(User, user_id)
+    if not user:
+        logger.warning("User not found for ID: %s", user_id)
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
+
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_async_db)) -> User:
     """
     Retrieve the current authenticated user from the access token.
 
+    The user comes from the user cache when possible and is then a detached
+    copy: routes that change the user depend on
+    :func:`get_current_user_for_update` instead.
+
     Args:
         request: FastAPI request object containing cookies or headers.
-        db: SQLAlchemy database session.
+        db: SQLAlchemy async database session.
 
     Returns:
         User: Authenticated user object.
@@ -149,46 +373,35 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
         HTTPException: If token is missing, invalid, or user is not found.
     """
     logger.debug("Retrieving current user")
-    token = None
-    auth_header = request.headers.get("Authorization")
-    if auth_header and auth_header.startswith("Bearer "):
-        token = auth_header[7:]  # Remove "Bearer " prefix
-        logger.debug("Token found in Authorization header")
-    else:
-        token = request.cookies.get(JWT_ACCESS_COOKIE_NAME)
-        logger.debug("Token found in cookie: %s", JWT_ACCESS_COOKIE_NAME)
+    user_id = await _token_user_id(request)
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await _load_user(user_id, db)
+        user_cache.put(user)
+    logger.info("User authenticated: %s", user.email)
+    return user
+
+
+async def get_current_user_for_update(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Retrieve the current user loaded through the request's async session.
 
-    if not token:
-        logger.warning("No token provided")
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    Routes that change the user commit through ``get_async_db`` and then
+    invalidate the user's entry in the user cache.
 
-    try:
-        payload = security._decode_token(token)
-        # TODO нормально проверять TokenPayload
-        user_id_str = payload.sub
-        if not user_id_str:
-            logger.warning("Invalid token: missing user ID")
-            raise HTTPException(status_code=401, detail="Invalid token")
-
-        try:
-            user_id = int(user_id_str)
-        except ValueError:
-            logger.warning("Invalid user ID format: %s", user_id_str)
-            raise HTTPException(status_code=401, detail="Invalid token")
-
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            logger.warning("User not found for ID: %s", user_id)
-            raise HTTPException(status_code=401, detail="User not found")
-
-        logger.info("User authenticated: %s", user.email)
-        return user
-    except ExpiredSignatureError:
-        logger.warning("Token has expired")
-        raise HTTPException(status_code=401, detail="Token has expired")
-    except JWTError as e:
-        logger.warning("Invalid token: %s", str(e))
-        raise HTTPException(status_code=401, detail="Invalid or malformed token")
-    except Exception as e:
-        logger.error("Unexpected error while authenticating user: %s", str(e))
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+    Args:
+        request: FastAPI request object containing cookies or headers.
+        db: SQLAlchemy async database session.
+
+    Returns:
+        User: Authenticated user bound to ``db``.
+
+    Raises:
+        HTTPException: If token is missing, invalid, or user is not found.
+    """
+    logger.debug("Retrieving current user for update")
+    user = await _load_user(await _token_user_id(request), db)
+    logger.info("User authenticated: %s", user.email)
+    return user
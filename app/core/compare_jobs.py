@@ -0,0 +1,324 @@
+import abc
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import (COMPARE_JOB_BACKEND, COMPARE_JOB_CONCURRENCY,
+                        COMPARE_JOB_LEASE, COMPARE_RETRY_AFTER)
+from app.core.compare_melodies import compare_melodies
+from app.core.melody_engine import (EngineBusyError, MelodyEngine,
+                                    get_melody_engine)
+from app.core.metrics import run_instrumented
+from app.core.result_cache import ResultCache, get_result_cache
+from app.data.database import SessionLocal
+from app.data.models import CompareJob
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class LeaseLostError(RuntimeError):
+    """Raised when another process has taken over a job this process was running."""
+
+
+def claimable(now: datetime):
+    """SQL condition matching queued jobs and running jobs whose lease has expired."""
+    return or_(
+        CompareJob.status == JOB_QUEUED,
+        and_(
+            CompareJob.status == JOB_RUNNING,
+            or_(CompareJob.lease_expires_at.is_(None), CompareJob.lease_expires_at < now),
+        ),
+    )
+
+
+class JobBackend(abc.ABC):
+    """
+    Executes queued comparison jobs.
+
+    A job is a ``compare_jobs`` row whose recordings are parked in object
+    storage, so any backend that can call :meth:`execute` with the job ID
+    (an in-process queue, a message broker consumer, ...) can run it.
+    Backends implement :meth:`enqueue`.
+
+    Several processes may try to run the same job, e.g. every web worker
+    resumes unfinished jobs at startup. A job is claimed with a conditional
+    update that gives one process a lease on it; the others skip it, and
+    only the lease holder may store the result.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[MelodyEngine] = None,
+        storage: Optional[Any] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        cache: Optional[ResultCache] = None,
+        lease: float = COMPARE_JOB_LEASE,
+    ):
+        self.engine = engine or get_melody_engine()
+        self._storage = storage
+        self.session_factory = session_factory
+        self.cache = cache or get_result_cache()
+        self.lease = lease
+
+    @property
+    def storage(self) -> Any:
+        """Object storage with ``put_bytes``, ``get_bytes`` and ``remove_file``."""
+        if self._storage is None:
+            # Connect to MinIO only when the first job arrives
+            from app.data import storage
+            self._storage = storage
+        return self._storage
+
+    async def start(self) -> None:
+        """Start accepting jobs and resume the ones left over from a restart."""
+
+    async def shutdown(self) -> None:
+        """Stop accepting jobs."""
+
+    @abc.abstractmethod
+    def enqueue(self, job_id: str) -> None:
+        """Schedule a stored job for execution."""
+
+    async def submit(
+        self, db: AsyncSession, owner_id: int, teacher: bytes, student: bytes
+    ) -> CompareJob:
+        """
+        Park both recordings, store a queued job and schedule it.
+
+        Args:
+            db: SQLAlchemy async database session of the request.
+            owner_id: ID of the user submitting the job.
+            teacher: Teacher recording.
+            student: Student recording.
+
+        Returns:
+            CompareJob: Stored job in the ``queued`` state.
+        """
+        job_id = str(uuid.uuid4())
+        job = CompareJob(
+            id=job_id,
+            owner_id=owner_id,
+            status=JOB_QUEUED,
+            teacher_object=f"jobs/{job_id}/teacher",
+            student_object=f"jobs/{job_id}/student",
+        )
+        await asyncio.to_thread(self.storage.put_bytes, job.teacher_object, teacher)
+        await asyncio.to_thread(self.storage.put_bytes, job.student_object, student)
+        try:
+            db.add(job)
+            await db.commit()
+            await db.refresh(job)
+        except Exception:
+            await db.rollback()
+            await asyncio.to_thread(self._discard_audio, job)
+            raise
+        logger.info("Comparison job %s queued for user %s", job_id, owner_id)
+        self.enqueue(job_id)
+        return job
+
+    async def execute(self, job_id: str) -> None:
+        """
+        Run a job to completion and persist its result or error.
+
+        Args:
+            job_id: ID of a stored job.
+        """
+        job = await asyncio.to_thread(self._claim, job_id)
+        if job is None:
+            return
+
+        result, error = None, None
+        try:
+            teacher, student = await asyncio.to_thread(self._load_audio, job)
+            result = await self._run_comparison(job, teacher, student)
+            if result is None:
+                error = "Error during melody comparison"
+        except LeaseLostError:
+            logger.warning("Comparison job %s was taken over by another worker", job_id)
+            return
+        except Exception as e:
+            logger.error("Comparison job %s failed: %s", job_id, str(e))
+            error = "Internal server error"
+
+        if not await asyncio.to_thread(self._finish, job, result, error):
+            logger.warning("Comparison job %s was taken over by another worker", job_id)
+            return
+        await asyncio.to_thread(self._discard_audio, job)
+        logger.info("Comparison job %s finished: %s", job_id, JOB_FAILED if error else JOB_DONE)
+
+    def unfinished_jobs(self) -> List[str]:
+        """IDs of queued jobs and of running jobs whose lease has expired."""
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(CompareJob.id)
+                .filter(claimable(datetime.utcnow()))
+                .order_by(CompareJob.created_at)
+                .all()
+            )
+            return [row.id for row in rows]
+        finally:
+            db.close()
+
+    async def _run_comparison(self, job: CompareJob, teacher: bytes, student: bytes) -> Any:
+        key = await asyncio.to_thread(self.cache.key, teacher, student)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        while True:
+            # Waiting for a free worker must not let the lease run out
+            if not await asyncio.to_thread(self._renew, job):
+                raise LeaseLostError(job.id)
+            try:
+                result, _ = await run_instrumented(self.engine, compare_melodies, teacher, student)
+                self.cache.put(key, result)
+                return result
+            except EngineBusyError:
+                # Synchronous requests filled the queue: wait instead of failing the job
+                await asyncio.sleep(COMPARE_RETRY_AFTER)
+
+    def _claim(self, job_id: str) -> Optional[CompareJob]:
+        """Take a lease on a job; None if it is finished or leased by another process."""
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            claimed = db.execute(
+                update(CompareJob)
+                .where(CompareJob.id == job_id, claimable(now))
+                .values(
+                    status=JOB_RUNNING,
+                    lease_owner=str(uuid.uuid4()),
+                    lease_expires_at=now + timedelta(seconds=self.lease),
+                )
+            ).rowcount
+            db.commit()
+            if not claimed:
+                logger.info("Comparison job %s is finished or run by another worker", job_id)
+                return None
+            job = db.get(CompareJob, job_id)
+            db.expunge(job)
+            return job
+        finally:
+            db.close()
+
+    def _renew(self, job: CompareJob) -> bool:
+        """Extend the lease on a job; False if another process has taken it over."""
+        db = self.session_factory()
+        try:
+            renewed = db.execute(
+                update(CompareJob)
+                .where(CompareJob.id == job.id, CompareJob.lease_owner == job.lease_owner)
+                .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=self.lease))
+            ).rowcount
+            db.commit()
+            return bool(renewed)
+        finally:
+            db.close()
+
+    def _load_audio(self, job: CompareJob) -> Tuple[bytes, bytes]:
+        return self.storage.get_bytes(job.teacher_object), self.storage.get_bytes(job.student_object)
+
+    def _finish(self, job: CompareJob, result: Any, error: Optional[str]) -> bool:
+        """Store the outcome of a job; False if this process no longer holds its lease."""
+        db = self.session_factory()
+        try:
+            finished = db.execute(
+                update(CompareJob)
+                .where(CompareJob.id == job.id, CompareJob.lease_owner == job.lease_owner)
+                .values(
+                    status=JOB_FAILED if error else JOB_DONE,
+                    result=result,
+                    error=error,
+                    finished_at=datetime.utcnow(),
+                    lease_expires_at=None,
+                )
+            ).rowcount
+            db.commit()
+            return bool(finished)
+        finally:
+            db.close()
+
+    def _discard_audio(self, job: CompareJob) -> None:
+        self.storage.remove_file(job.teacher_object)
+        self.storage.remove_file(job.student_object)
+
+
+class LocalJobBackend(JobBackend):
+    """
+    In-process job queue.
+
+    Jobs run as asyncio tasks of the web process, at most ``concurrency``
+    at a time, on the shared melody engine. Jobs interrupted by a restart
+    are found in the database and resumed by :meth:`start`.
+    """
+
+    def __init__(self, *args: Any, concurrency: int = COMPARE_JOB_CONCURRENCY, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.concurrency = max(1, concurrency)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    async def start(self) -> None:
+        try:
+            job_ids = await asyncio.to_thread(self.unfinished_jobs)
+        except Exception as e:
+            logger.error("Failed to load unfinished comparison jobs: %s", str(e))
+            return
+        for job_id in job_ids:
+            self.enqueue(job_id)
+        if job_ids:
+            logger.info("Resumed %d unfinished comparison jobs", len(job_ids))
+
+    async def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def enqueue(self, job_id: str) -> None:
+        task = asyncio.get_running_loop().create_task(self._run(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def wait(self) -> None:
+        """Wait until every scheduled job has finished."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, job_id: str) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        async with self._slots:
+            try:
+                await self.execute(job_id)
+            except Exception as e:
+                logger.error("Comparison job %s crashed: %s", job_id, str(e))
+
+
+JOB_BACKENDS: Dict[str, Type[JobBackend]] = {"local": LocalJobBackend}
+
+_job_backend: Optional[JobBackend] = None
+
+
+def get_job_backend() -> JobBackend:
+    """
+    Retrieve the application-wide job backend selected by COMPARE_JOB_BACKEND.
+
+    Returns:
+        JobBackend: Shared backend instance.
+    """
+    global _job_backend
+    if _job_backend is None:
+        _job_backend = JOB_BACKENDS[COMPARE_JOB_BACKEND]()
+    return _job_backend
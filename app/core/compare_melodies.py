@@ -1,10 +1,60 @@
-import io
+import hashlib
 import logging
-from math import floor
-from typing import List, Optional, Tuple
+import mmap
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from math import ceil, floor
+from typing import (Any, Callable, Dict, Iterator, List, Optional, Sequence,
+                    Tuple)
 #from app.config import AudioConfig
 import librosa
 import numpy as np
+import soundfile as sf
+
+from app.config import (AUDIO_ANALYSIS_SR, AUDIO_RESAMPLE_TYPE,
+                        AUDIO_STREAM_BLOCK_SIZE, AUDIO_STREAMING)
+from app.core.audio_stream import (BlockReader, MemoryReader, stream_mel_db,
+                                   stream_trim_bounds)
+from app.core.feature_cache import feature_cache, feature_cache_key
+from app.core.mel_bands import band_mel_db
+
+# Допустимые типы входных файлов: байты или буфер без копии (например, mmap)
+AUDIO_BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
+# Замеры этапов текущего задания; None - замеры выключены
+_stage_timings: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar(
+    "stage_timings", default=None
+)
+
+
+@contextmanager
+def stage(name: str, size: Optional[int] = None) -> Iterator[None]:
+    """Замеряет время этапа (стена и CPU) и размер его входных данных."""
+    timings = _stage_timings.get()
+    if timings is None:
+        yield
+        return
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        timings.append({
+            "stage": name,
+            "wall": time.perf_counter() - wall,
+            "cpu": time.process_time() - cpu,
+            "size": size,
+        })
+
+
+def collect_timings(fn: Callable[..., Any], *args: Any) -> Tuple[Any, List[Dict[str, Any]]]:
+    """Выполняет fn(*args) и возвращает результат вместе с замерами этапов."""
+    timings: List[Dict[str, Any]] = []
+    token = _stage_timings.set(timings)
+    try:
+        return fn(*args), timings
+    finally:
+        _stage_timings.reset(token)
 
 
 class AudioConfig:
@@ -14,6 +64,18 @@ class AudioConfig:
     TRIM_DB = 14
     LOUDNESS_THRESHOLD = 0.25
     RHYTHM_THRESHOLD = 0.25
+    STREAMING = AUDIO_STREAMING
+    STREAM_BLOCK_SIZE = AUDIO_STREAM_BLOCK_SIZE
+    ANALYSIS_SR = AUDIO_ANALYSIS_SR
+    RESAMPLE_TYPE = AUDIO_RESAMPLE_TYPE
+
+    @classmethod
+    def fingerprint(cls) -> str:
+        """Возвращает отпечаток параметров анализа для ключей кэша."""
+        params = sorted(
+            (name, repr(value)) for name, value in vars(cls).items() if name.isupper()
+        )
+        return hashlib.sha256(repr(params).encode()).hexdigest()[:16]
 
 
 logging.basicConfig(
@@ -27,7 +89,7 @@ def compare_melodies(
     """Сравнивает две мелодии и возвращает их характеристики."""
     logging.info("Начало сравнения мелодий")
     try:
-        if not isinstance(file1, bytes) or not isinstance(file2, bytes):
+        if not isinstance(file1, AUDIO_BUFFER_TYPES) or not isinstance(file2, AUDIO_BUFFER_TYPES):
             raise TypeError("Входные файлы должны быть в формате bytes")
         if not file1 or not file2:
             raise ValueError("Входные файлы не могут быть пустыми")
@@ -36,21 +98,7 @@ def compare_melodies(
         if teacher_melody is None:
             raise ValueError("Не удалось извлечь мелодию учителя")
 
-        children_melody, min_per_c = extract_melody_from_audio(file2)
-        if children_melody is None:
-            raise ValueError("Не удалось извлечь мелодию ребенка")
-
-        all_t, all_c, freq_t, freq_c, t_m, c_m = synchronize_melodies(
-            teacher_melody, children_melody, min_per_t, min_per_c
-        )
-
-        teacher_melody, children_melody, freq_t, freq_c, t_m, c_m = (
-            compare_melody_sequences(
-                all_t, all_c, freq_t, freq_c, t_m, c_m, teacher_melody, children_melody
-            )
-        )
-
-        result = compare(t_m, c_m, freq_t, freq_c, teacher_melody, children_melody, 2)
+        result = compare_with_teacher(teacher_melody, min_per_t, file2)
         logging.info("Сравнение мелодий завершено")
         return result
 
@@ -68,6 +116,95 @@ def compare_melodies(
         return None
 
 
+def analyze_reference(file_bytes: bytes) -> Optional[Dict[str, Any]]:
+    """Извлекает мелодию и ноты эталонной записи для повторных сравнений."""
+    logging.info("Начало анализа эталонной записи")
+    try:
+        if not isinstance(file_bytes, AUDIO_BUFFER_TYPES):
+            raise TypeError("Входной файл должен быть в формате bytes")
+
+        melody, min_per = extract_melody_from_audio(file_bytes)
+        if melody is None:
+            raise ValueError("Не удалось извлечь мелодию эталона")
+
+        with stage("extract_notes", len(melody)):
+            all_notes, freq, lengths = extract_notes(melody, min_per)
+        logging.info("Анализ эталонной записи завершен")
+        return {
+            "melody": melody,
+            "min_per": min_per,
+            "notes": all_notes,
+            "frequencies": freq,
+            "lengths": lengths,
+        }
+    except TypeError as te:
+        logging.error("Ошибка типа данных: %s", str(te))
+        return None
+    except ValueError as ve:
+        logging.error("Ошибка ввода: %s", str(ve))
+        return None
+    except Exception as e:
+        logging.error("Ошибка в analyze_reference: %s", str(e))
+        return None
+
+
+def compare_with_reference(
+    reference: Dict[str, Any], file2: bytes
+) -> Optional[Tuple[float, List[int], List[int], List[int], List[float]]]:
+    """Сравнивает запись ученика с заранее проанализированным эталоном."""
+    logging.info("Начало сравнения с эталоном")
+    try:
+        if not isinstance(file2, AUDIO_BUFFER_TYPES):
+            raise TypeError("Входной файл должен быть в формате bytes")
+
+        teacher_notes = (
+            reference["notes"], reference["frequencies"], reference["lengths"]
+        )
+        result = compare_with_teacher(
+            reference["melody"], reference["min_per"], file2, teacher_notes
+        )
+        logging.info("Сравнение с эталоном завершено")
+        return result
+    except (TypeError, KeyError) as te:
+        logging.error("Ошибка типа данных: %s", str(te))
+        return None
+    except ValueError as ve:
+        logging.error("Ошибка ввода: %s", str(ve))
+        return None
+    except Exception as e:
+        logging.error("Ошибка в compare_with_reference: %s", str(e))
+        return None
+
+
+def compare_with_teacher(
+    teacher_melody: List[float],
+    min_per_t: float,
+    file2: bytes,
+    teacher_notes: Optional[Tuple[List[float], List[int], List[int]]] = None,
+) -> Tuple[float, List[int], List[int], List[int], List[float]]:
+    """Сравнивает запись ученика с уже извлеченной мелодией учителя."""
+    if not file2:
+        raise ValueError("Входные файлы не могут быть пустыми")
+
+    children_melody, min_per_c = extract_melody_from_audio(file2)
+    if children_melody is None:
+        raise ValueError("Не удалось извлечь мелодию ребенка")
+
+    # Списки изменяются по месту при выравнивании, поэтому работаем с копиями
+    teacher_melody = list(teacher_melody)
+    all_t, all_c, freq_t, freq_c, t_m, c_m = synchronize_melodies(
+        teacher_melody, children_melody, min_per_t, min_per_c, teacher_notes
+    )
+
+    with stage("compare_melody_sequences", len(all_t) + len(all_c)):
+        teacher_melody, children_melody, freq_t, freq_c, t_m, c_m = (
+            compare_melody_sequences(
+                all_t, all_c, freq_t, freq_c, t_m, c_m, teacher_melody, children_melody
+            )
+        )
+
+    with stage("metrics", len(t_m) + len(c_m)):
+        return compare(t_m, c_m, freq_t, freq_c, teacher_melody, children_melody, 2)
 
 
 def extract_melody_from_audio(
@@ -79,30 +216,22 @@ def extract_melody_from_audio(
         if not file_bytes:
             raise ValueError("Пустой файл")
 
-        # Создаем объект BytesIO из переданных байтов
-        audio_file = io.BytesIO(file_bytes)
-
-        # Попытка загрузить аудиофайл с использованием librosa
-        try:
-            tm, srt = librosa.load(audio_file, sr=None)
-        except librosa.util.exceptions.ParameterError as e:
-            logging.error("Ошибка при загрузке аудиофайла с librosa: %s", str(e))
-            raise ValueError("Невозможно загрузить аудиофайл")
-
-        logging.debug("Аудиофайл загружен: длина %d, частота %d", len(tm), srt)
-
-        # Применяем обрезку на основе порога
-        tmt, _ = librosa.effects.trim(tm, top_db=AudioConfig.TRIM_DB)
-
-        # Вычисляем мелспектрограмму
-        tmt_mel = librosa.feature.melspectrogram(
-            y=tmt, sr=srt, n_mels=AudioConfig.N_MELS
-        )
-        tmt_db_mel = librosa.amplitude_to_db(tmt_mel)[AudioConfig.FREQ_BANDS]
+        # Повторно загруженные записи (например, эталон учителя) берем из кэша
+        cache_key = feature_cache_key(file_bytes, AudioConfig.fingerprint())
+        cached = feature_cache.get(cache_key)
+        if cached is not None:
+            logging.info("Мелодия найдена в кэше")
+            melody, min_per_t = cached
+            return melody.tolist(), min_per_t
+
+        tmt_db_mel = None
+        if AudioConfig.STREAMING:
+            tmt_db_mel, time_t = extract_bands_streaming(file_bytes)
+        if tmt_db_mel is None:
+            tmt_db_mel, time_t = extract_bands_in_memory(file_bytes)
         tmt_db_mel_transposed = np.transpose(tmt_db_mel)
 
-        # Рассчитываем длительность и минимальную продолжительность времени для временного шага
-        time_t = librosa.get_duration(y=tmt, sr=srt)
+        # Рассчитываем минимальную продолжительность времени для временного шага
         min_per_t = round(len(tmt_db_mel_transposed)) / (time_t * AudioConfig.TIME_FACTOR)
 
         # Получаем индексы и значения максимума по спектрограмме
@@ -115,6 +244,8 @@ def extract_melody_from_audio(
         nonzero_indices = np.where(~mask)[0]
         result[nonzero_indices] = max_indices + (np.round(max_values) / 100)
 
+        feature_cache.put(cache_key, result, min_per_t)
+
         logging.info(
             "Извлечение мелодии завершено, найдено %d нот", len(nonzero_indices)
         )
@@ -131,18 +262,97 @@ def extract_melody_from_audio(
         return None, None
 
 
+def extract_bands_in_memory(file_bytes: bytes) -> Tuple[np.ndarray, float]:
+    """Вычисляет нужные полосы мелспектрограммы, загружая весь сигнал в память."""
+    # Читаем файл прямо из переданного буфера, без копии
+    with MemoryReader(file_bytes) as audio_file:
+        # Попытка загрузить аудиофайл с использованием librosa
+        try:
+            with stage("load", len(file_bytes)):
+                tm, srt = librosa.load(
+                    audio_file, sr=AudioConfig.ANALYSIS_SR or None, res_type=AudioConfig.RESAMPLE_TYPE
+                )
+        except librosa.util.exceptions.ParameterError as e:
+            logging.error("Ошибка при загрузке аудиофайла с librosa: %s", str(e))
+            raise ValueError("Невозможно загрузить аудиофайл")
+
+    logging.debug("Аудиофайл загружен: длина %d, частота %d", len(tm), srt)
+
+    # Применяем обрезку на основе порога
+    with stage("trim", len(tm)):
+        tmt, _ = librosa.effects.trim(tm, top_db=AudioConfig.TRIM_DB)
+
+    # Вычисляем только нужные полосы мелспектрограммы
+    with stage("melspectrogram", len(tmt)):
+        tmt_db_mel = band_mel_db(tmt, srt, AudioConfig.N_MELS, AudioConfig.FREQ_BANDS)
+    return tmt_db_mel, librosa.get_duration(y=tmt, sr=srt)
+
+
+def extract_bands_streaming(
+    file_bytes: bytes,
+) -> Tuple[Optional[np.ndarray], Optional[float]]:
+    """Потоково вычисляет нужные полосы мелспектрограммы.
+
+    Сигнал декодируется блоками по AudioConfig.STREAM_BLOCK_SIZE отсчетов в
+    два прохода (поиск границ тишины и мелспектрограмма), поэтому память не
+    зависит от длины записи. Если формат не читается soundfile или нужен
+    ресемплинг не через soxr, возвращает (None, None), и используется
+    загрузка целиком.
+    """
+    audio_file = MemoryReader(file_bytes)
+    try:
+        sound_file = sf.SoundFile(audio_file)
+    except RuntimeError as e:
+        audio_file.close()
+        logging.info("Потоковое чтение недоступно, загружаем файл целиком: %s", str(e))
+        return None, None
+
+    with audio_file, sound_file:
+        logging.debug(
+            "Потоковое чтение: длина %d, частота %d", sound_file.frames, sound_file.samplerate
+        )
+        reader = BlockReader(
+            sound_file,
+            AudioConfig.STREAM_BLOCK_SIZE,
+            AudioConfig.ANALYSIS_SR or None,
+            AudioConfig.RESAMPLE_TYPE,
+        )
+        if reader.resampling and not AudioConfig.RESAMPLE_TYPE.startswith("soxr"):
+            logging.info("Ресемплинг %s не поддерживает потоковый режим", AudioConfig.RESAMPLE_TYPE)
+            return None, None
+
+        # Декодирование идет внутри обоих проходов и входит в их замеры
+        with stage("trim", reader.frames):
+            start, end = stream_trim_bounds(reader, AudioConfig.TRIM_DB)
+        if start >= end:
+            raise ValueError("Запись не содержит звука")
+        with stage("melspectrogram", end - start):
+            tmt_db_mel = stream_mel_db(
+                reader, start, end, AudioConfig.N_MELS, AudioConfig.FREQ_BANDS
+            )
+        return tmt_db_mel, (end - start) / reader.sr
+
 
 def synchronize_melodies(
     teacher_melody: List[float],
     children_melody: List[float],
     min_per_t: float,
     min_per_c: float,
+    teacher_notes: Optional[Tuple[List[float], List[int], List[int]]] = None,
 ) -> Tuple[List[float], List[float], List[int], List[int], List[int], List[int]]:
-    """Синхронизирует две мелодии."""
+    """Синхронизирует две мелодии.
+
+    Ноты учителя, извлеченные заранее (эталон), передаются в teacher_notes.
+    """
     logging.info("Начало синхронизации мелодий")
     try:
-        all_t, freq_t, t_m = extract_notes(teacher_melody, min_per_t)
-        all_c, freq_c, c_m = extract_notes(children_melody, min_per_c)
+        if teacher_notes is not None:
+            all_t, freq_t, t_m = (list(values) for values in teacher_notes)
+        else:
+            with stage("extract_notes", len(teacher_melody)):
+                all_t, freq_t, t_m = extract_notes(teacher_melody, min_per_t)
+        with stage("extract_notes", len(children_melody)):
+            all_c, freq_c, c_m = extract_notes(children_melody, min_per_c)
         return all_t, all_c, freq_t, freq_c, t_m, c_m
     except Exception as e:
         logging.error("Ошибка в synchronize_melodies: %s", str(e))
@@ -154,28 +364,60 @@ def extract_notes(
 ) -> Tuple[List[float], List[int], List[int]]:
     """Извлекает ноты из мелодии."""
     logging.debug("Начало извлечения нот")
-    counter = 0
-    all_notes = []
-    freq = []
-    lengths = []
-
     try:
-        for i in range(len(melody) - 1):
-            if floor(melody[i]) == floor(melody[i + 1]):
-                counter += 1
-            elif counter >= min_per:
-                all_notes.append(floor(melody[i]) + counter / 100)
-                freq.append(floor(melody[i]))
-                lengths.append(counter)
-                counter = 0
-
+        all_notes, freq, lengths = extract_notes_array(melody, min_per)
         logging.debug("Извлечение нот завершено, найдено %d нот", len(all_notes))
-        return all_notes, freq, lengths
+        return all_notes.tolist(), freq.tolist(), lengths.tolist()
     except Exception as e:
         logging.error("Ошибка в extract_notes: %s", str(e))
         return [], [], []
 
 
+def extract_notes_array(
+    melody: Sequence[float], min_per: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Извлекает ноты из мелодии, возвращая массивы (ноты, частоты, длительности).
+
+    Соседние кадры с одинаковой целой частью образуют серию. Длительность
+    копится между сменами серий и сбрасывается только после того, как нота
+    длиной не меньше min_per записана; последняя серия в ноты не попадает.
+    """
+    if min_per is None:
+        raise TypeError("min_per не задан")
+    bands = np.floor(np.asarray(melody, dtype=np.float64))
+    if len(bands) > 1 and np.isnan(bands).any():
+        raise ValueError("Мелодия содержит NaN")
+
+    # Индексы кадров, после которых меняется нота, и длины серий перед ними
+    changes = np.flatnonzero(bands[1:] != bands[:-1])
+    runs = np.diff(changes, prepend=-1) - 1
+
+    emitted = np.empty(0, dtype=np.intp)
+    lengths = np.empty(0, dtype=np.int64)
+    # Сравнение с NaN и бесконечностью никогда не дает ноту
+    if len(changes) and min_per < np.inf:
+        threshold = ceil(min_per) if min_per > 0 else 0
+        if runs.min() >= threshold:
+            # Переноса длительности нет: каждая смена завершает ноту
+            emitted = np.arange(len(changes))
+            lengths = runs.astype(np.int64)
+        else:
+            # Перенос проходит по сменам нот, а не по кадрам
+            notes, durations, counter = [], [], 0
+            for k, run in enumerate(runs.tolist()):
+                counter += run
+                if counter >= threshold:
+                    notes.append(k)
+                    durations.append(counter)
+                    counter = 0
+            emitted = np.asarray(notes, dtype=np.intp)
+            lengths = np.asarray(durations, dtype=np.int64)
+
+    freq = bands[changes[emitted]].astype(np.int64)
+    all_notes = freq + lengths / 100
+    return all_notes, freq, lengths
+
+
 def compare_melody_sequences(
     all_t: List[float],
     all_c: List[float],
@@ -242,43 +484,90 @@ def calculate_loudness(
     children_melody: List[int],
 ) -> List[int]:
     """Вычисляет метрику громкости."""
-    res_loud = []
-    counter_t, counter_c = 0, 0
-    for i in range(len(t_m)):
-        t_sum = sum(teacher_melody[counter_t : counter_t + t_m[i]])
-        c_sum = sum(children_melody[counter_c : counter_c + c_m[i]])
-        if (
-            t_sum != 0
-            and abs(1 - (c_sum / c_m[i]) / (t_sum / t_m[i]))
-            <= AudioConfig.LOUDNESS_THRESHOLD
-        ):
-            res_loud.extend([0] * c_m[i])
-        else:
-            res_loud.extend([1] * c_m[i])
-        counter_t += t_m[i]
-        counter_c += c_m[i]
-    return res_loud
+    return calculate_loudness_array(t_m, c_m, teacher_melody, children_melody).tolist()
 
 
 def calculate_rhythm(t_m: List[int], c_m: List[int]) -> List[int]:
     """Вычисляет метрику ритма."""
-    res_rhythm = []
-    for i in range(len(t_m)):
-        if abs((t_m[i] - c_m[i]) / t_m[i]) <= AudioConfig.RHYTHM_THRESHOLD:
-            res_rhythm += [0] * c_m[i]
-        else:
-            res_rhythm += [0] * min(t_m[i], c_m[i]) + [1] * abs(c_m[i] - t_m[i])
-    return res_rhythm
+    return calculate_rhythm_array(t_m, c_m).tolist()
 
 
 def calculate_frequency(
     freq_t: List[int], freq_c: List[int], c_m: List[int]
 ) -> List[int]:
     """Вычисляет метрику частоты."""
-    res_frequency = []
-    for i in range(len(freq_t)):
-        res_frequency += [0] * c_m[i] if freq_t[i] == freq_c[i] else [1] * c_m[i]
-    return res_frequency
+    return calculate_frequency_array(freq_t, freq_c, c_m).tolist()
+
+
+def _aligned(values: Sequence[int], length: int) -> np.ndarray:
+    """Приводит последовательность к int-массиву длины length, как при индексации."""
+    array = np.asarray(values, dtype=np.int64)
+    if len(array) < length:
+        raise IndexError("list index out of range")
+    return array[:length]
+
+
+def _segments(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Повторяет каждое значение counts[i] раз (отрицательные счетчики пусты)."""
+    return np.repeat(values.astype(np.int64), np.maximum(counts, 0))
+
+
+def _segment_sums(values: Sequence[int], lengths: np.ndarray) -> np.ndarray:
+    """Суммы подряд идущих отрезков values длиной lengths (с обрезкой по концу)."""
+    values = np.asarray(values, dtype=np.int64)
+    prefix = np.concatenate(([0], np.cumsum(values)))
+    ends = np.cumsum(lengths)
+    starts = np.clip(ends - lengths, 0, len(values))
+    return prefix[np.clip(ends, 0, len(values))] - prefix[starts]
+
+
+def calculate_loudness_array(
+    t_m: Sequence[int],
+    c_m: Sequence[int],
+    teacher_melody: Sequence[int],
+    children_melody: Sequence[int],
+) -> np.ndarray:
+    """Вычисляет метрику громкости в виде массива 0/1 по кадрам ребенка."""
+    t_lengths = np.asarray(t_m, dtype=np.int64)
+    c_lengths = _aligned(c_m, len(t_lengths))
+    t_sum = _segment_sums(teacher_melody, t_lengths)
+    c_sum = _segment_sums(children_melody, c_lengths)
+
+    # Отношение средних считается только там, где у учителя есть громкость
+    voiced = t_sum != 0
+    if (c_lengths[voiced] == 0).any():
+        raise ZeroDivisionError("division by zero")
+    ratio = (c_sum[voiced] / c_lengths[voiced]) / (t_sum[voiced] / t_lengths[voiced])
+    matches = np.zeros(len(t_lengths), dtype=bool)
+    matches[voiced] = np.abs(1 - ratio) <= AudioConfig.LOUDNESS_THRESHOLD
+
+    return _segments(~matches, c_lengths)
+
+
+def calculate_rhythm_array(t_m: Sequence[int], c_m: Sequence[int]) -> np.ndarray:
+    """Вычисляет метрику ритма в виде массива 0/1."""
+    t_lengths = np.asarray(t_m, dtype=np.int64)
+    c_lengths = _aligned(c_m, len(t_lengths))
+    if (t_lengths == 0).any():
+        raise ZeroDivisionError("division by zero")
+
+    matches = np.abs((t_lengths - c_lengths) / t_lengths) <= AudioConfig.RHYTHM_THRESHOLD
+    zeros = np.where(matches, c_lengths, np.minimum(t_lengths, c_lengths))
+    ones = np.where(matches, 0, np.abs(c_lengths - t_lengths))
+
+    # Для каждой ноты сначала идут нули, затем единицы
+    values = np.tile([0, 1], len(t_lengths))
+    return _segments(values, np.column_stack((zeros, ones)).ravel())
+
+
+def calculate_frequency_array(
+    freq_t: Sequence[int], freq_c: Sequence[int], c_m: Sequence[int]
+) -> np.ndarray:
+    """Вычисляет метрику частоты в виде массива 0/1."""
+    t_freq = np.asarray(freq_t, dtype=np.int64)
+    c_freq = _aligned(freq_c, len(t_freq))
+    c_lengths = _aligned(c_m, len(t_freq))
+    return _segments(t_freq != c_freq, c_lengths)
 
 
 def calculate_average_volume(children_melody: List[int]) -> List[float]:
@@ -287,11 +576,11 @@ def calculate_average_volume(children_melody: List[int]) -> List[float]:
     return [round(m / max_c, 2) if max_c != 0 else round(m, 2) for m in children_melody]
 
 
-def calculate_integral_indicator(total_errors: List[int]) -> float:
+def calculate_integral_indicator(total_errors: Sequence[int]) -> float:
     """Вычисляет интегральный показатель."""
     integral_indicator = 1
-    if total_errors:
-        integral_indicator -= round(sum(total_errors) / len(total_errors), 2)
+    if len(total_errors):
+        integral_indicator -= round(float(np.sum(total_errors)) / len(total_errors), 2)
     return integral_indicator
 
 
@@ -310,17 +599,17 @@ def compare(
         teacher_melody = normalize_melody(teacher_melody)
         children_melody = normalize_melody(children_melody)
 
-        res_loud = calculate_loudness(t_m, c_m, teacher_melody, children_melody)
-        res_rhythm = calculate_rhythm(t_m, c_m)
-        res_frequency = calculate_frequency(freq_t, freq_c, c_m)
+        res_loud = calculate_loudness_array(t_m, c_m, teacher_melody, children_melody)
+        res_rhythm = calculate_rhythm_array(t_m, c_m)
+        res_frequency = calculate_frequency_array(freq_t, freq_c, c_m)
         res_average = calculate_average_volume(children_melody)
 
-        total_errors = res_rhythm + res_frequency
+        total_errors = np.concatenate((res_rhythm, res_frequency))
         integral_indicator = calculate_integral_indicator(total_errors)
 
-        rhythm = process_characteristics(res_rhythm, time_c)
-        height = process_characteristics(res_frequency, time_c)
-        volume1 = process_characteristics(res_loud, time_c)
+        rhythm, height, volume1 = process_characteristics_batch(
+            [res_rhythm, res_frequency, res_loud], time_c
+        )
 
         logging.info("Финальное сравнение завершено")
         return integral_indicator, rhythm, height, volume1, res_average
@@ -329,31 +618,51 @@ def compare(
         return 0.0, [], [], [], []
 
 
-def process_characteristics(x: List[int], time: float) -> List[int]:
+def process_characteristics(x: Sequence[int], time: float) -> List[int]:
     """Обрабатывает характеристики во временные интервалы."""
+    return process_characteristics_batch([x], time)[0]
+
+
+def process_characteristics_batch(
+    strips: Sequence[Sequence[int]], time: float
+) -> List[List[int]]:
+    """Обрабатывает несколько характеристик во временные интервалы за один проход.
+
+    Все полосы склеиваются в один массив, и суммы по окнам считаются одним
+    вызовом np.add.reduceat; неполное последнее окно каждой полосы
+    усредняется по своей длине.
+    """
     logging.debug("Начало обработки характеристик")
-    y = []
     time = round(time, 2)
     count_of_values = round(time * AudioConfig.TIME_FACTOR)
 
     try:
-        if count_of_values == 0:
+        if count_of_values <= 0:
             logging.warning("Время равно нулю, возвращаем пустой список")
-            return y
+            return [[] for _ in strips]
+
+        arrays = [np.asarray(x, dtype=np.int64) for x in strips]
+        lengths = [len(x) for x in arrays]
+        offsets = np.cumsum([0] + lengths[:-1])
+        starts = np.concatenate(
+            [offset + np.arange(0, length, count_of_values) for offset, length in zip(offsets, lengths)]
+            + [np.empty(0, dtype=np.int64)]
+        ).astype(np.intp)
+        if not len(starts):
+            return [[] for _ in strips]
 
-        while len(x) >= count_of_values:
-            c = sum(x[:count_of_values]) / count_of_values
-            y.append(1 if c > 0.5 else 0)
-            x = x[count_of_values:]
+        sums = np.add.reduceat(np.concatenate(arrays), starts)
+        sizes = np.diff(starts, append=sum(lengths))
+        flags = (sums / sizes > 0.5).astype(np.int64)
 
-        if x:
-            c = sum(x) / len(x)
-            y.append(1 if c > 0.5 else 0)
+        windows = [-(-length // count_of_values) for length in lengths]
+        y = [part.tolist() for part in np.split(flags, np.cumsum(windows)[:-1])]
 
         logging.debug(
-            "Обработка характеристик завершена, результат: %d значений", len(y)
+            "Обработка характеристик завершена, результат: %s значений",
+            [len(values) for values in y],
         )
         return y
     except Exception as e:
         logging.error("Ошибка в process_characteristics: %s", str(e))
-        return []
+        return [[] for _ in strips]
@@ -0,0 +1,199 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.config import FEATURE_CACHE_DIR, FEATURE_CACHE_DISK_MAX_BYTES, FEATURE_CACHE_MAX_BYTES
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def content_hash(data: bytes) -> str:
+    """
+    Compute the content hash used to address cached audio features.
+
+    Args:
+        data: Raw bytes of the uploaded audio file.
+
+    Returns:
+        str: Hex digest of the content.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def feature_cache_key(data: bytes, params: str) -> str:
+    """
+    Build a cache key from the audio content and the analysis parameters.
+
+    Args:
+        data: Raw bytes of the uploaded audio file.
+        params: Fingerprint of the parameters the features depend on.
+
+    Returns:
+        str: Cache key safe to use as a file name.
+    """
+    return f"{content_hash(data)}-{params}"
+
+
+class FeatureCache:
+    """
+    Two-tier cache of extracted melodies.
+
+    The memory tier is an LRU bounded by the total size of the stored
+    arrays. The optional disk tier keeps every entry as an ``.npz`` file in
+    ``directory`` and is shared by all worker processes, so a reference
+    track decoded by one worker is reused by the others. Reading a file
+    touches its mtime, and once the files exceed ``disk_max_bytes`` the
+    oldest ones are deleted; 0 leaves cleanup to the deployment.
+    """
+
+    def __init__(
+        self, max_bytes: int, directory: Optional[str] = None, disk_max_bytes: int = 0
+    ):
+        self.max_bytes = max(0, max_bytes)
+        self.directory = directory or None
+        self.disk_max_bytes = max(0, disk_max_bytes)
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def size(self) -> int:
+        """Total size in bytes of the arrays held in memory."""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, float]]:
+        """
+        Look up cached features.
+
+        Args:
+            key: Key built by ``feature_cache_key``.
+
+        Returns:
+            Optional[Tuple[np.ndarray, float]]: Melody and ``min_per`` value,
+            or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                logger.debug("Feature cache memory hit: %s", key)
+                return entry
+
+        entry = self._load(key)
+        if entry is not None:
+            logger.debug("Feature cache disk hit: %s", key)
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, melody: np.ndarray, min_per: float) -> None:
+        """
+        Store extracted features.
+
+        Args:
+            key: Key built by ``feature_cache_key``.
+            melody: Extracted melody.
+            min_per: Minimal note duration in frames.
+        """
+        melody = np.array(melody, dtype=np.float64)
+        melody.setflags(write=False)
+        entry = (melody, float(min_per))
+        self._remember(key, entry)
+        self._store(key, entry)
+
+    def clear(self) -> None:
+        """Drop the memory tier. Files of the disk tier are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remember(self, key: str, entry: Tuple[np.ndarray, float]) -> None:
+        nbytes = entry[0].nbytes
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[0].nbytes
+            self._entries[key] = entry
+            self._size += nbytes
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= evicted.nbytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _load(self, key: str) -> Optional[Tuple[np.ndarray, float]]:
+        if not self.directory:
+            return None
+        try:
+            with np.load(self._path(key)) as data:
+                melody = data["melody"]
+                min_per = float(data["min_per"])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Failed to read cached features %s: %s", key, str(e))
+            return None
+        try:
+            # Recently read files are evicted last
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        melody.setflags(write=False)
+        return melody, min_per
+
+    def _store(self, key: str, entry: Tuple[np.ndarray, float]) -> None:
+        if not self.directory:
+            return
+        try:
+            # Write to a temporary file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, melody=entry[0], min_per=entry[1])
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            logger.warning("Failed to write cached features %s: %s", key, str(e))
+            return
+        if self.disk_max_bytes:
+            self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".npz"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        files.sort()
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another worker evicted it first
+                pass
+            except OSError as e:
+                logger.warning("Failed to evict cached features %s: %s", path, str(e))
+                continue
+            total -= size
+
+
+feature_cache = FeatureCache(FEATURE_CACHE_MAX_BYTES, FEATURE_CACHE_DIR, FEATURE_CACHE_DISK_MAX_BYTES)
@@ -0,0 +1,143 @@
+import logging
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+import librosa
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Frames multiplied by the full filterbank at once while searching for the peak
+PEAK_CHUNK = 256
+
+# Relative margin that keeps the float32 upper bound above the exact value
+BOUND_MARGIN = 1.001
+
+
+class BandFilterbank(NamedTuple):
+    """Mel filters of selected bands, restricted to the FFT bins they cover."""
+
+    weights: np.ndarray
+    bins: slice
+    full: np.ndarray
+    bound: np.ndarray
+
+
+@lru_cache(maxsize=16)
+def band_filterbank(sr: int, n_fft: int, n_mels: int, start: int, stop: int) -> BandFilterbank:
+    """
+    Build and cache the filterbank of mel bands ``[start, stop)``.
+
+    Besides the selected filters, keeps the full filterbank and, for every
+    FFT bin, the largest weight any band gives it. ``bound @ power`` is
+    then an upper bound of every mel band of a frame.
+
+    Args:
+        sr: Sample rate of the signal.
+        n_fft: FFT window size.
+        n_mels: Number of mel bands of the full filterbank.
+        start: First selected band.
+        stop: Band after the last selected one.
+
+    Returns:
+        BandFilterbank: Read-only filters shared by all callers.
+    """
+    full = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels)
+    support = np.flatnonzero(full[start:stop].any(axis=0))
+    bins = slice(int(support[0]), int(support[-1]) + 1) if len(support) else slice(0, 0)
+    filterbank = BandFilterbank(
+        weights=np.ascontiguousarray(full[start:stop, bins]),
+        bins=bins,
+        full=full,
+        bound=full.max(axis=0),
+    )
+    for array in (filterbank.weights, filterbank.full, filterbank.bound):
+        array.setflags(write=False)
+    logger.debug("Built mel filterbank for bands %d-%d at %d Hz", start, stop, sr)
+    return filterbank
+
+
+def mel_peak(power: np.ndarray, filterbank: BandFilterbank, lower: float = 0.0) -> float:
+    """
+    Find the largest mel band value of a power spectrogram.
+
+    Only frames whose upper bound exceeds the best value found so far are
+    multiplied by the full filterbank, loudest bounds first.
+
+    Args:
+        power: Power spectrogram of shape (bins, frames).
+        filterbank: Filterbank from :func:`band_filterbank`.
+        lower: Known lower bound of the peak, e.g. from other bands or blocks.
+
+    Returns:
+        float: ``max(lower, (full @ power).max())``.
+    """
+    bounds = (filterbank.bound @ power) * BOUND_MARGIN
+    order = np.argsort(bounds)[::-1]
+    peak = lower
+    for i in range(0, len(order), PEAK_CHUNK):
+        frames = order[i:i + PEAK_CHUNK]
+        if bounds[frames[0]] <= peak:
+            break
+        peak = max(peak, float((filterbank.full @ power[:, frames]).max()))
+    return peak
+
+
+def band_mel(
+    power: np.ndarray, filterbank: BandFilterbank, lower: float = 0.0
+) -> Tuple[np.ndarray, float]:
+    """
+    Apply the selected mel filters to a power spectrogram.
+
+    Args:
+        power: Power spectrogram of shape (bins, frames).
+        filterbank: Filterbank from :func:`band_filterbank`.
+        lower: Known lower bound of the peak over all bands.
+
+    Returns:
+        Tuple[np.ndarray, float]: Selected bands of shape (bands, frames)
+        and the peak over all bands, as in :func:`mel_peak`.
+    """
+    bands = filterbank.weights @ power[filterbank.bins]
+    lower = max(lower, float(bands.max())) if bands.size else lower
+    return bands, mel_peak(power, filterbank, lower)
+
+
+def band_mel_db(
+    y: np.ndarray,
+    sr: int,
+    n_mels: int,
+    bands: slice,
+    n_fft: int = 2048,
+    hop_length: int = 512,
+    top_db: Optional[float] = 80.0,
+) -> np.ndarray:
+    """
+    Compute selected bands of the dB mel spectrogram of a signal.
+
+    Equivalent to ``amplitude_to_db(melspectrogram(y=y, sr=sr))[bands]``
+    up to float32 rounding, without applying the other filters to every
+    frame or converting them to decibels.
+
+    Args:
+        y: Mono audio signal.
+        sr: Sample rate of the signal.
+        n_mels: Number of mel bands of the full filterbank.
+        bands: Bands to keep.
+        n_fft: FFT window size.
+        hop_length: Hop between frames in samples.
+        top_db: Dynamic range kept below the peak over all bands.
+
+    Returns:
+        np.ndarray: Array of shape (selected bands, frames) in decibels.
+    """
+    start, stop, _ = bands.indices(n_mels)
+    filterbank = band_filterbank(sr, n_fft, n_mels, start, stop)
+    power = np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length)) ** 2.0
+    mel, peak = band_mel(power, filterbank)
+    db = librosa.amplitude_to_db(mel, top_db=None)
+    if top_db is None:
+        return db
+    peak_db = librosa.amplitude_to_db(np.array([peak], dtype=mel.dtype), top_db=None)[0]
+    return np.maximum(db, peak_db - top_db)
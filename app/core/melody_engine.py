@@ -0,0 +1,341 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from app.config import (COMPARE_JOB_TIMEOUT, COMPARE_MAX_QUEUE,
+                        COMPARE_MAX_TASKS_PER_WORKER, COMPARE_START_METHOD,
+                        COMPARE_WORKERS)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class EngineBusyError(RuntimeError):
+    """Raised when the engine already holds as many jobs as it may queue."""
+
+
+class EngineTimeoutError(TimeoutError):
+    """Raised when a job does not finish within the configured timeout."""
+
+
+class EngineWorkerError(RuntimeError):
+    """Raised when the worker process running a job dies before it finishes."""
+
+
+class MelodyEngine:
+    """
+    Process pool for CPU-bound melody analysis jobs.
+
+    Jobs run in separate worker processes, so librosa decoding and the
+    pure-Python loops of the comparison pipeline do not compete for the GIL
+    of the web process. The engine accepts at most ``workers + max_queue``
+    jobs at a time and rejects the rest with ``EngineBusyError`` instead of
+    letting them pile up. The pool is replaced after it has run
+    ``max_tasks_per_worker`` jobs per worker to keep memory fragmentation of
+    long-lived processes in check.
+
+    Waiting jobs stay in the engine's own queue and the pool only ever gets
+    as many jobs as it has workers, so a job handed to the pool is really
+    running. When a worker dies (crash, OOM kill) or a running job overruns
+    its timeout, the pool is discarded and the next job starts a fresh one.
+    ``ProcessPoolExecutor`` does not tell which worker runs which job, so a
+    timeout kills every worker of the pool; the other jobs it was running
+    go back to the front of the queue and start over on the new pool.
+    """
+
+    def __init__(
+        self,
+        workers: int = COMPARE_WORKERS,
+        max_queue: int = COMPARE_MAX_QUEUE,
+        job_timeout: Optional[float] = COMPARE_JOB_TIMEOUT,
+        max_tasks_per_worker: Optional[int] = COMPARE_MAX_TASKS_PER_WORKER,
+        start_method: str = COMPARE_START_METHOD,
+    ):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.job_timeout = job_timeout if job_timeout and job_timeout > 0 else None
+        self.max_tasks_per_worker = max_tasks_per_worker or None
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._waiting: Deque[Tuple[Future, Callable[..., Any], Tuple[Any, ...]]] = deque()
+        self._running: Dict[Future, ProcessPoolExecutor] = {}
+        # Pools killed to stop a timed out job, and the jobs that timed out
+        self._killed: Set[ProcessPoolExecutor] = set()
+        self._timed_out: Set[Future] = set()
+        self._executor_jobs = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of jobs running or waiting at the same time."""
+        return self.workers + self.max_queue
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs currently running or waiting for a worker."""
+        return self._pending
+
+    def start(self) -> None:
+        """Create the worker pool if it is not running yet."""
+        with self._lock:
+            self._get_executor()
+
+    def shutdown(self) -> None:
+        """Stop the worker processes, abandoning unfinished jobs."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            waiting = [job for job, _, _ in self._waiting]
+            self._waiting.clear()
+            # Retired pools may still be finishing their last jobs
+            busy = set(self._running.values())
+        for job in waiting:
+            # Jobs put back after a timeout are already running
+            if not job.cancel():
+                job.set_exception(BrokenProcessPool("Melody worker pool was shut down"))
+        for pool in busy:
+            self._terminate(pool)
+            pool.shutdown(wait=True, cancel_futures=True)
+        if executor is None:
+            return
+        executor.shutdown(wait=True, cancel_futures=True)
+        logger.info("Melody engine stopped")
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+        """
+        Schedule ``fn(*args)`` on a worker process.
+
+        Args:
+            fn: Picklable module-level callable to execute.
+            *args: Picklable positional arguments for ``fn``.
+
+        Returns:
+            asyncio.Future: Future resolved with the job result. It fails
+            with ``BrokenProcessPool`` if the worker dies.
+
+        Raises:
+            EngineBusyError: If the engine is at capacity.
+        """
+        return asyncio.wrap_future(self._submit(fn, *args))
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Execute ``fn(*args)`` on a worker process and wait for the result.
+
+        A job that times out while waiting for a worker is dropped from the
+        queue. A running one is stopped by terminating the pool; the other
+        jobs running in it are resubmitted rather than failed.
+
+        Raises:
+            EngineBusyError: If the engine is at capacity.
+            EngineTimeoutError: If the job exceeds the configured timeout.
+            EngineWorkerError: If the worker running the job died.
+        """
+        job = self._submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(job), self.job_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Melody job timed out after %s s", self.job_timeout)
+            self._abandon(job)
+            raise EngineTimeoutError("Melody job timed out")
+        except BrokenProcessPool:
+            logger.error("Melody worker died while running a job")
+            raise EngineWorkerError("Melody worker process died")
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        job: Future = Future()
+        with self._lock:
+            if self._pending >= self.capacity:
+                logger.warning("Melody engine is full: %d jobs pending", self._pending)
+                raise EngineBusyError("Melody engine queue is full")
+            self._pending += 1
+            self._waiting.append((job, fn, args))
+        job.add_done_callback(lambda _: self._release())
+        self._dispatch()
+        return job
+
+    def _dispatch(self) -> None:
+        """Hand waiting jobs to the pool while it has idle workers."""
+        while True:
+            with self._lock:
+                if len(self._running) >= self.workers or not self._waiting:
+                    return
+                job, fn, args = self._waiting.popleft()
+                # A resubmitted job is already running
+                if not job.running() and not job.set_running_or_notify_cancel():
+                    continue
+                executor = self._get_executor()
+                self._running[job] = executor
+                self._count_job(executor)
+            try:
+                try:
+                    task = executor.submit(fn, *args)
+                except BrokenProcessPool:
+                    # A worker died after the previous job finished
+                    self._discard(executor)
+                    with self._lock:
+                        executor = self._running[job] = self._get_executor()
+                        self._count_job(executor)
+                    task = executor.submit(fn, *args)
+            except Exception as e:
+                with self._lock:
+                    self._running.pop(job, None)
+                job.set_exception(e)
+                continue
+            task.add_done_callback(partial(self._on_task_done, job, fn, args, executor))
+
+    def _on_task_done(
+        self,
+        job: Future,
+        fn: Callable[..., Any],
+        args: Tuple[Any, ...],
+        executor: ProcessPoolExecutor,
+        task: Future,
+    ) -> None:
+        killed = task.cancelled() or isinstance(task.exception(), BrokenProcessPool)
+        with self._lock:
+            self._running.pop(job, None)
+            retired = executor is not self._executor and executor not in self._running.values()
+            resubmit = killed and executor in self._killed and job not in self._timed_out
+            if resubmit:
+                # A healthy job killed together with a timed out one
+                self._waiting.appendleft((job, fn, args))
+            self._timed_out.discard(job)
+            if retired:
+                self._killed.discard(executor)
+        if retired:
+            # The last job of a replaced pool is done, let its workers exit
+            executor.shutdown(wait=False)
+        if resubmit:
+            logger.info("Resubmitting a melody job stopped with a timed out one")
+            self._dispatch()
+            return
+        if task.cancelled():
+            job.set_exception(BrokenProcessPool("Melody worker pool was shut down"))
+        elif task.exception() is not None:
+            if isinstance(task.exception(), BrokenProcessPool):
+                self._discard(executor)
+            job.set_exception(task.exception())
+        else:
+            job.set_result(task.result())
+        self._dispatch()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Called with the lock held
+        if self._executor is None:
+            # Workers are recycled with the whole pool rather than with
+            # max_tasks_per_child: killing a pool while it respawns a worker
+            # can leave the replacement blocked on a queue lock forever
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+            )
+            self._executor_jobs = 0
+            logger.info(
+                "Melody engine started: %d workers, queue %d, timeout %s s",
+                self.workers,
+                self.max_queue,
+                self.job_timeout,
+            )
+        return self._executor
+
+    def _count_job(self, executor: ProcessPoolExecutor) -> None:
+        """Count a job handed to ``executor`` and retire the pool once it is worn out."""
+        # Called with the lock held
+        self._executor_jobs += 1
+        if (
+            self.max_tasks_per_worker
+            and self._executor_jobs >= self.workers * self.max_tasks_per_worker
+            and self._executor is executor
+        ):
+            self._executor = None
+
+    def _abandon(self, job: Future) -> None:
+        """Stop a timed out job, wherever it is."""
+        if job.cancel():
+            # Still waiting, _dispatch skips it
+            return
+        with self._lock:
+            executor = self._running.get(job)
+            if executor is not None:
+                self._timed_out.add(job)
+                self._killed.add(executor)
+            else:
+                # Resubmitted and waiting for a worker again
+                waiting = len(self._waiting)
+                self._waiting = deque(entry for entry in self._waiting if entry[0] is not job)
+                if len(self._waiting) == waiting:
+                    return
+        if executor is not None:
+            self._recycle(executor)
+        else:
+            job.set_exception(EngineTimeoutError("Melody job timed out"))
+
+    def _recycle(self, executor: ProcessPoolExecutor) -> None:
+        """Kill the workers of ``executor``; its jobs fail and free their slots."""
+        self._discard(executor)
+        logger.warning("Terminating melody workers to stop a timed out job")
+        self._terminate(executor)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                logger.warning("Melody worker pool discarded, the next job starts a new one")
+
+    @staticmethod
+    def _terminate(executor: ProcessPoolExecutor) -> None:
+        terminate = getattr(executor, "terminate_workers", None)
+        if terminate is not None:
+            # Python 3.14+
+            terminate()
+            return
+        for process in worker_processes(executor):
+            if process.is_alive():
+                process.kill()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+
+def worker_processes(executor: ProcessPoolExecutor) -> List[multiprocessing.Process]:
+    """
+    List the worker processes of a pool.
+
+    Before Python 3.14 ``ProcessPoolExecutor`` has no public way to stop a
+    running worker, so this reads its private ``_processes`` mapping. If a
+    Python version drops it, nothing is killed and a stuck job keeps its
+    worker until it finishes; test/melody_engine_test.py catches that.
+
+    Args:
+        executor: Pool to inspect.
+
+    Returns:
+        List[multiprocessing.Process]: Its current workers, possibly empty.
+    """
+    if not hasattr(executor, "_processes"):
+        logger.warning("Cannot reach the workers of %r to terminate them", executor)
+        return []
+    # None once the pool is shut down
+    return list((executor._processes or {}).values())
+
+
+melody_engine = MelodyEngine()
+
+
+def get_melody_engine() -> MelodyEngine:
+    """
+    Retrieve the application-wide melody engine.
+
+    Returns:
+        MelodyEngine: Shared engine instance.
+    """
+    return melody_engine
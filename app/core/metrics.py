@@ -0,0 +1,72 @@
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from prometheus_client import Histogram
+
+from app.core.compare_melodies import collect_timings
+from app.core.melody_engine import MelodyEngine
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+STAGE_SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+STAGE_SIZE_BUCKETS = tuple(4.0 ** power for power in range(2, 14))
+
+stage_wall_seconds = Histogram(
+    "melody_stage_wall_seconds",
+    "Wall-clock time of a melody pipeline stage",
+    ["stage"],
+    buckets=STAGE_SECONDS_BUCKETS,
+)
+stage_cpu_seconds = Histogram(
+    "melody_stage_cpu_seconds",
+    "CPU time of a melody pipeline stage in the worker process",
+    ["stage"],
+    buckets=STAGE_SECONDS_BUCKETS,
+)
+stage_input_size = Histogram(
+    "melody_stage_input_size",
+    "Input size of a melody pipeline stage (bytes, samples or notes)",
+    ["stage"],
+    buckets=STAGE_SIZE_BUCKETS,
+)
+
+
+def observe_timings(timings: Iterable[Dict[str, Any]]) -> None:
+    """
+    Record stage timings collected in a worker process.
+
+    Args:
+        timings: Records of ``collect_timings`` with ``stage``, ``wall``,
+            ``cpu`` and ``size`` keys.
+    """
+    for timing in timings:
+        stage = timing["stage"]
+        stage_wall_seconds.labels(stage).observe(timing["wall"])
+        stage_cpu_seconds.labels(stage).observe(timing["cpu"])
+        if timing["size"] is not None:
+            stage_input_size.labels(stage).observe(timing["size"])
+
+
+async def run_instrumented(
+    engine: MelodyEngine, fn: Callable[..., Any], *args: Any
+) -> Tuple[Any, List[Dict[str, Any]]]:
+    """
+    Run a melody job on the engine and record the timings of its stages.
+
+    Prometheus metrics live in the web process, so workers only collect
+    the timings and they are observed here once the job returns.
+
+    Args:
+        engine: Process pool running the job.
+        fn: Module-level function from app.core.compare_melodies.
+        *args: Arguments for ``fn``.
+
+    Returns:
+        Tuple[Any, List[Dict[str, Any]]]: Result of ``fn`` and its stage timings.
+    """
+    result, timings = await engine.run(collect_timings, fn, *args)
+    observe_timings(timings)
+    return result, timings
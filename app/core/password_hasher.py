@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from passlib.context import CryptContext
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.config import (PASSWORD_ARGON2_MEMORY_COST, PASSWORD_ARGON2_PARALLELISM,
+                        PASSWORD_ARGON2_TIME_COST, PASSWORD_BCRYPT_ROUNDS,
+                        PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_SCHEME,
+                        PASSWORD_HASH_WORKERS)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+HASH_SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+password_hash_queue_seconds = Histogram(
+    "password_hash_queue_seconds",
+    "Time a password operation waited for a hashing thread",
+    ["operation"],
+    buckets=HASH_SECONDS_BUCKETS,
+)
+password_hash_seconds = Histogram(
+    "password_hash_seconds",
+    "Time spent hashing or verifying a password",
+    ["operation"],
+    buckets=HASH_SECONDS_BUCKETS,
+)
+password_hash_rejected = Counter(
+    "password_hash_rejected_total",
+    "Password operations rejected because the hashing pool was full",
+    ["operation"],
+)
+password_hash_pending = Gauge(
+    "password_hash_pending",
+    "Password operations running or waiting for a hashing thread",
+)
+
+# Hashes of every supported scheme verify; only the configured one is issued
+PASSWORD_SCHEMES = ("bcrypt", "argon2")
+
+
+def build_context(
+    scheme: str = PASSWORD_HASH_SCHEME,
+    bcrypt_rounds: int = PASSWORD_BCRYPT_ROUNDS,
+    argon2_time_cost: int = PASSWORD_ARGON2_TIME_COST,
+    argon2_memory_cost: int = PASSWORD_ARGON2_MEMORY_COST,
+    argon2_parallelism: int = PASSWORD_ARGON2_PARALLELISM,
+) -> CryptContext:
+    """
+    Build the password context issuing hashes of ``scheme`` at the given cost.
+
+    Hashes of the other scheme, or of the same scheme at another cost, still
+    verify but are reported by ``needs_update``, so they are replaced on the
+    next successful login.
+
+    Args:
+        scheme: Scheme of new hashes, "bcrypt" or "argon2".
+        bcrypt_rounds: bcrypt cost factor (log2 of the iterations).
+        argon2_time_cost: argon2 passes over memory.
+        argon2_memory_cost: argon2 memory in KiB.
+        argon2_parallelism: argon2 lanes.
+
+    Returns:
+        CryptContext: Configured context.
+
+    Raises:
+        ValueError: If the scheme is not supported.
+    """
+    if scheme not in PASSWORD_SCHEMES:
+        raise ValueError(f"Unsupported password hash scheme: {scheme}")
+    return CryptContext(
+        schemes=[scheme] + [other for other in PASSWORD_SCHEMES if other != scheme],
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        argon2__time_cost=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+
+pwd_context = build_context()
+
+
+class HasherBusyError(RuntimeError):
+    """Raised when the hasher already holds as many operations as it may queue."""
+
+
+class PasswordHasher:
+    """
+    Thread pool for password hashing and verification.
+
+    bcrypt releases the GIL, so a few threads keep it off the event loop
+    without a process pool, while the dedicated pool stops a login storm
+    from taking over the default executor used by other blocking calls.
+    The hasher accepts at most ``workers + max_queue`` operations at a time
+    and rejects the rest with ``HasherBusyError``.
+    """
+
+    def __init__(
+        self,
+        context: CryptContext,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+    ):
+        self.context = context
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of operations running or waiting at the same time."""
+        return self.workers + self.max_queue
+
+    @property
+    def pending(self) -> int:
+        """Number of operations currently running or waiting for a thread."""
+        return self._pending
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password in the pool.
+
+        Args:
+            password: Plain-text password.
+
+        Returns:
+            str: Password hash.
+
+        Raises:
+            HasherBusyError: If the hasher is at capacity.
+        """
+        return await self._run("hash", self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Check a password against its hash in the pool.
+
+        Args:
+            password: Plain-text password.
+            hashed_password: Stored hash.
+
+        Returns:
+            bool: True if the password matches.
+
+        Raises:
+            HasherBusyError: If the hasher is at capacity.
+        """
+        return await self._run("verify", self.context.verify, password, hashed_password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password and rehash it if its hash is outdated, in one pool slot.
+
+        Args:
+            password: Plain-text password.
+            hashed_password: Stored hash.
+
+        Returns:
+            Tuple[bool, Optional[str]]: Whether the password matches, and the
+            replacement hash if the stored one uses an old scheme or cost.
+
+        Raises:
+            HasherBusyError: If the hasher is at capacity.
+        """
+        return await self._run(
+            "verify", self.context.verify_and_update, password, hashed_password
+        )
+
+    def shutdown(self) -> None:
+        """Stop the hashing threads after the running operations finish."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    async def _run(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.capacity:
+                password_hash_rejected.labels(operation).inc()
+                logger.warning("Password hasher is full: %d operations pending", self._pending)
+                raise HasherBusyError("Password hasher queue is full")
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+            executor = self._executor
+        submitted = time.perf_counter()
+
+        def timed() -> Any:
+            started = time.perf_counter()
+            password_hash_queue_seconds.labels(operation).observe(started - submitted)
+            try:
+                return fn(*args)
+            finally:
+                password_hash_seconds.labels(operation).observe(time.perf_counter() - started)
+
+        try:
+            future = executor.submit(timed)
+        except Exception:
+            self._release()
+            raise
+        # A cancelled request leaves its thread busy, so the slot is freed
+        # only when the operation itself finishes
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+
+password_hasher = PasswordHasher(pwd_context)
+password_hash_pending.set_function(lambda: password_hasher.pending)
@@ -0,0 +1,103 @@
+import logging
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from app.config import RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL
+from app.core.compare_melodies import AudioConfig
+from app.core.feature_cache import content_hash
+from app.core.ttl_cache import TTLCache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class ResultCache(TTLCache[Tuple[str, str, str], Any]):
+    """
+    LRU cache of comparison results keyed by the pair of audio content hashes.
+
+    Entries expire ``ttl`` seconds after they were stored. Every key carries
+    the fingerprint of ``AudioConfig``, and the first lookup after the
+    analysis parameters change drops all entries computed with the old ones.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: Optional[float] = None,
+        fingerprint: Callable[[], str] = AudioConfig.fingerprint,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(max_entries, ttl, clock)
+        self.fingerprint = fingerprint
+        self._version = fingerprint()
+
+    def key(self, file1: bytes, file2: bytes) -> Tuple[str, str, str]:
+        """
+        Build the cache key of a comparison.
+
+        Hashing large uploads takes a few milliseconds, so async callers
+        should run this in a thread.
+
+        Args:
+            file1: Teacher recording.
+            file2: Student recording.
+
+        Returns:
+            Tuple[str, str, str]: Content hashes and analysis fingerprint.
+        """
+        return content_hash(file1), content_hash(file2), self.fingerprint()
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Any]:
+        """
+        Look up a stored result and count the hit or miss.
+
+        Args:
+            key: Key built by :meth:`key`.
+
+        Returns:
+            Optional[Any]: Stored result, or None on a miss.
+        """
+        with self._lock:
+            self._check_version(key[2])
+            return super().get(key)
+
+    def put(self, key: Tuple[str, str, str], result: Any) -> None:
+        """
+        Store a comparison result.
+
+        Args:
+            key: Key built by :meth:`key`.
+            result: Result of ``compare_melodies``; None is not cached.
+        """
+        if result is None:
+            return
+        with self._lock:
+            self._check_version(key[2])
+            if key[2] == self._version:
+                super().put(key, result)
+
+    def invalidate(self) -> None:
+        """Drop all stored results, e.g. after the scoring code changed."""
+        self.clear()
+        logger.info("Result cache invalidated")
+
+    def _check_version(self, version: str) -> None:
+        if version == self._version or version != self.fingerprint():
+            return
+        # AudioConfig changed: results computed with the old parameters are stale
+        logger.info("Analysis parameters changed, dropping %d cached results", len(self._entries))
+        self._entries.clear()
+        self._version = version
+
+
+result_cache = ResultCache(RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL)
+
+
+def get_result_cache() -> ResultCache:
+    """
+    Retrieve the application-wide result cache.
+
+    Returns:
+        ResultCache: Shared cache instance.
+    """
+    return result_cache
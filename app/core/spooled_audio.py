@@ -0,0 +1,162 @@
+import logging
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Any, Iterator, NamedTuple, Optional, Union
+
+from fastapi import UploadFile
+from starlette.formparsers import MultiPartParser
+
+from app.core.compare_melodies import compare_melodies
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class SpooledAudio(NamedTuple):
+    """
+    Reference to an upload that the web process spooled to disk.
+
+    Worker processes open the spool file through ``/proc`` instead of
+    receiving its content, and check the device and inode so that a file
+    descriptor reused after the request ended is never read by mistake.
+    """
+
+    path: str
+    size: int
+    device: int
+    inode: int
+
+
+AudioSource = Union[bytes, SpooledAudio]
+
+
+class SpoolUnavailableError(OSError):
+    """Raised when the spool file of an upload cannot be opened by its path."""
+
+
+def spool_reference(upload: UploadFile, min_size: int) -> Optional[SpooledAudio]:
+    """
+    Reference the spool file of an upload by its ``/proc`` path.
+
+    Args:
+        upload: Uploaded file.
+        min_size: Size above which the upload has been moved to disk.
+
+    Returns:
+        Optional[SpooledAudio]: Reference to the spool file, or None if the
+        upload is kept in memory or its path cannot be opened.
+    """
+    if upload.size is None or upload.size <= min_size:
+        return None
+    try:
+        # The spool has already rolled over, so fileno() does not copy it
+        fd = upload.file.fileno()
+        upload.file.flush()
+        status = os.fstat(fd)
+        path = f"/proc/{os.getpid()}/fd/{fd}"
+        probe = os.open(path, os.O_RDONLY)
+        try:
+            usable = os.path.samestat(os.fstat(probe), status)
+        finally:
+            os.close(probe)
+    except (AttributeError, OSError, ValueError) as e:
+        logger.debug("Upload spool file cannot be shared: %s", str(e))
+        return None
+    if not usable:
+        return None
+    return SpooledAudio(path, status.st_size, status.st_dev, status.st_ino)
+
+
+async def read_upload(upload: UploadFile) -> bytes:
+    """Read the whole content of an upload."""
+    await upload.seek(0)
+    return await upload.read()
+
+
+async def upload_source(
+    upload: UploadFile, min_size: int = MultiPartParser.max_file_size
+) -> AudioSource:
+    """
+    Hand an uploaded file to a worker process without copying it when possible.
+
+    Starlette keeps uploads up to ``MultiPartParser.max_file_size`` (1 MB) in
+    memory and moves larger ones to an anonymous temporary file. Small
+    uploads are read into ``bytes``; large ones are referenced by the
+    ``/proc`` path of the open temporary file, so their content is never
+    copied into the web process or through the pool's pipe. Where that
+    path cannot be opened (no ``/proc``, other platforms) the upload is
+    read into ``bytes`` as well. The upload must stay open until the
+    worker has finished.
+
+    Args:
+        upload: Uploaded file.
+        min_size: Size above which the upload has been moved to disk.
+
+    Returns:
+        AudioSource: ``bytes`` or a :class:`SpooledAudio` reference.
+    """
+    reference = spool_reference(upload, min_size)
+    if reference is not None:
+        return reference
+    return await read_upload(upload)
+
+
+@contextmanager
+def open_source(source: AudioSource) -> Iterator[Any]:
+    """
+    Expose an audio source as a bytes-like object.
+
+    Args:
+        source: ``bytes`` or a :class:`SpooledAudio` reference.
+
+    Yields:
+        bytes or mmap: Encoded audio file; a memory map is valid only
+        inside the ``with`` block.
+
+    Raises:
+        SpoolUnavailableError: If the spool file cannot be opened or was
+            replaced by another file.
+    """
+    if not isinstance(source, SpooledAudio):
+        yield source
+        return
+
+    try:
+        fd = os.open(source.path, os.O_RDONLY)
+    except OSError as e:
+        raise SpoolUnavailableError(f"Cannot open upload spool file {source.path}: {e}")
+    try:
+        status = os.fstat(fd)
+        if (status.st_dev, status.st_ino) != (source.device, source.inode):
+            raise SpoolUnavailableError(f"Upload spool file {source.path} was replaced")
+        if not source.size:
+            yield b""
+            return
+        mapping = mmap.mmap(fd, source.size, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+
+    try:
+        yield mapping
+    finally:
+        try:
+            mapping.close()
+        except BufferError:
+            # A decoder still holds a view; the mapping is released with it
+            logger.debug("Memory map of %s is still in use", source.path)
+
+
+def compare_melodies_sources(file1: AudioSource, file2: AudioSource):
+    """
+    Run ``compare_melodies`` on two audio sources in a worker process.
+
+    Args:
+        file1: Teacher recording.
+        file2: Student recording.
+
+    Returns:
+        Result of ``compare_melodies``.
+    """
+    with open_source(file1) as teacher, open_source(file2) as student:
+        return compare_melodies(teacher, student)
@@ -0,0 +1,37 @@
+import time
+from typing import Callable
+
+from authx.schema import TokenPayload
+
+from app.config import TOKEN_CACHE_MAX_ENTRIES
+from app.core.ttl_cache import TTLCache
+
+
+class TokenCache(TTLCache[str, TokenPayload]):
+    """
+    LRU cache of verified access tokens.
+
+    A token's signature and expiry check give the same answer until the
+    token expires, so a verified token is kept until its ``exp`` and later
+    requests presenting it skip decoding and signature verification. The
+    whole token is the key: a cached signature alone would also match a
+    token with a forged payload.
+    """
+
+    def __init__(self, max_entries: int, clock: Callable[[], float] = time.time):
+        super().__init__(max_entries, clock=clock)
+
+    def put(self, token: str, payload: TokenPayload) -> None:
+        """
+        Store a token that passed verification.
+
+        Args:
+            token: Encoded JWT.
+            payload: Its decoded payload; tokens without expiry are not cached.
+        """
+        if payload.exp is None:
+            return
+        super().put(token, payload, expires_at=payload.exp.timestamp())
+
+
+token_cache = TokenCache(TOKEN_CACHE_MAX_ENTRIES)
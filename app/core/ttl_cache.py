@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe LRU cache whose entries expire.
+
+    An entry expires ``ttl`` seconds after it was stored, or at the deadline
+    passed to :meth:`put`, and the least recently used entry is evicted once
+    ``max_entries`` are stored. Hits and misses are counted for the metrics.
+    Subclasses build the keys and decide what is stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max(0, max_entries)
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[K, Tuple[Optional[float], V]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        Look up an entry and count the hit or miss.
+
+        Args:
+            key: Key of the entry.
+
+        Returns:
+            Optional[V]: Stored value, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and self.clock() >= entry[0]:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: K, value: V, expires_at: Optional[float] = None) -> None:
+        """
+        Store an entry, evicting the least recently used one if the cache is full.
+
+        Args:
+            key: Key of the entry.
+            value: Value to store.
+            expires_at: Clock reading at which the entry expires; defaults to
+                ``ttl`` seconds from now, or never if there is no ``ttl``.
+        """
+        if not self.max_entries:
+            return
+        with self._lock:
+            if expires_at is None and self.ttl is not None:
+                expires_at = self.clock() + self.ttl
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        """
+        Drop one entry if it is stored.
+
+        Args:
+            key: Key of the entry.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all stored entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counters and the number of stored entries."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
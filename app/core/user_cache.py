@@ -0,0 +1,60 @@
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import inspect
+
+from app.config import USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL
+from app.core.ttl_cache import TTLCache
+from app.data.models import User
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class UserCache(TTLCache[int, Dict[str, Any]]):
+    """
+    LRU cache of authenticated users keyed by user ID.
+
+    Column values are stored rather than ORM instances, and every hit builds
+    a fresh detached ``User``, so requests never share or mutate one object
+    and no session outlives its request. Entries expire ``ttl`` seconds after
+    they were stored; code that changes a user calls :meth:`invalidate`.
+    Each worker process has its own cache, so changes made through another
+    worker become visible after at most ``ttl`` seconds.
+    """
+
+    def get(self, user_id: int) -> Optional[User]:
+        """
+        Look up a user and count the hit or miss.
+
+        Args:
+            user_id: ID of the user.
+
+        Returns:
+            Optional[User]: Detached copy of the user, or None on a miss.
+        """
+        values = super().get(user_id)
+        return User(**values) if values is not None else None
+
+    def put(self, user: User) -> None:
+        """
+        Store the current column values of a user.
+
+        Args:
+            user: Loaded user object.
+        """
+        values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+        super().put(user.id, values)
+
+    def invalidate(self, user_id: int) -> None:
+        """
+        Drop a user after their row was changed.
+
+        Args:
+            user_id: ID of the changed user.
+        """
+        self.pop(user_id)
+        logger.debug("User %s dropped from the user cache", user_id)
+
+
+user_cache = UserCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL)
@@ -1,4 +1,7 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from datetime import datetime
+
+from sqlalchemy import (JSON, Boolean, Column, DateTime, Float, ForeignKey,
+                        Integer, String)
 
 from app.data.database import Base
 
@@ -18,3 +21,37 @@ class User(Base):
     photo_url = Column(
         String, nullable=True
     )  # Путь к фото в MinIO (формат: 'photos/avatars/{user_id}.png')
+
+
+class ReferenceTrack(Base):
+    __tablename__ = "reference_tracks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    title = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Результат analyze_reference: мелодия по кадрам и выделенные из нее ноты
+    melody = Column(JSON, nullable=False)
+    min_per = Column(Float, nullable=False)
+    notes = Column(JSON, nullable=False)
+    frequencies = Column(JSON, nullable=False)
+    lengths = Column(JSON, nullable=False)
+
+
+class CompareJob(Base):
+    __tablename__ = "compare_jobs"
+
+    id = Column(String(36), primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    # queued -> running -> done | failed
+    status = Column(String, nullable=False, default="queued", index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    # Записи ждут обработки в MinIO и удаляются после нее
+    teacher_object = Column(String, nullable=False)
+    student_object = Column(String, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    # Аренда выполняемой задачи: кто ее взял и до какого момента
+    lease_owner = Column(String(36), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
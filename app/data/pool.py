@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Union
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import (DB_MAX_OVERFLOW, DB_POOL_PRE_PING, DB_POOL_RECYCLE,
+                        DB_POOL_SIZE, DB_POOL_TIMEOUT)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a database connection from the pool",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+pool_checkout_timeouts = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after the pool timeout",
+    ["engine"],
+)
+pool_connections_opened = Counter(
+    "db_pool_connections_opened_total",
+    "Database connections opened by the pool",
+    ["engine"],
+)
+pool_checked_out = Gauge(
+    "db_pool_checked_out",
+    "Database connections currently in use",
+    ["engine"],
+)
+pool_checked_in = Gauge(
+    "db_pool_checked_in",
+    "Idle database connections kept open by the pool",
+    ["engine"],
+)
+pool_overflow = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond the pool size (negative while the pool is not full)",
+    ["engine"],
+)
+
+
+class TimedCheckout:
+    """
+    Pool mixin recording how long each checkout waits for a connection.
+
+    ``Pool.connect()`` is the public entry point engines check connections
+    out through, and SQLAlchemy has no event that fires before a checkout
+    starts, so the wait is measured around it. It includes opening a new
+    connection and the pre-ping when the pool has to do either.
+
+    Nothing is recorded until :func:`instrument_engine` sets the engine's
+    label; pools recreated by ``engine.dispose()`` keep it.
+    """
+
+    metrics_label: Optional[str] = None
+
+    def connect(self) -> Any:
+        if self.metrics_label is None:
+            return super().connect()
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            pool_checkout_timeouts.labels(self.metrics_label).inc()
+            raise
+        finally:
+            pool_checkout_seconds.labels(self.metrics_label).observe(time.perf_counter() - started)
+
+    def recreate(self) -> Any:
+        pool = super().recreate()
+        pool.metrics_label = self.metrics_label
+        return pool
+
+
+class TimedQueuePool(TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Engine arguments configuring the connection pool from DB_POOL_* settings.
+
+    In-memory SQLite databases keep SQLAlchemy's single-connection pool,
+    which takes no sizing arguments.
+
+    Args:
+        url: Database URL of the engine.
+        is_async: Whether the engine is created by ``create_async_engine``.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for ``create_engine``.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def instrument_engine(engine: Union[Engine, AsyncEngine], label: str) -> None:
+    """
+    Export pool usage and checkout latency of an engine under one label.
+
+    The gauges read the engine's current pool when scraped, so they stay
+    correct after ``engine.dispose()`` replaces the pool.
+
+    Args:
+        engine: Sync or async engine.
+        label: Value of the ``engine`` label.
+    """
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    if not isinstance(sync_engine.pool, QueuePool):
+        return
+
+    if isinstance(sync_engine.pool, TimedCheckout):
+        sync_engine.pool.metrics_label = label
+
+    pool_checked_out.labels(label).set_function(lambda: sync_engine.pool.checkedout())
+    pool_checked_in.labels(label).set_function(lambda: sync_engine.pool.checkedin())
+    pool_overflow.labels(label).set_function(lambda: sync_engine.pool.overflow())
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection: Any, connection_record: Any) -> None:
+        pool_connections_opened.labels(label).inc()
+
+
+def warm_up_sync(engine: Engine, connections: int) -> int:
+    """
+    Open up to ``connections`` pooled connections ahead of the first requests.
+
+    Args:
+        engine: Sync engine.
+        connections: Number of connections to open.
+
+    Returns:
+        int: Number of connections opened.
+    """
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    finally:
+        # Returning them to the pool keeps them open for the next checkouts
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+async def warm_up_async(engine: AsyncEngine, connections: int) -> int:
+    """
+    Open up to ``connections`` pooled connections of an async engine.
+
+    Args:
+        engine: Async engine.
+        connections: Number of connections to open.
+
+    Returns:
+        int: Number of connections opened.
+    """
+    results = await asyncio.gather(
+        *(engine.connect().start() for _ in range(connections)), return_exceptions=True
+    )
+    opened = [result for result in results if not isinstance(result, BaseException)]
+    for connection in opened:
+        await connection.close()
+    failures = [result for result in results if isinstance(result, BaseException)]
+    if failures:
+        raise failures[0]
+    return len(opened)
+
+
+async def warm_up_pools(engine: Engine, async_engine: AsyncEngine, connections: int) -> None:
+    """
+    Pre-open pooled connections of both engines at startup.
+
+    Failures are logged and do not stop the application: the pools then
+    open connections on demand as before.
+
+    Args:
+        engine: Sync engine.
+        async_engine: Async engine.
+        connections: Connections to open per engine, at most the pool size.
+    """
+    connections = min(connections, DB_POOL_SIZE)
+    if connections <= 0:
+        return
+    started = time.perf_counter()
+    try:
+        opened = await asyncio.to_thread(warm_up_sync, engine, connections)
+        opened_async = await warm_up_async(async_engine, connections)
+    except Exception as e:
+        logger.warning("Database pool warm-up failed: %s", str(e))
+        return
+    logger.info(
+        "Database pools warmed up: %d sync and %d async connections in %.2f s",
+        opened, opened_async, time.perf_counter() - started,
+    )
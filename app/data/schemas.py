@@ -1,4 +1,5 @@
-from typing import Optional
+from datetime import datetime
+from typing import Any, Optional
 
 from pydantic import BaseModel, EmailStr
 
@@ -30,3 +31,18 @@ class UserUpdate(BaseModel):
     name: Optional[str] = None
     surname: Optional[str] = None
 
+
+class ReferenceTrackResponse(BaseModel):
+    id: int
+    title: Optional[str] = None
+    created_at: Optional[datetime] = None
+    notes_count: int
+
+
+class CompareJobResponse(BaseModel):
+    id: str
+    status: str
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
@@ -1,56 +1,112 @@
+import io
 import logging
+import os
+import socket
+import threading
 import uuid
+from typing import Optional
+
+import certifi
+import urllib3
 from fastapi import HTTPException, UploadFile
 from minio import Minio
 from minio.error import S3Error
+from urllib3.connection import HTTPConnection
+from urllib3.util import Retry, Timeout
 
-from app.config import (MINIO_ACCESS_KEY, MINIO_BUCKET_NAME, MINIO_ENDPOINT, MINIO_SECRET_KEY, MAX_FILE_SIZE)
+from app.config import (MINIO_ACCESS_KEY, MINIO_BUCKET_NAME, MINIO_CONNECT_TIMEOUT, MINIO_ENDPOINT,
+                        MINIO_POOL_MAXSIZE, MINIO_READ_TIMEOUT, MINIO_RETRIES, MINIO_SECRET_KEY,
+                        MINIO_SECURE, MAX_FILE_SIZE)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize MinIO client
-try:
-    minio_client = Minio(
-        endpoint=MINIO_ENDPOINT,
-        access_key=MINIO_ACCESS_KEY,
-        secret_key=MINIO_SECRET_KEY,
-        secure=False,  # Enable HTTPS by default
+# MinIO client, created on first use so that importing the app needs no MinIO
+minio_client: Optional[Minio] = None
+_minio_client_lock = threading.Lock()
+
+
+def build_http_client() -> urllib3.PoolManager:
+    """
+    Build the connection pool shared by all MinIO requests.
+
+    Connections are kept alive between requests (with TCP keep-alive so
+    idle ones are not silently dropped by the network), at most
+    MINIO_POOL_MAXSIZE per host are kept, and transient server errors are
+    retried with backoff.
+
+    Returns:
+        urllib3.PoolManager: HTTP client for ``Minio``.
+    """
+    return urllib3.PoolManager(
+        num_pools=4,
+        maxsize=MINIO_POOL_MAXSIZE,
+        timeout=Timeout(connect=MINIO_CONNECT_TIMEOUT, read=MINIO_READ_TIMEOUT),
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        retries=Retry(
+            total=MINIO_RETRIES,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504],
+        ),
+        socket_options=HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        ],
     )
-    logger.info("MinIO client initialized successfully for endpoint: %s", MINIO_ENDPOINT)
-except Exception as e:
-    logger.error("Failed to initialize MinIO client: %s", str(e))
-    raise RuntimeError(f"Failed to initialize MinIO client: {str(e)}")
-
-# Check and create bucket if it doesn't exist
-try:
-    if not minio_client.bucket_exists(MINIO_BUCKET_NAME):
-        minio_client.make_bucket(MINIO_BUCKET_NAME)
-        logger.info("Bucket created: %s", MINIO_BUCKET_NAME)
-    else:
-        logger.debug("Bucket already exists: %s", MINIO_BUCKET_NAME)
-except S3Error as e:
-    logger.error("Failed to check or create bucket %s: %s", MINIO_BUCKET_NAME, str(e))
-    raise RuntimeError(f"Failed to initialize MinIO bucket: {str(e)}")
 
 
 def get_minio_client() -> Minio:
     """
-    Retrieve the initialized MinIO client.
+    Retrieve the application-wide MinIO client.
+
+    The client and its connection pool are created, and the bucket is
+    checked, once per process on first use; routes receive the client as a
+    dependency instead of building their own.
 
     Returns:
         Minio: Configured MinIO client instance.
 
     Raises:
-        RuntimeError: If MinIO client is not initialized.
+        RuntimeError: If the client or the bucket cannot be initialized.
     """
-    logger.debug("Providing MinIO client instance")
-    if minio_client is None:
-        logger.error("MinIO client is not initialized")
-        raise RuntimeError("MinIO client is not initialized")
+    global minio_client
+    if minio_client is not None:
+        return minio_client
+
+    with _minio_client_lock:
+        if minio_client is None:
+            minio_client = _create_minio_client()
     return minio_client
 
 
+def _create_minio_client() -> Minio:
+    try:
+        client = Minio(
+            endpoint=MINIO_ENDPOINT,
+            access_key=MINIO_ACCESS_KEY,
+            secret_key=MINIO_SECRET_KEY,
+            secure=MINIO_SECURE,
+            http_client=build_http_client(),
+        )
+        logger.info("MinIO client initialized successfully for endpoint: %s", MINIO_ENDPOINT)
+    except Exception as e:
+        logger.error("Failed to initialize MinIO client: %s", str(e))
+        raise RuntimeError(f"Failed to initialize MinIO client: {str(e)}")
+
+    # Check and create bucket if it doesn't exist
+    try:
+        if not client.bucket_exists(MINIO_BUCKET_NAME):
+            client.make_bucket(MINIO_BUCKET_NAME)
+            logger.info("Bucket created: %s", MINIO_BUCKET_NAME)
+        else:
+            logger.debug("Bucket already exists: %s", MINIO_BUCKET_NAME)
+    except S3Error as e:
+        logger.error("Failed to check or create bucket %s: %s", MINIO_BUCKET_NAME, str(e))
+        raise RuntimeError(f"Failed to initialize MinIO bucket: {str(e)}")
+
+    return client
+
+
 def save_file(file: UploadFile) -> str:
     """
     Save an uploaded file to MinIO and return its object name.
@@ -85,7 +141,7 @@ def save_file(file: UploadFile) -> str:
             file.file.seek(0, 2)
             file_size = file.file.tell()
             file.file.seek(0)
-            minio_client.put_object(
+            get_minio_client().put_object(
                 bucket_name=MINIO_BUCKET_NAME,
                 object_name=object_name,
                 data=f,
@@ -119,7 +175,7 @@ def get_file_url(filename: str, expires: int = 3600) -> str:
     """
     logger.debug("Generating presigned URL for file: %s", filename)
     try:
-        url = minio_client.presigned_get_object(
+        url = get_minio_client().presigned_get_object(
             bucket_name=MINIO_BUCKET_NAME,
             object_name=filename,
             expires=expires
@@ -131,4 +187,65 @@ def get_file_url(filename: str, expires: int = 3600) -> str:
         raise HTTPException(status_code=500, detail=f"Failed to generate file URL: {str(e)}")
     except Exception as e:
         logger.error("Unexpected error while generating URL for %s: %s", filename, str(e))
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def put_bytes(object_name: str, data: bytes, content_type: str = "application/octet-stream") -> str:
+    """
+    Store raw bytes in MinIO under the given object name.
+
+    Args:
+        object_name: Object name in the bucket.
+        data: Content to store.
+        content_type: MIME type of the content.
+
+    Returns:
+        str: Object name of the stored content.
+
+    Raises:
+        S3Error: If the upload fails.
+    """
+    get_minio_client().put_object(
+        bucket_name=MINIO_BUCKET_NAME,
+        object_name=object_name,
+        data=io.BytesIO(data),
+        length=len(data),
+        content_type=content_type,
+    )
+    logger.debug("Stored %d bytes as %s", len(data), object_name)
+    return object_name
+
+
+def get_bytes(object_name: str) -> bytes:
+    """
+    Read an object from MinIO into memory.
+
+    Args:
+        object_name: Object name in the bucket.
+
+    Returns:
+        bytes: Object content.
+
+    Raises:
+        S3Error: If the object cannot be read.
+    """
+    response = get_minio_client().get_object(MINIO_BUCKET_NAME, object_name)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def remove_file(object_name: str) -> None:
+    """
+    Delete an object from MinIO, ignoring objects that do not exist.
+
+    Args:
+        object_name: Object name in the bucket.
+    """
+    try:
+        get_minio_client().remove_object(MINIO_BUCKET_NAME, object_name)
+        logger.debug("Removed object %s", object_name)
+    except S3Error as e:
+        logger.warning("Failed to remove object %s: %s", object_name, str(e))
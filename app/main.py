@@ -1,11 +1,24 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from starlette.middleware.cors import CORSMiddleware
 
+from app.api.body_limit import BodySizeLimitMiddleware
 from app.api.routes.auth_routes import auth_router
+from app.api.routes.compare_job_routes import compare_job_router
 from app.api.routes.compare_routes import compare_router
+from app.api.routes.reference_routes import reference_router
 from app.api.routes.user_routes import avatar_user_router, current_user_router
 from app.api.routes.legacy_router import router as legacy_router
+from app.config import (DB_POOL_WARMUP, MAX_BATCH_BODY_SIZE,
+                        MAX_REQUEST_BODY_SIZE)
+from app.core.compare_jobs import get_job_backend
+from app.core.melody_engine import melody_engine
+from app.core.password_hasher import password_hasher
+from app.data.database import async_engine, engine
+from app.data.pool import warm_up_pools
 
 
 import logging
@@ -15,16 +28,47 @@ logging.basicConfig(
         format="%(asctime)s | %(levelname)s | %(name)s | %(filename)s:%(lineno)d | %(message)s",
     )
 
-app = FastAPI(root_path="/api")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open database connections before the first requests arrive
+    await warm_up_pools(engine, async_engine, DB_POOL_WARMUP)
+    melody_engine.start()
+    job_backend = get_job_backend()
+    await job_backend.start()
+    yield
+    await job_backend.shutdown()
+    melody_engine.shutdown()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+    engine.dispose()
+
+
+app = FastAPI(root_path="/api", lifespan=lifespan)
 #app.include_router(auth_router) # TODO: добработкть эти контроллеры
 #app.include_router(current_user_router)
 #app.include_router(avatar_user_router)
 
 app.include_router(compare_router)
+app.include_router(compare_job_router)
+app.include_router(reference_router)
 app.include_router(legacy_router)
 app.include_router(avatar_user_router)
 app.include_router(current_user_router)
 
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    """Expose Prometheus metrics, including melody pipeline stage timings."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+# Oversized uploads are cut off while they arrive, before they are spooled
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=MAX_REQUEST_BODY_SIZE,
+    path_limits={"/compare_melodies/batch": MAX_BATCH_BODY_SIZE},
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
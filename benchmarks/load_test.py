@@ -0,0 +1,295 @@
+"""Load test of the API: latency percentiles and throughput per endpoint.
+
+Virtual users register, log in and then repeatedly pick weighted tasks
+(read the profile, upload an avatar, compare melodies, log in again) with
+a think time between them, in the style of a locust scenario. By default
+the application runs in-process on a SQLite database with an in-memory
+object store standing in for MinIO, so no Postgres or MinIO is needed:
+
+    python -m benchmarks.load_test --users 20 --duration 60
+
+or against a deployed server (its database and MinIO are used as is):
+
+    python -m benchmarks.load_test --url http://localhost:8000 --users 20
+
+The report lists requests, errors, requests per second and p50/p95/p99
+latency of every endpoint. In-process runs share the event loop between
+the clients and the app, so they size a single app process, not the
+network in front of it.
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+# Task name -> weight of the task in the mix of a virtual user
+TASK_WEIGHTS = {"me": 10, "compare": 3, "avatar": 1, "login": 1}
+PASSWORD = "load-test-password"
+
+
+class ObjectResponse(io.BytesIO):
+    """Object body with the ``release_conn`` of a urllib3 response."""
+
+    def release_conn(self) -> None:
+        pass
+
+
+class MemoryObjectStore:
+    """In-memory stand-in for the subset of the ``Minio`` client the app uses."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self.buckets: Dict[str, Dict[str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def bucket_exists(self, bucket_name: str) -> bool:
+        return bucket_name in self.buckets
+
+    def make_bucket(self, bucket_name: str) -> None:
+        with self._lock:
+            self.buckets.setdefault(bucket_name, {})
+
+    def put_object(self, bucket_name: str, object_name: str, data: Any, length: int,
+                   content_type: str = "application/octet-stream", **kwargs: Any) -> None:
+        content = data.read(length) if length >= 0 else data.read()
+        with self._lock:
+            self.buckets.setdefault(bucket_name, {})[object_name] = content
+
+    def get_object(self, bucket_name: str, object_name: str) -> ObjectResponse:
+        return ObjectResponse(self.buckets[bucket_name][object_name])
+
+    def remove_object(self, bucket_name: str, object_name: str) -> None:
+        with self._lock:
+            self.buckets.get(bucket_name, {}).pop(object_name, None)
+
+    def presigned_get_object(self, bucket_name: str, object_name: str, **kwargs: Any) -> str:
+        return f"memory://{bucket_name}/{object_name}"
+
+
+class EndpointStats:
+    """Latencies and failures of one endpoint."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.errors = 0
+
+    def record(self, latency: float, status: Optional[int]) -> None:
+        self.latencies.append(latency)
+        self.statuses[status or "exception"] += 1
+        if status is None or status >= 400:
+            self.errors += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        latencies = np.array(self.latencies) * 1000
+        p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) if len(latencies) else (0, 0, 0)
+        return {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "rps": len(self.latencies) / elapsed,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(latencies.max()) if len(latencies) else 0.0,
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+        }
+
+
+class VirtualUser:
+    """One simulated client with its own account and access token."""
+
+    def __init__(self, client: httpx.AsyncClient, prefix: str, stats: Dict[str, EndpointStats],
+                 audio: List[Tuple[bytes, bytes]], avatar: bytes):
+        self.client = client
+        self.prefix = prefix
+        self.stats = stats
+        self.audio = audio
+        self.avatar = avatar
+        self.email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+        self.token: Optional[str] = None
+
+    async def request(self, name: str, method: str, path: str, **kwargs: Any) -> Optional[httpx.Response]:
+        if self.token:
+            kwargs.setdefault("headers", {})["Authorization"] = f"Bearer {self.token}"
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, self.prefix + path, **kwargs)
+        except httpx.HTTPError as e:
+            logging.debug("%s failed: %s", name, str(e))
+            self.stats.setdefault(name, EndpointStats()).record(time.perf_counter() - started, None)
+            return None
+        self.stats.setdefault(name, EndpointStats()).record(
+            time.perf_counter() - started, response.status_code
+        )
+        return response
+
+    async def register(self) -> None:
+        response = await self.request(
+            "register", "POST", "/api/v1/auth/registration",
+            json={"role_name": "student", "email": self.email, "password": PASSWORD},
+        )
+        if response is not None and response.status_code == 200:
+            self.token = response.json()["access_token"]
+
+    async def login(self) -> None:
+        response = await self.request(
+            "login", "POST", "/api/v1/auth/login",
+            data={"email": self.email, "password": PASSWORD},
+        )
+        if response is not None and response.status_code == 200:
+            self.token = response.json()["access_token"]
+
+    async def me(self) -> None:
+        await self.request("me", "GET", "/v2/users/me/")
+
+    async def avatar_upload(self) -> None:
+        await self.request(
+            "avatar", "PUT", "/v2/users/avatar/",
+            files={"file": ("avatar.png", self.avatar, "image/png")},
+        )
+
+    async def compare(self) -> None:
+        teacher, student = random.choice(self.audio)
+        await self.request(
+            "compare", "POST", "/api/api/v1/compare_melodies",
+            files={
+                "file1": ("teacher.wav", teacher, "audio/wav"),
+                "file2": ("student.wav", student, "audio/wav"),
+            },
+        )
+
+    async def run(self, deadline: float, think: float) -> None:
+        tasks: Dict[str, Callable[[], Any]] = {
+            "me": self.me, "compare": self.compare, "avatar": self.avatar_upload, "login": self.login,
+        }
+        names = list(TASK_WEIGHTS)
+        weights = [TASK_WEIGHTS[name] for name in names]
+        await self.register()
+        while time.monotonic() < deadline:
+            if self.token is None:
+                await self.login()
+            else:
+                await tasks[random.choices(names, weights)[0]]()
+            await asyncio.sleep(random.uniform(0, 2 * think))
+
+
+@asynccontextmanager
+async def in_process_client(result_cache: bool) -> AsyncIterator[httpx.AsyncClient]:
+    """Run ``app.main:app`` in this process on SQLite and an in-memory object store."""
+    database = tempfile.NamedTemporaryFile(suffix=".sqlite3", delete=False)
+    database.close()
+    # Configuration is read on import, so the environment is set first
+    os.environ["DATABASE_URL"] = f"sqlite:///{database.name}"
+
+    from app.core.result_cache import ResultCache, get_result_cache
+    from app.data import models, storage  # noqa: F401 - registers the tables
+    from app.data.database import Base, async_engine, engine
+    from app.main import app
+
+    Base.metadata.create_all(engine)
+    store = MemoryObjectStore()
+    # Routes and background jobs share the client of get_minio_client
+    storage.minio_client = store
+    if not result_cache:
+        # Repeated pairs would otherwise measure cache hits, not comparisons
+        app.dependency_overrides[get_result_cache] = lambda: ResultCache(0)
+
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load-test",
+                                         timeout=None) as client:
+                yield client
+    finally:
+        await async_engine.dispose()
+        engine.dispose()
+        os.unlink(database.name)
+
+
+def make_audio(takes: int, seconds: float) -> List[Tuple[bytes, bytes]]:
+    """Teacher/student WAV pairs of the given length."""
+    # Imports app.config, so in-process runs call this after configuring the app
+    from benchmarks.pipeline import encode, synthesize
+
+    sr = 22050
+    pairs = []
+    for seed in range(takes):
+        teacher, student = synthesize(seconds, sr, seed)
+        pairs.append((encode(teacher, sr, "WAV"), encode(student, sr, "WAV")))
+    return pairs
+
+
+async def run_load(args: argparse.Namespace) -> Tuple[Dict[str, EndpointStats], float]:
+    avatar = os.urandom(args.avatar_kb * 1024)
+    stats: Dict[str, EndpointStats] = {}
+
+    if args.url:
+        client_context = httpx.AsyncClient(base_url=args.url, timeout=None)
+    else:
+        client_context = in_process_client(args.result_cache)
+
+    async with client_context as client:
+        audio = make_audio(args.takes, args.audio_seconds)
+        started = time.monotonic()
+        deadline = started + args.duration
+        users = []
+        for index in range(args.users):
+            user = VirtualUser(client, args.prefix, stats, audio, avatar)
+            users.append(asyncio.ensure_future(user.run(deadline, args.think)))
+            if args.spawn_rate and index + 1 < args.users:
+                await asyncio.sleep(1 / args.spawn_rate)
+        await asyncio.gather(*users)
+        elapsed = time.monotonic() - started
+    return stats, elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running server; in-process app if omitted")
+    parser.add_argument("--prefix", default="/api", help="root path of the API")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--spawn-rate", type=float, default=5.0, help="users started per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--think", type=float, default=0.5, help="mean pause between tasks, s")
+    parser.add_argument("--audio-seconds", type=float, default=10.0)
+    parser.add_argument("--takes", type=int, default=4, help="distinct recording pairs")
+    parser.add_argument("--avatar-kb", type=int, default=64)
+    parser.add_argument("--result-cache", action="store_true",
+                        help="keep the comparison result cache (in-process only)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    random.seed(args.seed)
+
+    stats, elapsed = asyncio.run(run_load(args))
+
+    report = {name: endpoint.summary(elapsed) for name, endpoint in sorted(stats.items())}
+    print(f"{args.users} users, {elapsed:.1f} s")
+    print(f"{'endpoint':<10} {'requests':>8} {'errors':>7} {'rps':>7} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, row in report.items():
+        print(f"{name:<10} {row['requests']:8d} {row['errors']:7d} {row['rps']:7.2f} "
+              f"{row['p50_ms']:8.1f} {row['p95_ms']:8.1f} {row['p99_ms']:8.1f} {row['max_ms']:8.1f}")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"users": args.users, "elapsed": elapsed, "endpoints": report}, file, indent=2)
+            file.write("\n")
+    return 1 if any(row["errors"] for row in report.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Logins per second per core for password hashing settings.
+
+A login costs one password verification, so for every setting the script
+times ``verify`` on a single thread (one core) and reports logins per
+second, then runs the same work on --threads threads to show how it scales
+(bcrypt and argon2 release the GIL). With --target, the number of cores a
+setting needs for that many logins per minute is listed as well:
+
+    python -m benchmarks.password_hashing --target 3000
+
+Settings are given as scheme:cost, with the bcrypt cost factor or the
+argon2 time cost and memory in KiB:
+
+    python -m benchmarks.password_hashing bcrypt:10 bcrypt:12 argon2:2:19456
+
+Results depend on the CPU, so run it on the machine type of the deployment.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from app.core.password_hasher import build_context
+
+SETTINGS = ("bcrypt:10", "bcrypt:11", "bcrypt:12", "bcrypt:13", "argon2:1:19456",
+            "argon2:2:19456", "argon2:3:65536")
+PASSWORD = "correct horse battery staple"
+
+
+def context_for(setting: str):
+    """CryptContext issuing hashes of a scheme:cost setting."""
+    scheme, *costs = setting.split(":")
+    if scheme == "bcrypt":
+        return build_context("bcrypt", bcrypt_rounds=int(costs[0]))
+    if scheme == "argon2":
+        time_cost, memory_cost = (int(cost) for cost in costs)
+        return build_context("argon2", argon2_time_cost=time_cost, argon2_memory_cost=memory_cost)
+    raise ValueError(f"Unsupported setting: {setting}")
+
+
+def logins_per_second(context, hashed: str, seconds: float, threads: int) -> float:
+    """Verifications per second on ``threads`` threads over about ``seconds``."""
+    deadline = time.perf_counter() + seconds
+
+    def worker() -> int:
+        count = 0
+        while time.perf_counter() < deadline:
+            context.verify(PASSWORD, hashed)
+            count += 1
+        return count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(lambda _: worker(), range(threads)))
+    return total / (time.perf_counter() - started)
+
+
+def measure(setting: str, seconds: float, threads: int) -> Dict[str, Any]:
+    context = context_for(setting)
+    started = time.perf_counter()
+    hashed = context.hash(PASSWORD)
+    hash_seconds = time.perf_counter() - started
+    # The first verification loads the backend
+    context.verify(PASSWORD, hashed)
+    single = logins_per_second(context, hashed, seconds, 1)
+    return {
+        "hash_ms": hash_seconds * 1000,
+        "verify_ms": 1000 / single,
+        "logins_per_core": single,
+        "logins_threads": logins_per_second(context, hashed, seconds, threads) if threads > 1 else single,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("settings", nargs="*", default=list(SETTINGS),
+                        help="scheme:cost settings, e.g. bcrypt:12 or argon2:2:19456")
+    parser.add_argument("--seconds", type=float, default=3.0, help="measuring time per run")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1,
+                        help="threads of the scaling run")
+    parser.add_argument("--target", type=float, help="logins per minute to size for")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {}
+    threads = f"logins/s x{args.threads}"
+    header = f"{'setting':<16} {'hash ms':>8} {'verify ms':>9} {'logins/s/core':>13} {threads:>14}"
+    if args.target:
+        header += f" {'cores':>6}"
+    print(header)
+    for setting in args.settings:
+        row = measure(setting, args.seconds, args.threads)
+        line = (f"{setting:<16} {row['hash_ms']:8.1f} {row['verify_ms']:9.1f} "
+                f"{row['logins_per_core']:13.1f} {row['logins_threads']:14.1f}")
+        if args.target:
+            row["cores_for_target"] = math.ceil(args.target / 60 / row["logins_per_core"])
+            line += f" {row['cores_for_target']:6d}"
+        results[setting] = row
+        print(line)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"threads": args.threads, "target_per_minute": args.target,
+                       "settings": results}, file, indent=2)
+            file.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
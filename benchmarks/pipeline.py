@@ -0,0 +1,282 @@
+"""Stage timings, throughput and peak memory of compare_melodies.
+
+Synthetic teacher/student melodies are rendered for a grid of durations,
+sample rates and container formats (or read from recorded fixtures), and
+every case runs in a fresh worker process so that its peak RSS is not
+inflated by earlier cases. For each case the report lists the best wall
+time of every pipeline stage over --repeat runs, the end-to-end time, the
+throughput in seconds of audio analyzed per second, and the peak RSS.
+
+Run from the repository root:
+
+    python -m benchmarks.pipeline --save benchmarks/baselines/pipeline.json
+
+Check the current tree against a stored baseline before deploying (exit
+status 1 if a case got slower or bigger than --tolerance allows):
+
+    python -m benchmarks.pipeline --compare benchmarks/baselines/pipeline.json
+
+Recorded fixtures are given as teacher:student pairs:
+
+    python -m benchmarks.pipeline teacher.mp3:student.mp3 ...
+
+Baselines only compare meaningfully on the machine that recorded them.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from benchmarks.resample_drift import NOTES, fixture_corpus
+
+DURATIONS = (10, 60, 600)
+SAMPLE_RATES = (22050, 44100, 48000)
+FORMATS = {"WAV": "PCM_16", "FLAC": "PCM_16", "OGG": "VORBIS", "MP3": "MPEG_LAYER_III"}
+
+# Every axis is swept around this case instead of running the full product
+BASE_CASE = (60, 44100, "WAV")
+
+# Samples per write when encoding the synthetic recordings
+ENCODE_BLOCK = 65536
+
+# Stages shorter than this are too noisy to flag as regressions
+MIN_STAGE_SECONDS = 0.005
+
+
+def synthesize(seconds: float, sr: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Teacher melody of the given length and a student rendition with errors."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sr * seconds)) / sr
+    teacher_notes = np.cumsum(rng.uniform(0.25, 0.8, int(seconds / 0.25) + 1))
+    teacher_notes = teacher_notes[teacher_notes < seconds]
+    tones = rng.choice(NOTES, len(teacher_notes))
+
+    def render(onsets: np.ndarray, frequencies: np.ndarray, gain: float) -> np.ndarray:
+        frequency = np.asarray(frequencies)[np.searchsorted(onsets, t, side="right") - 1]
+        phase = 2 * np.pi * np.cumsum(frequency) / sr
+        audio = sum(np.sin(k * phase) / k for k in (1, 2, 3))
+        # Short gaps between notes so that onsets are audible
+        gaps = (t - onsets[np.searchsorted(onsets, t, side="right") - 1]) < 0.02
+        audio[gaps] = 0.0
+        return (gain * 0.3 * audio).astype(np.float32)
+
+    onsets = np.concatenate([[0.0], teacher_notes])
+    teacher = render(onsets, np.concatenate([[tones[0]], tones]), 1.0)
+    student_tones = np.concatenate([[tones[0]], tones])
+    wrong = rng.random(len(student_tones)) < 0.1
+    student_tones[wrong] = rng.choice(NOTES, int(wrong.sum()))
+    jitter = np.concatenate([[0.0], teacher_notes + rng.normal(0, 0.03, len(teacher_notes))])
+    student = render(np.maximum.accumulate(jitter), student_tones, float(rng.uniform(0.5, 1.0)))
+    return teacher, student
+
+
+def encode(audio: np.ndarray, sr: int, container: str) -> bytes:
+    """Encode mono audio into a container supported by libsndfile."""
+    buffer = io.BytesIO()
+    with sf.SoundFile(buffer, "w", sr, 1, format=container, subtype=FORMATS[container]) as file:
+        # libsndfile's Vorbis encoder crashes on very large single writes
+        for start in range(0, len(audio), ENCODE_BLOCK):
+            file.write(audio[start:start + ENCODE_BLOCK])
+    return buffer.getvalue()
+
+
+def synthetic_cases(
+    durations: List[float], rates: List[int], formats: List[str], full_grid: bool, seed: int
+) -> Iterator[Tuple[str, float, bytes, bytes]]:
+    """Name, audio length and encoded pair of every synthetic case."""
+    if full_grid:
+        grid = [(d, r, f) for d in durations for r in rates for f in formats]
+    else:
+        duration, rate, container = (
+            base if base in values else values[0]
+            for base, values in zip(BASE_CASE, (durations, rates, formats))
+        )
+        grid = [(d, rate, container) for d in durations]
+        grid += [(duration, r, container) for r in rates]
+        grid += [(duration, rate, f) for f in formats]
+    for case in dict.fromkeys(grid):
+        seconds, sr, container = case
+        teacher, student = synthesize(seconds, sr, seed)
+        yield (
+            f"{seconds:g}s-{sr}Hz-{container}",
+            2 * seconds,
+            encode(teacher, sr, container),
+            encode(student, sr, container),
+        )
+
+
+def fixture_cases(pairs: List[str]) -> Iterator[Tuple[str, Optional[float], bytes, bytes]]:
+    """Recorded teacher:student pairs; audio length is unknown if libsndfile cannot read them."""
+    for name, teacher, student in fixture_corpus(pairs):
+        try:
+            seconds = sum(sf.info(io.BytesIO(data)).duration for data in (teacher, student))
+        except RuntimeError:
+            seconds = None
+        yield name, seconds, teacher, student
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process."""
+    # On Linux ru_maxrss survives exec and reports the spawning parent's peak
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def measure(teacher: bytes, student: bytes, repeat: int, streaming: bool) -> Dict[str, Any]:
+    """Run compare_melodies ``repeat`` times in this process and summarize the stages."""
+    logging.disable(logging.WARNING)
+    from app.core import compare_melodies as melodies
+    from app.core.feature_cache import FeatureCache
+
+    melodies.AudioConfig.STREAMING = streaming
+    # Every run must analyze both recordings from scratch
+    melodies.feature_cache = FeatureCache(max_bytes=0)
+
+    # Warm up: the first librosa calls load and compile much of the stack
+    warmup_sr = 22050
+    warmup = encode(synthesize(2, warmup_sr, 1)[0], warmup_sr, "WAV")
+    melodies.compare_melodies(warmup, warmup)
+    base_rss = peak_rss_mb()
+
+    totals, stages = [], {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result, timings = melodies.collect_timings(melodies.compare_melodies, teacher, student)
+        totals.append(time.perf_counter() - started)
+        if result is None:
+            raise RuntimeError("compare_melodies returned None")
+        run: Dict[str, float] = {}
+        for timing in timings:
+            run[timing["stage"]] = run.get(timing["stage"], 0.0) + timing["wall"]
+        for name, wall in run.items():
+            stages.setdefault(name, []).append(wall)
+
+    return {
+        "total": min(totals),
+        "stages": {name: min(walls) for name, walls in stages.items()},
+        "rss_base_mb": base_rss,
+        "rss_peak_mb": peak_rss_mb(),
+    }
+
+
+def run_case(teacher: bytes, student: bytes, repeat: int, streaming: bool) -> Dict[str, Any]:
+    """Measure one case in a fresh process."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(measure, teacher, student, repeat, streaming).result()
+
+
+def environment() -> Dict[str, Any]:
+    import librosa
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "librosa": librosa.__version__,
+        "libsndfile": sf.__libsndfile_version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def regressions(
+    current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Describe every case, stage or peak RSS that exceeds the baseline by more than ``tolerance``."""
+    found = []
+    limit = 1.0 + tolerance
+    for name, case in current["cases"].items():
+        reference = baseline["cases"].get(name)
+        if reference is None:
+            continue
+        checks = [("total", case["total"], reference["total"])]
+        checks += [
+            (stage, wall, reference["stages"][stage])
+            for stage, wall in case["stages"].items()
+            if reference["stages"].get(stage, 0.0) >= MIN_STAGE_SECONDS
+        ]
+        for stage, value, expected in checks:
+            if value > expected * limit:
+                found.append(f"{name}: {stage} {value * 1000:.1f} ms vs {expected * 1000:.1f} ms")
+        if case["rss_peak_mb"] > reference["rss_peak_mb"] * limit:
+            found.append(f"{name}: peak RSS {case['rss_peak_mb']:.0f} MB "
+                         f"vs {reference['rss_peak_mb']:.0f} MB")
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pairs", nargs="*", help="teacher:student audio file pairs")
+    parser.add_argument("--durations", type=float, nargs="+", default=list(DURATIONS),
+                        help="melody lengths in seconds")
+    parser.add_argument("--rates", type=int, nargs="+", default=list(SAMPLE_RATES))
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=list(FORMATS))
+    parser.add_argument("--full-grid", action="store_true",
+                        help="run every duration/rate/format combination")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--streaming", action="store_true", help="use streaming decoding")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="PATH", help="write the results as baseline JSON")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON to check against")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="allowed slowdown or memory growth, as a fraction")
+    args = parser.parse_args()
+
+    cases = (
+        fixture_cases(args.pairs) if args.pairs
+        else synthetic_cases(args.durations, args.rates, args.formats, args.full_grid, args.seed)
+    )
+    results: Dict[str, Any] = {
+        "environment": environment(), "streaming": args.streaming, "cases": {}
+    }
+    print(f"{'case':<22} {'total':>9} {'audio/s':>8} {'peak RSS':>9}  stages (ms)")
+    for name, seconds, teacher, student in cases:
+        case = run_case(teacher, student, args.repeat, args.streaming)
+        case["audio_seconds"] = seconds
+        case["throughput"] = seconds / case["total"] if seconds else None
+        results["cases"][name] = case
+        stages = ", ".join(f"{stage} {wall * 1000:.0f}" for stage, wall in case["stages"].items())
+        throughput = f"{case['throughput']:7.1f}x" if seconds else f"{'-':>8}"
+        print(f"{name:<22} {case['total']:8.2f}s {throughput} "
+              f"{case['rss_peak_mb']:7.0f}MB  {stages}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"\nbaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline.get("streaming") != args.streaming:
+            print("\nbaseline was recorded with a different decoding mode")
+            return 1
+        found = regressions(results, baseline, args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        print(f"\n{len(found)} regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
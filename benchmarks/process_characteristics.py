@@ -0,0 +1,64 @@
+"""Micro-benchmark of process_characteristics on a 5-minute recording.
+
+Run from the repository root:
+
+    python -m benchmarks.process_characteristics
+"""
+import argparse
+import logging
+import timeit
+
+import numpy as np
+
+from app.core.compare_melodies import (AudioConfig, process_characteristics,
+                                       process_characteristics_batch)
+
+# Frames per second of the mel spectrogram (librosa default hop of 512 samples)
+FRAME_RATE = 22050 / 512
+
+
+def process_characteristics_legacy(x, time):
+    """Previous implementation that re-slices the remaining list per window."""
+    y = []
+    count_of_values = round(round(time, 2) * AudioConfig.TIME_FACTOR)
+    while len(x) >= count_of_values:
+        c = sum(x[:count_of_values]) / count_of_values
+        y.append(1 if c > 0.5 else 0)
+        x = x[count_of_values:]
+    if x:
+        c = sum(x) / len(x)
+        y.append(1 if c > 0.5 else 0)
+    return y
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=5.0)
+    parser.add_argument("--time", type=float, default=2.0, help="time_c passed by compare()")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    frames = int(args.minutes * 60 * FRAME_RATE)
+    rng = np.random.default_rng(0)
+    arrays = [(rng.random(frames) < p).astype(np.int64) for p in (0.2, 0.4, 0.6)]
+    lists = [x.tolist() for x in arrays]
+
+    legacy = [process_characteristics_legacy(x, args.time) for x in lists]
+    assert process_characteristics_batch(arrays, args.time) == legacy
+
+    cases = {
+        "legacy, 3 calls": lambda: [process_characteristics_legacy(x, args.time) for x in lists],
+        "vectorized, 3 calls": lambda: [process_characteristics(x, args.time) for x in arrays],
+        "vectorized, batched": lambda: process_characteristics_batch(arrays, args.time),
+    }
+    print(f"{frames} frames per strip ({args.minutes:g} min), time_c={args.time:g}")
+    baseline = None
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print(f"{name:<22} {best * 1000:9.2f} ms  x{baseline / best:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
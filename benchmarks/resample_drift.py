@@ -0,0 +1,145 @@
+"""Score drift of a fixed analysis sample rate against native-rate analysis.
+
+Every teacher/student pair is compared twice: at the native rate of the
+files (AUDIO_ANALYSIS_SR=0) and at the analysis rate given by --sr. The
+report lists the integral indicator of both runs, the share of rhythm,
+height and volume windows that changed, and the extraction time.
+
+Run from the repository root on the built-in synthetic corpus:
+
+    python -m benchmarks.resample_drift --sr 22050
+
+or on recorded fixtures:
+
+    python -m benchmarks.resample_drift --sr 22050 teacher.wav:student.wav ...
+"""
+import argparse
+import io
+import logging
+import sys
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from app.core import compare_melodies as melodies
+from app.core.compare_melodies import AudioConfig
+from app.core.feature_cache import FeatureCache
+
+# Tones of the synthetic melodies, Hz (trumpet range)
+NOTES = (233.1, 261.6, 293.7, 311.1, 349.2, 392.0, 440.0, 466.2, 523.3)
+SAMPLE_RATES = (16000, 22050, 44100, 48000, 96000)
+
+
+def render(notes: List[Tuple[float, float]], sr: int, channels: int, gain: float) -> bytes:
+    """Render (frequency, seconds) notes with harmonics to WAV bytes."""
+    parts = [np.zeros(int(sr * 0.3))]
+    for frequency, seconds in notes:
+        t = np.arange(int(sr * seconds)) / sr
+        envelope = np.minimum(1.0, np.minimum(t, seconds - t) / 0.02)
+        tone = sum(np.sin(2 * np.pi * frequency * k * t) / k for k in (1, 2, 3))
+        parts.append(gain * 0.4 * envelope * tone)
+    parts.append(np.zeros(int(sr * 0.3)))
+    audio = np.concatenate(parts)
+    if channels > 1:
+        audio = np.stack([audio] * channels, axis=1)
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sr, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def synthetic_corpus(seed: int) -> Iterator[Tuple[str, bytes, bytes]]:
+    """Teacher melodies and student renditions with timing, pitch and gain errors."""
+    rng = np.random.default_rng(seed)
+    for sr in SAMPLE_RATES:
+        for channels in (1, 2):
+            teacher = [
+                (float(rng.choice(NOTES)), float(rng.uniform(0.3, 0.8)))
+                for _ in range(int(rng.integers(6, 14)))
+            ]
+            student = [(f, s * rng.uniform(0.8, 1.25)) for f, s in teacher]
+            wrong = int(rng.integers(len(student)))
+            student[wrong] = (float(rng.choice(NOTES)), student[wrong][1])
+            yield (
+                f"synthetic {sr} Hz x{channels}",
+                render(teacher, sr, channels, 1.0),
+                render(student, sr, channels, float(rng.uniform(0.5, 1.0))),
+            )
+
+
+def fixture_corpus(pairs: List[str]) -> Iterator[Tuple[str, bytes, bytes]]:
+    """Read ``teacher:student`` file pairs."""
+    for pair in pairs:
+        teacher, student = pair.split(":", 1)
+        with open(teacher, "rb") as t, open(student, "rb") as s:
+            yield pair, t.read(), s.read()
+
+
+def score(teacher: bytes, student: bytes, sr: int) -> Tuple[tuple, float]:
+    """Compare a pair at the given analysis rate without the feature cache."""
+    AudioConfig.ANALYSIS_SR = sr
+    melodies.feature_cache = FeatureCache(max_bytes=0)
+    started = time.perf_counter()
+    result = melodies.compare_melodies(teacher, student)
+    return result, time.perf_counter() - started
+
+
+def window_drift(native: List[int], resampled: List[int]) -> float:
+    """Share of characteristic windows that differ, counting length changes."""
+    length = max(len(native), len(resampled))
+    if not length:
+        return 0.0
+    same = sum(a == b for a, b in zip(native, resampled))
+    return 1.0 - same / length
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pairs", nargs="*", help="teacher:student audio file pairs")
+    parser.add_argument("--sr", type=int, default=22050, help="analysis sample rate")
+    parser.add_argument("--res-type", default=AudioConfig.RESAMPLE_TYPE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-drift", type=float, default=None,
+                        help="exit with status 1 if any |delta integral| exceeds this")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    AudioConfig.RESAMPLE_TYPE = args.res_type
+
+    corpus = list(fixture_corpus(args.pairs) if args.pairs else synthetic_corpus(args.seed))
+    if corpus:
+        # Warm up: the first librosa and soxr calls are much slower
+        score(corpus[0][1], corpus[0][2], 0)
+        score(corpus[0][1], corpus[0][2], args.sr)
+    print(f"{'fixture':<28} {'native':>7} {args.sr:>7} {'delta':>7} "
+          f"{'rhythm':>7} {'height':>7} {'volume':>7} {'speedup':>8}")
+    deltas: List[float] = []
+    totals: Dict[str, float] = {"native": 0.0, "resampled": 0.0}
+    for name, teacher, student in corpus:
+        native, native_time = score(teacher, student, 0)
+        resampled, resampled_time = score(teacher, student, args.sr)
+        totals["native"] += native_time
+        totals["resampled"] += resampled_time
+        if native is None or resampled is None:
+            print(f"{name:<28} comparison failed (native={native is not None}, "
+                  f"resampled={resampled is not None})")
+            continue
+        delta = resampled[0] - native[0]
+        deltas.append(abs(delta))
+        drift = [window_drift(n, r) for n, r in zip(native[1:4], resampled[1:4])]
+        print(f"{name:<28} {native[0]:7.2f} {resampled[0]:7.2f} {delta:+7.2f} "
+              f"{drift[0]:7.1%} {drift[1]:7.1%} {drift[2]:7.1%} "
+              f"x{native_time / resampled_time:7.2f}")
+
+    if not deltas:
+        print("no comparable fixtures")
+        return 1
+    print(f"\n|delta integral|: mean {np.mean(deltas):.3f}, max {max(deltas):.3f}; "
+          f"time native {totals['native']:.2f} s, {args.sr} Hz {totals['resampled']:.2f} s")
+    if args.max_drift is not None and max(deltas) > args.max_drift:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
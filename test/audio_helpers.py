@@ -0,0 +1,24 @@
+import io
+
+import numpy as np
+import soundfile as sf
+
+
+def make_recording(
+    frequencies, seconds: float = 0.6, sr: int = 22050, channels: int = 1, silence: float = 0.0
+) -> bytes:
+    """
+    WAV-запись из синусоид заданных частот, по ``seconds`` секунд на ноту.
+
+    ``silence`` секунд тишины добавляется в начало и в конец; второй канал
+    стерео-записи тише первого.
+    """
+    samples = np.arange(int(sr * seconds)) / sr
+    gap = np.zeros(int(sr * silence))
+    tones = [0.5 * np.sin(2 * np.pi * f * samples) for f in frequencies]
+    audio = np.concatenate([gap] + tones + [gap])
+    if channels > 1:
+        audio = np.stack([audio, 0.8 * audio], axis=1)
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sr, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
@@ -0,0 +1,98 @@
+import unittest
+from unittest import mock
+
+import librosa
+import numpy as np
+
+from app.core import compare_melodies as melodies
+from app.core.audio_stream import iter_frame_segments
+from app.core.compare_melodies import (AudioConfig, extract_bands_in_memory,
+                                       extract_bands_streaming)
+from app.core.feature_cache import FeatureCache
+
+from audio_helpers import make_recording
+
+
+TONES = (310, 360, 410, 460, 510)
+
+
+def recording(sr: int, channels: int) -> bytes:
+    return make_recording(TONES, seconds=0.4, sr=sr, channels=channels, silence=0.3)
+
+
+class TestFrameSegments(unittest.TestCase):
+
+    def test_segments_cover_all_frames_once(self):
+        rng = np.random.default_rng(7)
+        frame_length, hop_length = 2048, 512
+        for length in (1, 100, 2048, 5000, 30001):
+            signal = rng.standard_normal(length).astype(np.float32)
+            padded = np.pad(signal, frame_length // 2)
+            expected = librosa.util.frame(padded, frame_length=frame_length, hop_length=hop_length)
+            for blocksize in (300, 2048, 4096, 100000):
+                with self.subTest(length=length, blocksize=blocksize):
+                    blocks = (signal[i:i + blocksize] for i in range(0, length, blocksize))
+                    frames = [
+                        librosa.util.frame(s, frame_length=frame_length, hop_length=hop_length)
+                        for s in iter_frame_segments(blocks, frame_length, hop_length)
+                    ]
+                    np.testing.assert_array_equal(np.concatenate(frames, axis=1), expected)
+
+
+class TestStreamingExtraction(unittest.TestCase):
+
+    def test_bands_match_in_memory(self):
+        for sr, channels in ((22050, 1), (44100, 2), (16000, 1)):
+            data = recording(sr, channels)
+            expected, duration = extract_bands_in_memory(data)
+            for blocksize in (4096, 65536):
+                with self.subTest(sr=sr, channels=channels, blocksize=blocksize), \
+                        mock.patch.object(AudioConfig, "STREAM_BLOCK_SIZE", blocksize):
+                    bands, streamed_duration = extract_bands_streaming(data)
+                    self.assertEqual(bands.shape, expected.shape)
+                    self.assertEqual(streamed_duration, duration)
+                    # Отличия только в округлении float32
+                    np.testing.assert_allclose(bands, expected, rtol=0, atol=1e-4)
+
+    def test_melody_matches_in_memory(self):
+        data = recording(22050, 2)
+        with mock.patch.object(melodies, "feature_cache", FeatureCache(max_bytes=0)):
+            with mock.patch.object(AudioConfig, "STREAMING", False):
+                expected = melodies.extract_melody_from_audio(data)
+            with mock.patch.object(AudioConfig, "STREAMING", True), \
+                    mock.patch.object(AudioConfig, "STREAM_BLOCK_SIZE", 8192):
+                streamed = melodies.extract_melody_from_audio(data)
+        self.assertGreater(len(expected[0]), 0)
+        self.assertEqual(streamed, expected)
+
+    def test_resampled_bands_match_in_memory(self):
+        for sr, channels in ((16000, 1), (44100, 2), (96000, 1)):
+            data = recording(sr, channels)
+            with self.subTest(sr=sr, channels=channels), \
+                    mock.patch.object(AudioConfig, "ANALYSIS_SR", 22050), \
+                    mock.patch.object(AudioConfig, "STREAM_BLOCK_SIZE", 8192):
+                expected, duration = extract_bands_in_memory(data)
+                bands, streamed_duration = extract_bands_streaming(data)
+                np.testing.assert_allclose(bands, expected, rtol=0, atol=1e-4)
+                self.assertEqual(streamed_duration, duration)
+
+    def test_analysis_rate_fixes_frame_rate(self):
+        frames = []
+        for sr in (22050, 44100, 96000):
+            with mock.patch.object(AudioConfig, "ANALYSIS_SR", 22050):
+                bands, duration = extract_bands_in_memory(recording(sr, 1))
+            frames.append(bands.shape[1])
+            self.assertAlmostEqual(bands.shape[1] / duration, 22050 / 512, delta=1.0)
+        self.assertLessEqual(max(frames) - min(frames), 1)
+
+    def test_non_soxr_resampling_falls_back(self):
+        with mock.patch.object(AudioConfig, "ANALYSIS_SR", 22050), \
+                mock.patch.object(AudioConfig, "RESAMPLE_TYPE", "polyphase"):
+            self.assertEqual(extract_bands_streaming(recording(44100, 1)), (None, None))
+
+    def test_unreadable_format_falls_back(self):
+        self.assertEqual(extract_bands_streaming(b"not an audio file"), (None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
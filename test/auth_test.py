@@ -0,0 +1,222 @@
+import asyncio
+import unittest
+from datetime import timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from prometheus_client import REGISTRY
+from sqlalchemy import select
+
+from app.api.routes import legacy_router
+from app.api.routes.user_routes import avatar_user_router, current_user_router
+from app.core.auth import security
+from app.core.password_hasher import pwd_context
+from app.core.token_cache import token_cache
+from app.core.user_cache import user_cache
+from app.data.database import async_database_url, get_async_db
+from app.data.models import User
+from app.data.storage import get_minio_client
+
+from db_helpers import AsyncDatabase
+
+
+class ObjectStore:
+    """Хранилище объектов в памяти вместо клиента MinIO."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, bucket_name, object_name, data, length, **kwargs):
+        self.objects[f"/{bucket_name}/{object_name}"] = data.read(length)
+
+
+class TestAsyncDatabaseUrl(unittest.TestCase):
+
+    def test_drivers(self):
+        self.assertEqual(
+            async_database_url("postgresql://user:secret@db:5432/app"),
+            "postgresql+asyncpg://user:secret@db:5432/app",
+        )
+        self.assertEqual(async_database_url("sqlite:///app.db"), "sqlite+aiosqlite:///app.db")
+        self.assertEqual(async_database_url("mysql://user@db/app"), "mysql://user@db/app")
+
+
+class TestLegacyAuthRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.database = AsyncDatabase()
+        self.addCleanup(self.database.close)
+        app = FastAPI()
+        app.include_router(legacy_router.router)
+        app.include_router(current_user_router)
+        app.include_router(avatar_user_router)
+        app.dependency_overrides[get_async_db] = self.database.get_db
+        self.objects = ObjectStore()
+        app.dependency_overrides[get_minio_client] = lambda: self.objects
+        # Every test database starts its user IDs at 1
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.client = TestClient(app)
+
+    def register(self, email="student@example.com"):
+        return self.client.post(
+            "/api/v1/auth/registration",
+            json={"role_name": "student", "email": email, "password": "secret"},
+        )
+
+    def test_register_login_and_read_profile(self):
+        response = self.register()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.register().status_code, 400)
+
+        response = self.client.post(
+            "/api/v1/auth/login", data={"email": "student@example.com", "password": "secret"}
+        )
+        self.assertEqual(response.status_code, 200)
+        token = response.json()["access_token"]
+
+        response = self.client.get("/v2/users/me/", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["email"], "student@example.com")
+
+    def test_registration_hashes_once_and_never_verifies(self):
+        def count(operation):
+            return REGISTRY.get_sample_value(
+                "password_hash_seconds_count", {"operation": operation}
+            ) or 0.0
+
+        hashes, verifies = count("hash"), count("verify")
+        response = self.register()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((count("hash"), count("verify")), (hashes + 1, verifies))
+        payload = security._decode_token(response.json()["access_token"])
+        self.assertEqual(payload.sub, "1")
+        self.assertEqual(response.cookies["refresh_token"], response.json()["refresh_token"])
+
+    def test_cached_user_until_changed(self):
+        token = self.register().json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        hits = user_cache.hits
+        self.assertEqual(self.client.get("/v2/users/avatar/", headers=headers).json()["url"], "")
+        self.assertEqual(len(user_cache), 1)
+        self.client.get("/v2/users/me/", headers=headers)
+        self.assertEqual(user_cache.hits, hits + 1)
+
+        # Changing the user drops the cached copy
+        self.assertEqual(self.client.delete("/v2/users/avatar/", headers=headers).status_code, 200)
+        self.assertEqual(len(user_cache), 0)
+
+    def test_login_rehashes_outdated_password(self):
+        self.register()
+        old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret")
+        asyncio.run(self.set_password_hash(old_hash))
+
+        response = self.client.post(
+            "/api/v1/auth/login", data={"email": "student@example.com", "password": "secret"}
+        )
+        self.assertEqual(response.status_code, 200)
+        new_hash = asyncio.run(self.password_hash())
+        self.assertNotEqual(new_hash, old_hash)
+        self.assertFalse(pwd_context.needs_update(new_hash))
+        self.assertTrue(pwd_context.verify("secret", new_hash))
+
+    async def set_password_hash(self, hashed_password):
+        async with self.database.sessions() as db:
+            user = await db.scalar(select(User))
+            user.hashed_password = hashed_password
+            await db.commit()
+        await self.database.engine.dispose()
+
+    async def password_hash(self):
+        async with self.database.sessions() as db:
+            hashed_password = (await db.scalar(select(User))).hashed_password
+        await self.database.engine.dispose()
+        return hashed_password
+
+    def test_profile_update_verifies_token_once(self):
+        token = self.register().json()["access_token"]
+        misses = token_cache.misses
+        response = self.client.put(
+            "/api/v1/auth", json={"first_name": "Ivan"}, headers={"Authorization": f"Bearer {token}"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["first_name"], "Ivan")
+        self.assertEqual(token_cache.misses, misses + 1)
+
+        response = self.client.get("/v2/users/me/", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.json()["first_name"], "Ivan")
+        self.assertEqual(token_cache.misses, misses + 1)
+
+    def test_rejected_tokens(self):
+        self.register()
+        # Registration also set the access cookie
+        self.client.cookies.clear()
+        expired = security.create_access_token(uid="1", expiry=timedelta(seconds=-5))
+        refresh = security.create_refresh_token(uid="1")
+        for headers in ({}, {"Authorization": f"Bearer {expired}"},
+                        {"Authorization": f"Bearer {refresh}"},
+                        {"Authorization": "Bearer not-a-token"}):
+            self.assertEqual(self.client.get("/v2/users/me/", headers=headers).status_code, 401)
+
+    def test_avatar_upload_uses_shared_client(self):
+        token = self.register().json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        response = self.client.put(
+            "/v2/users/avatar/", files={"file": ("avatar.png", b"png", "image/png")}, headers=headers
+        )
+        self.assertEqual(response.status_code, 200)
+        url = response.json()["avatar_url"]
+        self.assertEqual(self.objects.objects, {url: b"png"})
+        self.assertEqual(self.client.get("/v2/users/avatar/", headers=headers).json()["url"], url)
+
+    def test_wrong_password(self):
+        self.register()
+        response = self.client.post(
+            "/api/v1/auth/login", data={"email": "student@example.com", "password": "wrong"}
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+class TestProfileUpdates(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.database = AsyncDatabase()
+        self.addCleanup(self.database.close)
+        self.addAsyncCleanup(self.database.engine.dispose)
+        hashed = CryptContext(schemes=["bcrypt"]).hash("secret")
+        async with self.database.sessions() as db:
+            db.add_all([
+                User(id=1, email="student@example.com", hashed_password=hashed),
+                User(id=2, email="teacher@example.com", hashed_password=hashed),
+            ])
+            await db.commit()
+
+    async def test_update_user(self):
+        async with self.database.sessions() as db:
+            user = await db.get(User, 1)
+            data = legacy_router.UpdateUser(first_name="Ivan", email="ivan@example.com")
+            await legacy_router.update_user(data, user, db)
+
+        async with self.database.sessions() as db:
+            user = await db.get(User, 1)
+            self.assertEqual((user.first_name, user.email), ("Ivan", "ivan@example.com"))
+            taken = legacy_router.UpdateUser(email="teacher@example.com")
+            with self.assertRaises(legacy_router.HTTPException) as error:
+                await legacy_router.update_user(taken, user, db)
+            self.assertEqual(error.exception.status_code, 400)
+
+    async def test_password_update(self):
+        async with self.database.sessions() as db:
+            user = await db.get(User, 1)
+            with self.assertRaises(legacy_router.HTTPException):
+                await legacy_router.password_update("wrong", "new-secret", user, db)
+            await legacy_router.password_update("secret", "new-secret", user, db)
+
+        async with self.database.sessions() as db:
+            user = await db.get(User, 1)
+            self.assertTrue(pwd_context.verify("new-secret", user.hashed_password))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.api.body_limit import BodySizeLimitMiddleware
+
+LIMIT = 1000
+
+
+def chunks(total: int, size: int = 100):
+    for _ in range(total // size):
+        yield b"x" * size
+
+
+class TestBodySizeLimit(unittest.TestCase):
+
+    def setUp(self):
+        self.received = []
+        app = FastAPI()
+
+        @app.post("/upload")
+        async def upload(file: UploadFile = File(...)):
+            self.received.append(file.filename)
+            return {"size": file.size}
+
+        @app.post("/many/batch")
+        async def batch(file: UploadFile = File(...)):
+            return {"size": file.size}
+
+        app.add_middleware(
+            BodySizeLimitMiddleware, max_body_size=LIMIT, path_limits={"/many/batch": 10 * LIMIT}
+        )
+        self.client = TestClient(app)
+
+    def test_small_upload_passes(self):
+        response = self.client.post("/upload", files={"file": ("a.wav", b"x" * 100)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"size": 100})
+
+    def test_declared_length_is_rejected_before_reading(self):
+        response = self.client.post("/upload", files={"file": ("a.wav", b"x" * 2 * LIMIT)})
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.received, [])
+
+    def test_streamed_body_is_cut_off(self):
+        # Без Content-Length: тело приходит частями (chunked)
+        response = self.client.post(
+            "/upload", content=chunks(5 * LIMIT),
+            headers={"Content-Type": "multipart/form-data; boundary=b"},
+        )
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.received, [])
+
+    def test_path_limit(self):
+        body = {"file": ("a.wav", b"x" * 2 * LIMIT)}
+        self.assertEqual(self.client.post("/many/batch", files=body).status_code, 200)
+        self.assertEqual(self.client.post("/many/batch/", files=body).status_code, 200)
+
+    def test_plain_starlette_app(self):
+        async def echo(request: Request):
+            return PlainTextResponse(str(len(await request.body())))
+
+        app = Starlette(routes=[Route("/echo", echo, methods=["POST"])])
+        client = TestClient(BodySizeLimitMiddleware(app, max_body_size=LIMIT))
+        self.assertEqual(client.post("/echo", content=chunks(LIMIT)).text, str(LIMIT))
+        self.assertEqual(client.post("/echo", content=chunks(2 * LIMIT)).status_code, 413)
+
+
+if __name__ == "__main__":
+    unittest.main()
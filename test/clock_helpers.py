@@ -0,0 +1,8 @@
+class FakeClock:
+    """Часы, которые тест переводит вручную."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
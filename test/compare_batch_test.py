@@ -0,0 +1,78 @@
+import json
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes.compare_routes import compare_router, stream_batch_results
+from app.core.auth import authenticate_request
+from app.core.compare_melodies import (analyze_reference, compare_melodies,
+                                       compare_with_reference)
+from app.core.melody_engine import MelodyEngine, get_melody_engine
+
+from audio_helpers import make_recording
+
+
+TEACHER = make_recording((310, 360, 410, 460, 510))
+STUDENTS = [
+    ("good.wav", make_recording((310, 360, 410, 460, 510))),
+    ("wrong.wav", make_recording((310, 460, 410, 360, 510))),
+    ("broken.wav", b"not an audio file"),
+    ("short.wav", make_recording((410, 460))),
+]
+
+
+class TestStreamBatchResults(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = MelodyEngine(workers=2, max_queue=0, job_timeout=30)
+        self.addCleanup(self.engine.shutdown)
+
+    async def test_one_line_per_student(self):
+        reference = analyze_reference(TEACHER)
+        lines = [line async for line in stream_batch_results(self.engine, reference, STUDENTS)]
+        self.assertTrue(all(line.endswith("\n") for line in lines))
+
+        records = sorted((json.loads(line) for line in lines), key=lambda r: r["index"])
+        self.assertEqual([r["filename"] for r in records], [name for name, _ in STUDENTS])
+        self.assertEqual(records[2]["status_code"], 500)
+        for record, (_, content) in zip(records, STUDENTS):
+            if "result" in record:
+                expected = json.loads(json.dumps(compare_with_reference(reference, content)))
+                self.assertEqual(record["result"], expected)
+        self.assertEqual(self.engine.pending, 0)
+
+
+class TestBatchRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = MelodyEngine(workers=2, max_queue=0, job_timeout=30)
+        self.addCleanup(self.engine.shutdown)
+        app = FastAPI()
+        app.include_router(compare_router)
+        app.dependency_overrides[get_melody_engine] = lambda: self.engine
+        app.dependency_overrides[authenticate_request] = lambda: None
+        self.client = TestClient(app)
+
+    def post(self, reference, students):
+        files = [("reference", ("teacher.wav", reference, "audio/wav"))]
+        files += [("students", (name, content, "audio/wav")) for name, content in students]
+        return self.client.post("/api/api/v1/compare_melodies/batch", files=files)
+
+    def test_streams_ndjson(self):
+        response = self.post(TEACHER, STUDENTS[:2])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        records = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(sorted(r["index"] for r in records), [0, 1])
+        good = next(r for r in records if r["index"] == 0)
+        expected = json.loads(json.dumps(compare_melodies(TEACHER, STUDENTS[0][1])))
+        self.assertEqual(good["result"], expected)
+
+    def test_unreadable_reference_is_rejected(self):
+        response = self.post(b"not an audio file", STUDENTS[:1])
+        self.assertEqual(response.status_code, 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes.compare_job_routes import compare_job_router
+from app.core.auth import authenticate_request, get_current_user
+from app.core.compare_jobs import (JOB_DONE, JOB_FAILED, JOB_QUEUED,
+                                   JobBackend, LocalJobBackend, get_job_backend)
+from app.core.compare_melodies import compare_melodies
+from app.core.melody_engine import MelodyEngine
+from app.core.result_cache import ResultCache
+from app.data.database import get_async_db
+from app.data.models import CompareJob, User
+
+from audio_helpers import make_recording
+from db_helpers import AsyncDatabase
+
+
+class MemoryStorage:
+    """Хранилище объектов в памяти с интерфейсом app.data.storage."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_bytes(self, object_name, data, content_type="application/octet-stream"):
+        self.objects[object_name] = data
+        return object_name
+
+    def get_bytes(self, object_name):
+        return self.objects[object_name]
+
+    def remove_file(self, object_name):
+        self.objects.pop(object_name, None)
+
+
+class ManualJobBackend(JobBackend):
+    """Бэкенд, который только запоминает задачи; тест запускает их сам."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.queued = []
+
+    def enqueue(self, job_id):
+        self.queued.append(job_id)
+
+
+class TestLocalJobBackend(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.database = AsyncDatabase()
+        self.addCleanup(self.database.close)
+        self.sessions = self.database.sync_sessions
+        with self.sessions() as db:
+            db.add(User(id=1, email="teacher@example.com"))
+            db.commit()
+
+        self.engine = MelodyEngine(workers=1, max_queue=4, job_timeout=30)
+        self.addCleanup(self.engine.shutdown)
+        self.storage = MemoryStorage()
+        self.backend = LocalJobBackend(
+            self.engine, self.storage, self.sessions, ResultCache(16), concurrency=1
+        )
+
+    async def submit(self, teacher, student):
+        async with self.database.sessions() as db:
+            job = await self.backend.submit(db, 1, teacher, student)
+            return job.id, job.status
+
+    def load(self, job_id):
+        with self.sessions() as db:
+            return db.get(CompareJob, job_id)
+
+    async def test_job_result_is_persisted(self):
+        teacher = make_recording((310, 360, 410, 460, 510))
+        student = make_recording((310, 460, 410, 360, 510))
+        job_id, status = await self.submit(teacher, student)
+        self.assertEqual(status, JOB_QUEUED)
+        self.assertEqual(len(self.storage.objects), 2)
+
+        await self.backend.wait()
+        job = self.load(job_id)
+        self.assertEqual(job.status, JOB_DONE)
+        self.assertIsNotNone(job.finished_at)
+        expected = json.loads(json.dumps(compare_melodies(teacher, student)))
+        self.assertEqual(job.result, expected)
+        self.assertEqual(self.storage.objects, {})
+
+    async def test_failed_comparison_is_recorded(self):
+        job_id, _ = await self.submit(b"not audio", b"not audio either")
+        await self.backend.wait()
+        job = self.load(job_id)
+        self.assertEqual(job.status, JOB_FAILED)
+        self.assertIsNone(job.result)
+        self.assertTrue(job.error)
+
+    async def test_unfinished_jobs_are_resumed(self):
+        teacher = make_recording((310, 410, 510))
+        with self.sessions() as db:
+            db.add(CompareJob(
+                id="interrupted", owner_id=1, status="running",
+                teacher_object=self.storage.put_bytes("jobs/interrupted/teacher", teacher),
+                student_object=self.storage.put_bytes("jobs/interrupted/student", teacher),
+            ))
+            db.commit()
+
+        await self.backend.start()
+        await self.backend.wait()
+        self.assertEqual(self.load("interrupted").status, JOB_DONE)
+
+    async def queue(self):
+        """Поставить задачу в очередь, не запуская ее."""
+        backend = ManualJobBackend(self.engine, self.storage, self.sessions, ResultCache(16))
+        async with self.database.sessions() as db:
+            return (await backend.submit(db, 1, b"teacher", b"student")).id
+
+    async def test_job_is_claimed_once(self):
+        job_id = await self.queue()
+        other = LocalJobBackend(self.engine, self.storage, self.sessions, ResultCache(16))
+        self.assertIsNotNone(self.backend._claim(job_id))
+        self.assertIsNone(other._claim(job_id))
+        # A job leased by a live worker is not resumed elsewhere
+        self.assertEqual(other.unfinished_jobs(), [])
+
+    async def test_expired_lease_is_taken_over(self):
+        job_id = await self.queue()
+        stale = self.backend._claim(job_id)
+        with self.sessions() as db:
+            db.get(CompareJob, job_id).lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+            db.commit()
+
+        other = LocalJobBackend(self.engine, self.storage, self.sessions, ResultCache(16))
+        self.assertEqual(other.unfinished_jobs(), [job_id])
+        fresh = other._claim(job_id)
+        self.assertIsNotNone(fresh)
+        self.assertTrue(other._finish(fresh, {"score": 1}, None))
+        # The worker that lost the lease cannot overwrite the result
+        self.assertFalse(self.backend._renew(stale))
+        self.assertFalse(self.backend._finish(stale, None, "Internal server error"))
+        self.assertEqual(self.load(job_id).status, JOB_DONE)
+
+    def test_backend_must_implement_enqueue(self):
+        with self.assertRaises(TypeError):
+            JobBackend(self.engine, self.storage, self.sessions)
+
+
+class TestCompareJobRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.database = AsyncDatabase()
+        self.addCleanup(self.database.close)
+        self.engine = MelodyEngine(workers=1, max_queue=0, job_timeout=30)
+        self.addCleanup(self.engine.shutdown)
+        self.storage = MemoryStorage()
+        self.backend = ManualJobBackend(
+            self.engine, self.storage, self.database.sync_sessions, ResultCache(16)
+        )
+        self.user = User(id=1, email="teacher@example.com")
+        app = FastAPI()
+        app.include_router(compare_job_router)
+        app.dependency_overrides[get_async_db] = self.database.get_db
+        app.dependency_overrides[get_job_backend] = lambda: self.backend
+        app.dependency_overrides[authenticate_request] = lambda: None
+        app.dependency_overrides[get_current_user] = lambda: self.user
+        self.client = TestClient(app)
+
+    def submit(self, teacher, student):
+        return self.client.post(
+            "/api/api/v1/compare_jobs/",
+            files={
+                "file1": ("teacher.wav", teacher, "audio/wav"),
+                "file2": ("student.wav", student, "audio/wav"),
+            },
+        )
+
+    def test_submit_and_poll(self):
+        teacher = make_recording((310, 360, 410, 460, 510))
+        student = make_recording((310, 460, 410, 360, 510))
+        response = self.submit(teacher, student)
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["id"]
+        self.assertEqual(response.headers["location"], f"/api/api/v1/compare_jobs/{job_id}")
+        self.assertEqual(self.backend.queued, [job_id])
+
+        response = self.client.get(f"/api/api/v1/compare_jobs/{job_id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], JOB_QUEUED)
+        self.assertIn("retry-after", response.headers)
+
+        asyncio.run(self.backend.execute(job_id))
+        response = self.client.get(f"/api/api/v1/compare_jobs/{job_id}")
+        self.assertEqual(response.json()["status"], JOB_DONE)
+        self.assertNotIn("retry-after", response.headers)
+        expected = json.loads(json.dumps(compare_melodies(teacher, student)))
+        self.assertEqual(response.json()["result"], expected)
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get("/api/api/v1/compare_jobs/missing").status_code, 404)
+
+    def test_job_of_another_user(self):
+        job_id = self.submit(b"teacher", b"student").json()["id"]
+        self.user = User(id=2, email="other@example.com")
+        self.assertEqual(self.client.get(f"/api/api/v1/compare_jobs/{job_id}").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,16 +6,20 @@ import unittest
 import numpy as np
 import soundfile as sf
 
-from app.core.compare_melodies import (calculate_average_volume,
+from app.core.compare_melodies import (analyze_reference,
+                                       calculate_average_volume,
                                        calculate_frequency,
                                        calculate_integral_indicator,
                                        calculate_loudness, calculate_rhythm,
                                        compare_melodies,
+                                       compare_with_reference,
                                        compare_melody_sequences,
                                        extend_to_max_length, normalize_melody,
                                        process_characteristics,
                                        synchronize_melodies)
 
+from audio_helpers import make_recording
+
 logging.basicConfig(level=logging.DEBUG)
 
 
@@ -52,6 +56,20 @@ class TestMelodyComparison(unittest.TestCase):
         result = compare_melodies(b"", self.sine_bytes)
         self.assertIsNone(result)
 
+    def test_compare_with_reference_matches_compare_melodies(self):
+        teacher = make_recording([310, 360, 410, 460, 510, 410])
+        student = make_recording([310, 410, 360, 460, 510, 410])
+
+        reference = analyze_reference(teacher)
+        self.assertIsNotNone(reference)
+        self.assertEqual(len(reference["notes"]), len(reference["lengths"]))
+        self.assertGreater(len(reference["notes"]), 0)
+
+        expected = compare_melodies(teacher, student)
+        self.assertEqual(compare_with_reference(reference, student), expected)
+        # Эталон не изменяется при сравнении и может использоваться повторно
+        self.assertEqual(compare_with_reference(reference, student), expected)
+
     def test_synchronize_melodies(self):
         teacher_melody = [1.0, 1.0, 2.0, 3.0]
         children_melody = [1.0, 1.0, 2.0, 3.0]
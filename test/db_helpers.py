@@ -0,0 +1,35 @@
+import os
+import tempfile
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.data.database import Base, async_database_url
+
+
+class AsyncDatabase:
+    """
+    Временная база SQLite, к которой приложение ходит через aiosqlite.
+
+    Фоновые задачи работают с той же базой через синхронные сессии.
+    """
+
+    def __init__(self):
+        handle, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        url = f"sqlite:///{self.path}"
+        self.sync_engine = create_engine(url, poolclass=NullPool)
+        Base.metadata.create_all(self.sync_engine)
+        self.sync_sessions = sessionmaker(bind=self.sync_engine)
+        self.engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    async def get_db(self):
+        async with self.sessions() as db:
+            yield db
+
+    def close(self):
+        self.sync_engine.dispose()
+        os.unlink(self.path)
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import DB_POOL_SIZE
+from app.data.database import async_database_url
+from app.data.pool import (TimedAsyncQueuePool, TimedQueuePool, instrument_engine,
+                           pool_options, warm_up_async, warm_up_pools, warm_up_sync)
+
+
+def sample(name: str, label: str) -> float:
+    return REGISTRY.get_sample_value(name, {"engine": label}) or 0.0
+
+
+class TestPoolOptions(unittest.TestCase):
+
+    def test_pool_classes(self):
+        self.assertIs(pool_options("postgresql://db/app")["poolclass"], TimedQueuePool)
+        options = pool_options("postgresql+asyncpg://db/app", is_async=True)
+        self.assertIs(options["poolclass"], TimedAsyncQueuePool)
+        self.assertEqual(options["pool_size"], DB_POOL_SIZE)
+
+    def test_in_memory_sqlite(self):
+        self.assertEqual(pool_options("sqlite://"), {})
+        self.assertEqual(pool_options("sqlite+aiosqlite:///:memory:", is_async=True), {})
+
+
+class TestCheckoutTimeouts(unittest.TestCase):
+
+    def test_timeout_is_counted(self):
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.unlink, path)
+        engine = create_engine(
+            f"sqlite:///{path}", poolclass=TimedQueuePool,
+            pool_size=1, max_overflow=0, pool_timeout=0.1,
+        )
+        self.addCleanup(engine.dispose)
+        instrument_engine(engine, "test_timeout")
+        timeouts = sample("db_pool_checkout_timeouts_total", "test_timeout")
+        checkouts = sample("db_pool_checkout_seconds_count", "test_timeout")
+        with engine.connect():
+            with self.assertRaises(PoolTimeoutError):
+                engine.connect()
+        self.assertEqual(sample("db_pool_checkout_timeouts_total", "test_timeout"), timeouts + 1)
+        # Неудачное ожидание тоже попадает в гистограмму
+        self.assertEqual(sample("db_pool_checkout_seconds_count", "test_timeout"), checkouts + 2)
+
+
+class TestPoolWarmUp(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.unlink, path)
+        url = f"sqlite:///{path}"
+        self.engine = create_engine(url, **pool_options(url))
+        self.addCleanup(self.engine.dispose)
+        async_url = async_database_url(url)
+        self.async_engine = create_async_engine(async_url, **pool_options(async_url, is_async=True))
+        self.addAsyncCleanup(self.async_engine.dispose)
+
+    async def test_warm_up_keeps_connections_open(self):
+        instrument_engine(self.engine, "test_sync")
+        checkouts = sample("db_pool_checkout_seconds_count", "test_sync")
+
+        self.assertEqual(warm_up_sync(self.engine, 3), 3)
+        self.assertEqual(self.engine.pool.checkedin(), 3)
+        self.assertEqual(sample("db_pool_checkout_seconds_count", "test_sync"), checkouts + 3)
+        self.assertEqual(sample("db_pool_connections_opened_total", "test_sync"), 3)
+
+        with self.engine.connect():
+            self.assertEqual(sample("db_pool_checked_out", "test_sync"), 1)
+            self.assertEqual(sample("db_pool_checked_in", "test_sync"), 2)
+        # Reused connection, nothing new was opened
+        self.assertEqual(sample("db_pool_connections_opened_total", "test_sync"), 3)
+
+    async def test_label_survives_dispose(self):
+        instrument_engine(self.async_engine, "test_async")
+        await self.async_engine.dispose()
+        checkouts = sample("db_pool_checkout_seconds_count", "test_async")
+        self.assertEqual(await warm_up_async(self.async_engine, 2), 2)
+        self.assertEqual(sample("db_pool_checkout_seconds_count", "test_async"), checkouts + 2)
+        self.assertEqual(sample("db_pool_checked_in", "test_async"), 2)
+
+    async def test_warm_up_async(self):
+        self.assertEqual(await warm_up_async(self.async_engine, 2), 2)
+        self.assertEqual(self.async_engine.sync_engine.pool.checkedin(), 2)
+
+    async def test_warm_up_pools_is_capped_and_tolerates_failures(self):
+        await warm_up_pools(self.engine, self.async_engine, DB_POOL_SIZE + 10)
+        self.assertEqual(self.engine.pool.checkedin(), DB_POOL_SIZE)
+
+        broken = create_engine("sqlite:////nonexistent/dir/app.db", **pool_options("sqlite:///x.db"))
+        with self.assertLogs("app.data.pool", "WARNING"):
+            await warm_up_pools(broken, self.async_engine, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import io
+import unittest
+from math import floor
+
+import numpy as np
+import soundfile as sf
+
+from app.core.compare_melodies import (extract_melody_from_audio,
+                                       extract_notes, extract_notes_array)
+
+
+def extract_notes_reference(melody, min_per):
+    """Исходная покадровая реализация extract_notes."""
+    counter = 0
+    all_notes, freq, lengths = [], [], []
+    for i in range(len(melody) - 1):
+        if floor(melody[i]) == floor(melody[i + 1]):
+            counter += 1
+        elif counter >= min_per:
+            all_notes.append(floor(melody[i]) + counter / 100)
+            freq.append(floor(melody[i]))
+            lengths.append(counter)
+            counter = 0
+    return all_notes, freq, lengths
+
+
+class TestExtractNotesEquivalence(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(20240501)
+
+    def random_melody(self, runs: int, max_run: int) -> list:
+        bands = self.rng.integers(0, 5, size=runs)
+        durations = self.rng.integers(1, max_run, size=runs)
+        melody = np.repeat(bands, durations).astype(np.float64)
+        melody += np.round(self.rng.random(len(melody)) * 99) / 100
+        melody[self.rng.random(len(melody)) < 0.1] = 0.0
+        return melody.tolist()
+
+    def assert_equivalent(self, melody, min_per):
+        expected = extract_notes_reference(melody, min_per)
+        self.assertEqual(extract_notes(melody, min_per), expected)
+        all_notes, freq, lengths = extract_notes_array(melody, min_per)
+        self.assertIsInstance(all_notes, np.ndarray)
+        self.assertEqual((all_notes.tolist(), freq.tolist(), lengths.tolist()), expected)
+
+    def test_random_melodies(self):
+        for _ in range(200):
+            melody = self.random_melody(runs=int(self.rng.integers(1, 80)), max_run=30)
+            min_per = float(self.rng.choice([0, 1, 2.5, 7.3, 10.833333333333334, 25, 1000]))
+            with self.subTest(min_per=min_per, length=len(melody)):
+                self.assert_equivalent(melody, min_per)
+
+    def test_edge_cases(self):
+        for melody in ([], [1.5], [1.1, 1.2], [1.0, 2.0], [0.0] * 10):
+            for min_per in (-1.0, 0, 0.5, 1, 3, float("inf"), float("nan")):
+                with self.subTest(melody=melody, min_per=min_per):
+                    self.assert_equivalent(melody, min_per)
+
+    def test_real_melody(self):
+        sr = 22050
+        samples = np.arange(int(sr * 0.6)) / sr
+        audio = np.concatenate(
+            [0.5 * np.sin(2 * np.pi * f * samples) for f in (310, 360, 410, 460, 510, 410, 310)]
+        )
+        buffer = io.BytesIO()
+        sf.write(buffer, audio, sr, format="WAV", subtype="PCM_16")
+        melody, min_per = extract_melody_from_audio(buffer.getvalue())
+
+        self.assertGreater(len(extract_notes_reference(melody, min_per)[0]), 0)
+        self.assert_equivalent(melody, min_per)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import soundfile as sf
+
+from app.core import compare_melodies as melodies
+from app.core.feature_cache import FeatureCache, feature_cache_key
+
+
+class TestFeatureCache(unittest.TestCase):
+
+    def test_key_depends_on_content_and_params(self):
+        self.assertEqual(feature_cache_key(b"abc", "p1"), feature_cache_key(b"abc", "p1"))
+        self.assertNotEqual(feature_cache_key(b"abc", "p1"), feature_cache_key(b"abd", "p1"))
+        self.assertNotEqual(feature_cache_key(b"abc", "p1"), feature_cache_key(b"abc", "p2"))
+
+    def test_memory_tier_is_bounded_in_bytes(self):
+        cache = FeatureCache(max_bytes=2 * 80)
+        for key in ("a", "b", "c"):
+            cache.put(key, np.zeros(10), 1.0)
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertLessEqual(cache.size, cache.max_bytes)
+
+    def test_lru_order(self):
+        cache = FeatureCache(max_bytes=2 * 80)
+        cache.put("a", np.zeros(10), 1.0)
+        cache.put("b", np.zeros(10), 1.0)
+        cache.get("a")
+        cache.put("c", np.zeros(10), 1.0)
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+
+    def test_disk_tier_survives_memory_eviction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = FeatureCache(max_bytes=0, directory=directory)
+            cache.put("key", np.array([1.5, 2.25]), 3.5)
+            self.assertEqual(len(cache), 0)
+            melody, min_per = FeatureCache(max_bytes=1024, directory=directory).get("key")
+            self.assertEqual(melody.tolist(), [1.5, 2.25])
+            self.assertEqual(min_per, 3.5)
+
+    def test_disk_tier_evicts_oldest_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = FeatureCache(max_bytes=0, directory=directory)
+            cache.put("a", np.zeros(10), 1.0)
+            cache.disk_max_bytes = 2 * os.path.getsize(cache._path("a"))
+            cache.put("b", np.zeros(10), 1.0)
+            # Чтение продлевает жизнь файла
+            os.utime(cache._path("a"), (0, 0))
+            os.utime(cache._path("b"), (1, 1))
+            cache.get("a")
+            cache.put("c", np.zeros(10), 1.0)
+            self.assertEqual(sorted(os.listdir(directory)), ["a.npz", "c.npz"])
+
+
+class TestExtractMelodyCache(unittest.TestCase):
+
+    def setUp(self):
+        sr = 22050
+        t = np.linspace(0, 1.0, sr)
+        buffer = io.BytesIO()
+        sf.write(buffer, 0.5 * np.sin(2 * np.pi * 440 * t), sr, format="WAV", subtype="PCM_16")
+        self.audio = buffer.getvalue()
+
+    def test_repeated_audio_skips_decoding(self):
+        cache = FeatureCache(max_bytes=1024 * 1024)
+        with mock.patch.object(melodies, "feature_cache", cache):
+            first = melodies.extract_melody_from_audio(self.audio)
+            with mock.patch.object(melodies.librosa, "load") as load:
+                second = melodies.extract_melody_from_audio(self.audio)
+                load.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(len(cache), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+import librosa
+import numpy as np
+
+from app.core.compare_melodies import AudioConfig
+from app.core.mel_bands import band_filterbank, band_mel_db, mel_peak
+
+
+def slice_reference(y, sr):
+    """Исходный расчет: все полосы мелспектрограммы, затем срез."""
+    mel = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=AudioConfig.N_MELS)
+    return librosa.amplitude_to_db(mel)[AudioConfig.FREQ_BANDS]
+
+
+def melody_of(db):
+    frames = db.T
+    mask = np.all(frames < 0, axis=1)
+    result = np.zeros(len(frames))
+    result[~mask] = np.argmax(frames[~mask], axis=1) + np.round(np.max(frames[~mask], axis=1)) / 100
+    return result
+
+
+class TestBandMelDb(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(11)
+
+    def signal(self, sr, seconds, amplitude):
+        t = np.arange(int(sr * seconds)) / sr
+        tone = np.sign(np.sin(2 * np.pi * self.rng.uniform(80, 2000) * t)) * np.exp(-t)
+        noise = 0.05 * self.rng.standard_normal(len(t))
+        return (amplitude * (tone + noise)).astype(np.float32)
+
+    def assert_matches_slice(self, y, sr):
+        expected = slice_reference(y, sr)
+        bands = band_mel_db(y, sr, AudioConfig.N_MELS, AudioConfig.FREQ_BANDS)
+        self.assertEqual(bands.shape, expected.shape)
+        # Отличия только в округлении float32
+        np.testing.assert_allclose(bands, expected, rtol=0, atol=1e-4)
+        np.testing.assert_array_equal(melody_of(bands), melody_of(expected))
+
+    def test_matches_full_spectrogram_slice(self):
+        for sr in (16000, 22050, 44100):
+            for seconds in (0.01, 0.5, 4.0):
+                for amplitude in (0.001, 0.3, 0.9):
+                    with self.subTest(sr=sr, seconds=seconds, amplitude=amplitude):
+                        self.assert_matches_slice(self.signal(sr, seconds, amplitude), sr)
+
+    def test_dynamic_range_floor_uses_all_bands(self):
+        # Громкий высокий тон поднимает пик над 80 дБ, и нижние полосы обрезаются
+        sr = 22050
+        t = np.arange(sr * 2) / sr
+        y = (300 * np.sin(2 * np.pi * 3000 * t) + 1e-3 * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+        expected = slice_reference(y, sr)
+        self.assertGreater(expected.min(), 0.0)
+        self.assert_matches_slice(y, sr)
+
+    def test_mel_peak_matches_full_product(self):
+        filterbank = band_filterbank(22050, 2048, 64, 4, 9)
+        power = np.abs(librosa.stft(self.signal(22050, 3.0, 0.5))) ** 2.0
+        expected = float((filterbank.full @ power).max())
+        self.assertEqual(mel_peak(power, filterbank), expected)
+
+    def test_filterbank_is_cached(self):
+        first = band_filterbank(22050, 2048, 64, 4, 9)
+        self.assertIs(band_filterbank(22050, 2048, 64, 4, 9), first)
+        self.assertIsNot(band_filterbank(44100, 2048, 64, 4, 9), first)
+        self.assertFalse(first.weights.flags.writeable)
+
+
+if __name__ == "__main__":
+    unittest.main()
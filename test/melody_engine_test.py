@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+import unittest
+
+from app.core.melody_engine import (EngineBusyError, EngineTimeoutError,
+                                    EngineWorkerError, MelodyEngine,
+                                    worker_processes)
+
+
+class TestMelodyEngine(unittest.IsolatedAsyncioTestCase):
+
+    def make_engine(self, **kwargs) -> MelodyEngine:
+        options = dict(workers=1, max_queue=0, job_timeout=10, max_tasks_per_worker=2)
+        options.update(kwargs)
+        engine = MelodyEngine(**options)
+        self.addCleanup(engine.shutdown)
+        return engine
+
+    async def test_run_returns_result(self):
+        engine = self.make_engine()
+        self.assertEqual(await engine.run(pow, 2, 10), 1024)
+        self.assertEqual(engine.pending, 0)
+
+    async def test_run_propagates_errors(self):
+        engine = self.make_engine()
+        with self.assertRaises(ZeroDivisionError):
+            await engine.run(divmod, 1, 0)
+        self.assertEqual(engine.pending, 0)
+
+    async def test_workers_are_recycled(self):
+        engine = self.make_engine(max_tasks_per_worker=1)
+        results = [await engine.run(pow, 3, i) for i in range(3)]
+        self.assertEqual(results, [1, 3, 9])
+
+    async def test_full_queue_is_rejected(self):
+        engine = self.make_engine()
+        job = engine.submit(time.sleep, 0.5)
+        with self.assertRaises(EngineBusyError):
+            engine.submit(pow, 2, 2)
+        await job
+        self.assertEqual(await engine.run(pow, 2, 2), 4)
+
+    async def test_timeout(self):
+        engine = self.make_engine(job_timeout=1)
+        with self.assertRaises(EngineTimeoutError):
+            await engine.run(time.sleep, 30)
+        # the stuck worker is killed and the slot comes back
+        await self.wait_until_idle(engine)
+        self.assertEqual(await engine.run(pow, 2, 3), 8)
+
+    async def test_queued_job_timeout_is_cancelled(self):
+        engine = self.make_engine(max_queue=1, job_timeout=0.5)
+        running = engine.submit(time.sleep, 1.5)
+        with self.assertRaises(EngineTimeoutError):
+            await engine.run(pow, 2, 2)
+        # the running job was not the one that timed out
+        self.assertIsNone(await running)
+        self.assertEqual(engine.pending, 0)
+
+    async def test_timeout_resubmits_healthy_jobs(self):
+        engine = self.make_engine(workers=2, job_timeout=1)
+        healthy = engine.submit(time.sleep, 2)
+        with self.assertRaises(EngineTimeoutError):
+            await engine.run(time.sleep, 30)
+        # убитый вместе с зависшим job перезапускается на новом пуле
+        self.assertIsNone(await healthy)
+        await self.wait_until_idle(engine)
+
+    async def test_worker_processes_are_reachable(self):
+        # Ломается, если ProcessPoolExecutor перестанет хранить _processes
+        engine = self.make_engine()
+        await engine.run(pow, 2, 2)
+        processes = worker_processes(engine._executor)
+        self.assertTrue(processes)
+        self.assertTrue(all(process.is_alive() for process in processes))
+
+    async def test_worker_death_frees_capacity(self):
+        engine = self.make_engine()
+        for _ in range(engine.capacity + 1):
+            with self.assertRaises(EngineWorkerError):
+                await engine.run(os._exit, 1)
+            self.assertEqual(engine.pending, 0)
+        self.assertEqual(await engine.run(pow, 2, 5), 32)
+
+    async def wait_until_idle(self, engine: MelodyEngine, timeout: float = 10) -> None:
+        """Дождаться освобождения всех слотов движка."""
+        deadline = time.monotonic() + timeout
+        while engine.pending and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        self.assertEqual(engine.pending, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+
+import numpy as np
+
+from app.core.compare_melodies import (AudioConfig, calculate_frequency_array,
+                                       calculate_integral_indicator,
+                                       calculate_loudness_array,
+                                       calculate_rhythm_array,
+                                       process_characteristics,
+                                       process_characteristics_batch)
+
+
+def calculate_loudness_reference(t_m, c_m, teacher_melody, children_melody):
+    res_loud = []
+    counter_t, counter_c = 0, 0
+    for i in range(len(t_m)):
+        t_sum = sum(teacher_melody[counter_t : counter_t + t_m[i]])
+        c_sum = sum(children_melody[counter_c : counter_c + c_m[i]])
+        if (
+            t_sum != 0
+            and abs(1 - (c_sum / c_m[i]) / (t_sum / t_m[i]))
+            <= AudioConfig.LOUDNESS_THRESHOLD
+        ):
+            res_loud.extend([0] * c_m[i])
+        else:
+            res_loud.extend([1] * c_m[i])
+        counter_t += t_m[i]
+        counter_c += c_m[i]
+    return res_loud
+
+
+def calculate_rhythm_reference(t_m, c_m):
+    res_rhythm = []
+    for i in range(len(t_m)):
+        if abs((t_m[i] - c_m[i]) / t_m[i]) <= AudioConfig.RHYTHM_THRESHOLD:
+            res_rhythm += [0] * c_m[i]
+        else:
+            res_rhythm += [0] * min(t_m[i], c_m[i]) + [1] * abs(c_m[i] - t_m[i])
+    return res_rhythm
+
+
+def calculate_frequency_reference(freq_t, freq_c, c_m):
+    res_frequency = []
+    for i in range(len(freq_t)):
+        res_frequency += [0] * c_m[i] if freq_t[i] == freq_c[i] else [1] * c_m[i]
+    return res_frequency
+
+
+def process_characteristics_reference(x, time):
+    y = []
+    count_of_values = round(round(time, 2) * AudioConfig.TIME_FACTOR)
+    if count_of_values == 0:
+        return y
+    while len(x) >= count_of_values:
+        c = sum(x[:count_of_values]) / count_of_values
+        y.append(1 if c > 0.5 else 0)
+        x = x[count_of_values:]
+    if x:
+        c = sum(x) / len(x)
+        y.append(1 if c > 0.5 else 0)
+    return y
+
+
+class TestMetricKernels(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(7)
+
+    def random_case(self, notes: int):
+        t_m = self.rng.integers(1, 40, notes).tolist()
+        c_m = (np.array(t_m) + self.rng.integers(-10, 11, notes)).clip(1).tolist()
+        freq_t = self.rng.integers(0, 5, notes).tolist()
+        freq_c = [f if self.rng.random() < 0.7 else 6 for f in freq_t]
+        # Мелодии бывают короче суммы длительностей и содержат тишину
+        teacher = self.rng.integers(0, 100, int(sum(t_m) * 0.9)).tolist()
+        children = self.rng.integers(0, 100, sum(c_m)).tolist()
+        for melody in (teacher, children):
+            for start in self.rng.integers(0, max(len(melody), 1), 3):
+                melody[start : start + 40] = [0] * len(melody[start : start + 40])
+        return t_m, c_m, freq_t, freq_c, teacher, children
+
+    def test_kernels_match_reference(self):
+        for _ in range(200):
+            t_m, c_m, freq_t, freq_c, teacher, children = self.random_case(
+                int(self.rng.integers(0, 60))
+            )
+            with self.subTest(t_m=t_m, c_m=c_m):
+                self.assertEqual(
+                    calculate_loudness_array(t_m, c_m, teacher, children).tolist(),
+                    calculate_loudness_reference(t_m, c_m, teacher, children),
+                )
+                self.assertEqual(
+                    calculate_rhythm_array(t_m, c_m).tolist(),
+                    calculate_rhythm_reference(t_m, c_m),
+                )
+                self.assertEqual(
+                    calculate_frequency_array(freq_t, freq_c, c_m).tolist(),
+                    calculate_frequency_reference(freq_t, freq_c, c_m),
+                )
+
+    def test_zero_durations_raise_like_reference(self):
+        with self.assertRaises(ZeroDivisionError):
+            calculate_rhythm_array([2, 0], [2, 1])
+        with self.assertRaises(ZeroDivisionError):
+            calculate_loudness_array([2, 2], [2, 0], [5, 5, 5, 5], [5, 5])
+        self.assertEqual(
+            calculate_loudness_array([0, 2], [1, 1], [5, 5], [5, 5]).tolist(),
+            calculate_loudness_reference([0, 2], [1, 1], [5, 5], [5, 5]),
+        )
+
+    def test_process_characteristics_batch_matches_reference(self):
+        for _ in range(100):
+            strips = [
+                (self.rng.random(int(self.rng.integers(0, 300))) < self.rng.random()).astype(int).tolist()
+                for _ in range(3)
+            ]
+            time = float(self.rng.choice([0.1, 0.5, 1.0, 2, 3.37]))
+            with self.subTest(lengths=[len(x) for x in strips], time=time):
+                expected = [process_characteristics_reference(x, time) for x in strips]
+                self.assertEqual(process_characteristics_batch(strips, time), expected)
+                self.assertEqual(
+                    [process_characteristics(np.array(x, dtype=int), time) for x in strips],
+                    expected,
+                )
+
+    def test_process_characteristics_zero_time(self):
+        self.assertEqual(process_characteristics_batch([[1, 0], [1]], 0.1), [[], []])
+
+    def test_integral_indicator_accepts_arrays(self):
+        errors = [0, 1, 1, 0, 1, 0, 0]
+        self.assertEqual(
+            calculate_integral_indicator(np.array(errors)),
+            calculate_integral_indicator(errors),
+        )
+        self.assertEqual(calculate_integral_indicator(np.array([], dtype=int)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
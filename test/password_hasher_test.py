@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import unittest
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from prometheus_client import REGISTRY
+
+from app.core import auth
+from app.core.password_hasher import HasherBusyError, PasswordHasher, build_context
+
+# Cheapest bcrypt cost, the tests check the pool, not the hash
+CONTEXT = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+
+
+def queue_count(operation: str) -> float:
+    return REGISTRY.get_sample_value(
+        "password_hash_queue_seconds_count", {"operation": operation}
+    ) or 0.0
+
+
+class TestBuildContext(unittest.TestCase):
+
+    def test_outdated_hashes_need_update(self):
+        bcrypt_hash = CONTEXT.hash("secret")
+        context = build_context("bcrypt", bcrypt_rounds=5)
+        self.assertTrue(context.needs_update(bcrypt_hash))
+        self.assertFalse(context.needs_update(context.hash("secret")))
+
+        argon2 = build_context("argon2", argon2_time_cost=1, argon2_memory_cost=1024)
+        argon2_hash = argon2.hash("secret")
+        self.assertTrue(argon2_hash.startswith("$argon2"))
+        self.assertTrue(argon2.verify("secret", bcrypt_hash))
+        self.assertTrue(argon2.needs_update(bcrypt_hash))
+        self.assertTrue(context.verify("secret", argon2_hash))
+
+    def test_unknown_scheme(self):
+        with self.assertRaises(ValueError):
+            build_context("md5_crypt")
+
+
+class TestPasswordHasher(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.hasher = PasswordHasher(CONTEXT, workers=1, max_queue=1)
+        self.addCleanup(self.hasher.shutdown)
+
+    async def test_hash_and_verify(self):
+        before = queue_count("verify")
+        hashed = await self.hasher.hash("secret")
+        self.assertTrue(await self.hasher.verify("secret", hashed))
+        self.assertFalse(await self.hasher.verify("wrong", hashed))
+        self.assertEqual(queue_count("verify"), before + 2)
+        self.assertEqual(self.hasher.pending, 0)
+
+    async def test_verify_and_update(self):
+        hasher = PasswordHasher(build_context("bcrypt", bcrypt_rounds=5), workers=1)
+        self.addCleanup(hasher.shutdown)
+        valid, new_hash = await hasher.verify_and_update("secret", CONTEXT.hash("secret"))
+        self.assertTrue(valid)
+        self.assertTrue(new_hash.startswith("$2b$05$"))
+        self.assertEqual(await hasher.verify_and_update("secret", new_hash), (True, None))
+        self.assertEqual(await hasher.verify_and_update("wrong", new_hash), (False, None))
+
+    async def test_rejects_beyond_capacity(self):
+        release = threading.Event()
+        blocked = [
+            asyncio.ensure_future(self.hasher._run("test", release.wait))
+            for _ in range(self.hasher.capacity)
+        ]
+        await asyncio.sleep(0)
+        with self.assertRaises(HasherBusyError):
+            await self.hasher.hash("secret")
+
+        release.set()
+        await asyncio.gather(*blocked)
+        self.assertEqual(self.hasher.pending, 0)
+        self.assertTrue(await self.hasher.verify("secret", await self.hasher.hash("secret")))
+
+    async def test_busy_hasher_is_503(self):
+        full = PasswordHasher(CONTEXT, workers=1, max_queue=0)
+        full._pending = full.capacity
+        original, auth.password_hasher = auth.password_hasher, full
+        self.addCleanup(setattr, auth, "password_hasher", original)
+
+        with self.assertRaises(HTTPException) as error:
+            await auth.verify_password("secret", "hash")
+        self.assertEqual(error.exception.status_code, 503)
+        self.assertIn("Retry-After", error.exception.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
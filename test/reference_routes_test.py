@@ -0,0 +1,87 @@
+import json
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes.reference_routes import reference_router
+from app.core.auth import authenticate_request, get_current_user
+from app.core.compare_melodies import analyze_reference, compare_with_reference
+from app.core.melody_engine import MelodyEngine, get_melody_engine
+from app.data.database import get_async_db
+from app.data.models import User
+
+from audio_helpers import make_recording
+from db_helpers import AsyncDatabase
+
+
+TEACHER = make_recording((310, 360, 410, 460, 510))
+STUDENT = make_recording((310, 460, 410, 360, 510))
+
+
+class TestReferenceRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.database = AsyncDatabase()
+        self.addCleanup(self.database.close)
+        self.engine = MelodyEngine(workers=1, max_queue=0, job_timeout=30)
+        self.addCleanup(self.engine.shutdown)
+        self.user = User(id=1, email="teacher@example.com")
+        app = FastAPI()
+        app.include_router(reference_router)
+        app.dependency_overrides[get_async_db] = self.database.get_db
+        app.dependency_overrides[get_melody_engine] = lambda: self.engine
+        app.dependency_overrides[authenticate_request] = lambda: None
+        app.dependency_overrides[get_current_user] = lambda: self.user
+        self.client = TestClient(app)
+
+    def create(self, content=TEACHER, title=None):
+        data = {"title": title} if title else {}
+        return self.client.post(
+            "/api/api/v1/references/",
+            files={"file": ("teacher.wav", content, "audio/wav")},
+            data=data,
+        )
+
+    def compare(self, reference_id, content=STUDENT):
+        return self.client.post(
+            f"/api/api/v1/references/{reference_id}/compare",
+            files={"file": ("student.wav", content, "audio/wav")},
+        )
+
+    def test_create_and_list(self):
+        response = self.create(title="Гамма до мажор")
+        self.assertEqual(response.status_code, 200)
+        reference = response.json()
+        self.assertEqual(reference["title"], "Гамма до мажор")
+        self.assertEqual(reference["notes_count"], len(analyze_reference(TEACHER)["notes"]))
+        self.assertEqual(self.create().json()["title"], "teacher.wav")
+
+        response = self.client.get("/api/api/v1/references/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["id"] for r in response.json()], [reference["id"], reference["id"] + 1])
+        self.assertEqual(response.json()[0], reference)
+
+    def test_compare(self):
+        reference_id = self.create().json()["id"]
+        response = self.compare(reference_id)
+        self.assertEqual(response.status_code, 200)
+        expected = compare_with_reference(analyze_reference(TEACHER), STUDENT)
+        self.assertEqual(response.json()["result"], json.loads(json.dumps(expected)))
+
+    def test_missing_reference(self):
+        self.assertEqual(self.compare(42).status_code, 404)
+
+    def test_undecodable_upload_is_rejected(self):
+        self.assertEqual(self.create(b"not an audio file").status_code, 422)
+        self.assertEqual(self.client.get("/api/api/v1/references/").json(), [])
+
+    def test_references_are_private(self):
+        reference_id = self.create().json()["id"]
+        self.user = User(id=2, email="other@example.com")
+        self.assertEqual(self.client.get("/api/api/v1/references/").json(), [])
+        self.assertEqual(self.compare(reference_id).status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
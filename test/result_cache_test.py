@@ -0,0 +1,107 @@
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes.compare_routes import compare_router
+from app.core.auth import authenticate_request
+from app.core.melody_engine import MelodyEngine, get_melody_engine
+from app.core.result_cache import ResultCache, get_result_cache
+
+from clock_helpers import FakeClock
+
+RESULT = (0.75, [0, 1], [1, 0], [0, 0], [0.5, 1.0])
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.version = "v1"
+        self.clock = FakeClock()
+        self.cache = ResultCache(
+            max_entries=2, ttl=60, fingerprint=lambda: self.version, clock=self.clock
+        )
+
+    def test_key_depends_on_both_files_and_order(self):
+        key = self.cache.key(b"teacher", b"student")
+        self.assertEqual(key, self.cache.key(b"teacher", b"student"))
+        self.assertNotEqual(key, self.cache.key(b"student", b"teacher"))
+        self.assertNotEqual(key, self.cache.key(b"teacher", b"student2"))
+
+    def test_hits_and_misses_are_counted(self):
+        key = self.cache.key(b"a", b"b")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, RESULT)
+        self.assertEqual(self.cache.get(key), RESULT)
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 1, "entries": 1})
+
+    def test_failed_comparisons_are_not_cached(self):
+        key = self.cache.key(b"a", b"b")
+        self.cache.put(key, None)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_entries_expire(self):
+        key = self.cache.key(b"a", b"b")
+        self.cache.put(key, RESULT)
+        self.clock.now = 59
+        self.assertIsNotNone(self.cache.get(key))
+        self.clock.now = 61
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_size_is_bounded_lru(self):
+        keys = [self.cache.key(b"t", bytes([i])) for i in range(3)]
+        self.cache.put(keys[0], RESULT)
+        self.cache.put(keys[1], RESULT)
+        self.cache.get(keys[0])
+        self.cache.put(keys[2], RESULT)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertEqual(len(self.cache), 2)
+
+    def test_config_change_drops_entries(self):
+        old_key = self.cache.key(b"a", b"b")
+        self.cache.put(old_key, RESULT)
+        self.version = "v2"
+        new_key = self.cache.key(b"a", b"b")
+        self.assertIsNone(self.cache.get(new_key))
+        self.assertEqual(len(self.cache), 0)
+        # Результат, посчитанный со старыми параметрами, не сохраняется
+        self.cache.put(old_key, RESULT)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_invalidate(self):
+        self.cache.put(self.cache.key(b"a", b"b"), RESULT)
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestCompareRouteCache(unittest.TestCase):
+
+    def test_resubmission_is_served_from_cache(self):
+        engine = MelodyEngine(workers=1, max_queue=0, job_timeout=30)
+        self.addCleanup(engine.shutdown)
+        cache = ResultCache(max_entries=16)
+        app = FastAPI()
+        app.include_router(compare_router)
+        app.dependency_overrides[get_melody_engine] = lambda: engine
+        app.dependency_overrides[get_result_cache] = lambda: cache
+        app.dependency_overrides[authenticate_request] = lambda: None
+        client = TestClient(app)
+
+        files = {"file1": ("a.wav", b"not audio"), "file2": ("b.wav", b"not audio")}
+        self.assertEqual(client.post("/api/api/v1/compare_melodies", files=files).status_code, 500)
+        self.assertEqual(len(cache), 0)
+
+        key = cache.key(b"teacher", b"student")
+        cache.put(key, RESULT)
+        files = {"file1": ("a.wav", b"teacher"), "file2": ("b.wav", b"student")}
+        response = client.post("/api/api/v1/compare_melodies", files=files)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"result": [0.75, [0, 1], [1, 0], [0, 0], [0.5, 1.0]]})
+        self.assertEqual(engine.pending, 0)
+        self.assertEqual(cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import io
+import json
+import tempfile
+import unittest
+
+import numpy as np
+import soundfile as sf
+from fastapi import UploadFile
+
+from app.core.audio_stream import MemoryReader
+from app.core.compare_melodies import compare_melodies
+from app.core.melody_engine import MelodyEngine
+from app.core.spooled_audio import (SpooledAudio, SpoolUnavailableError,
+                                    compare_melodies_sources, open_source,
+                                    upload_source)
+
+from audio_helpers import make_recording
+
+
+def make_upload(data: bytes, max_size: int = 1024 * 1024) -> UploadFile:
+    """Загрузка в том виде, в каком ее создает Starlette."""
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    spool.write(data)
+    spool.seek(0)
+    return UploadFile(spool, size=len(data), filename="take.wav")
+
+
+class TestMemoryReader(unittest.TestCase):
+
+    def test_behaves_like_bytesio(self):
+        data = bytes(range(256)) * 10
+        reader, expected = MemoryReader(memoryview(data)), io.BytesIO(data)
+        for whence, offset, count in ((0, 0, 10), (1, 5, 100), (2, -20, 50), (0, 3000, 5)):
+            self.assertEqual(reader.seek(offset, whence), expected.seek(offset, whence))
+            self.assertEqual(reader.read(count), expected.read(count))
+            self.assertEqual(reader.tell(), expected.tell())
+        reader.close()
+
+    def test_decodes_audio(self):
+        data = make_recording((440,))
+        expected, sr = sf.read(io.BytesIO(data))
+        with MemoryReader(data) as reader:
+            audio, reader_sr = sf.read(reader)
+        np.testing.assert_array_equal(audio, expected)
+        self.assertEqual(reader_sr, sr)
+
+
+class TestUploadSource(unittest.IsolatedAsyncioTestCase):
+
+    async def test_small_upload_is_read(self):
+        data = make_recording((440,))
+        self.assertEqual(await upload_source(make_upload(data)), data)
+
+    async def test_rolled_upload_is_referenced(self):
+        data = make_recording((440,))
+        upload = make_upload(data, max_size=1024)
+        source = await upload_source(upload, min_size=1024)
+        self.assertIsInstance(source, SpooledAudio)
+        with open_source(source) as mapping:
+            self.assertEqual(mapping[:], data)
+        await upload.close()
+
+    async def test_replaced_spool_file_is_rejected(self):
+        upload = make_upload(make_recording((440,)), max_size=1024)
+        source = (await upload_source(upload, min_size=1024))._replace(inode=0)
+        with self.assertRaises(SpoolUnavailableError):
+            with open_source(source):
+                pass
+        await upload.close()
+
+    async def test_upload_without_file_descriptor_is_read(self):
+        data = make_recording((440,))
+        upload = UploadFile(io.BytesIO(data), size=len(data), filename="take.wav")
+        self.assertEqual(await upload_source(upload, min_size=1024), data)
+
+    async def test_worker_compares_spooled_files(self):
+        teacher = make_recording((310, 360, 410, 460, 510))
+        student = make_recording((310, 460, 410, 360, 510))
+        uploads = [make_upload(teacher, max_size=1024), make_upload(student)]
+        sources = [
+            await upload_source(uploads[0], min_size=1024),
+            await upload_source(uploads[1]),
+        ]
+        self.assertIsInstance(sources[0], SpooledAudio)
+        self.assertIsInstance(sources[1], bytes)
+
+        engine = MelodyEngine(workers=1, max_queue=0, job_timeout=30)
+        self.addCleanup(engine.shutdown)
+        result = await engine.run(compare_melodies_sources, *sources)
+        expected = compare_melodies(teacher, student)
+        self.assertEqual(json.dumps(result), json.dumps(expected))
+        for upload in uploads:
+            await upload.close()
+
+    async def test_worker_reports_unavailable_spool_file(self):
+        engine = MelodyEngine(workers=1, max_queue=0, job_timeout=30)
+        self.addCleanup(engine.shutdown)
+        missing = SpooledAudio("/nonexistent/spool", 10, 0, 0)
+        with self.assertRaises(SpoolUnavailableError):
+            await engine.run(compare_melodies_sources, missing, b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.api.routes.compare_routes import compare_router
+from app.core.auth import authenticate_request
+from app.core.compare_melodies import collect_timings, compare_melodies, stage
+from app.core.melody_engine import MelodyEngine, get_melody_engine
+from app.core.metrics import observe_timings
+from app.core.result_cache import ResultCache, get_result_cache
+
+from audio_helpers import make_recording
+
+
+PIPELINE_STAGES = {
+    "load", "trim", "melspectrogram", "extract_notes", "compare_melody_sequences", "metrics"
+}
+
+
+def stage_count(stage_name: str) -> float:
+    return REGISTRY.get_sample_value(
+        "melody_stage_wall_seconds_count", {"stage": stage_name}
+    ) or 0.0
+
+
+class TestCollectTimings(unittest.TestCase):
+
+    def test_records_every_stage(self):
+        teacher, student = make_recording((315, 365, 415)), make_recording((315, 415, 365))
+        result, timings = collect_timings(compare_melodies, teacher, student)
+
+        self.assertEqual(result, compare_melodies(teacher, student))
+        self.assertEqual({t["stage"] for t in timings}, PIPELINE_STAGES)
+        for timing in timings:
+            self.assertGreaterEqual(timing["wall"], 0)
+            self.assertGreaterEqual(timing["cpu"], 0)
+        load = next(t for t in timings if t["stage"] == "load")
+        self.assertEqual(load["size"], len(teacher))
+
+    def test_no_collection_outside_collect_timings(self):
+        _, timings = collect_timings(lambda: None)
+        with stage("idle", 1):
+            pass
+        self.assertEqual(timings, [])
+
+    def test_observe_timings(self):
+        before = stage_count("test_stage")
+        observe_timings([{"stage": "test_stage", "wall": 0.5, "cpu": 0.25, "size": None}])
+        self.assertEqual(stage_count("test_stage"), before + 1)
+        self.assertIsNone(REGISTRY.get_sample_value(
+            "melody_stage_input_size_count", {"stage": "test_stage"}
+        ))
+
+
+class TestDebugTimingsHeader(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = MelodyEngine(workers=1, max_queue=0, job_timeout=30)
+        self.addCleanup(self.engine.shutdown)
+        self.cache = ResultCache(16)
+        app = FastAPI()
+        app.include_router(compare_router)
+        app.dependency_overrides[get_melody_engine] = lambda: self.engine
+        app.dependency_overrides[get_result_cache] = lambda: self.cache
+        app.dependency_overrides[authenticate_request] = lambda: None
+        self.client = TestClient(app)
+        self.teacher = make_recording((320, 370, 420))
+        self.student = make_recording((320, 420, 370))
+
+    def post(self, headers=None):
+        files = [
+            ("file1", ("teacher.wav", self.teacher, "audio/wav")),
+            ("file2", ("student.wav", self.student, "audio/wav")),
+        ]
+        return self.client.post("/api/api/v1/compare_melodies", files=files, headers=headers)
+
+    def test_timings_only_with_header(self):
+        before = stage_count("metrics")
+        response = self.post({"X-Debug-Timings": "1"})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        expected = json.loads(json.dumps(compare_melodies(self.teacher, self.student)))
+        self.assertEqual(body["result"], expected)
+        self.assertIn("metrics", {t["stage"] for t in body["timings"]})
+        self.assertEqual(stage_count("metrics"), before + 1)
+
+        # Cached result: nothing ran, so there is nothing to report
+        self.assertEqual(self.post({"X-Debug-Timings": "1"}).json()["timings"], [])
+        self.assertNotIn("timings", self.post().json())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import socket
+import unittest
+
+from app.config import MINIO_POOL_MAXSIZE, MINIO_RETRIES
+from app.data import storage
+
+
+class TestMinioHttpClient(unittest.TestCase):
+
+    def test_pool_settings(self):
+        options = storage.build_http_client().connection_pool_kw
+        self.assertEqual(options["maxsize"], MINIO_POOL_MAXSIZE)
+        self.assertEqual(options["retries"].total, MINIO_RETRIES)
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1), options["socket_options"])
+
+    def test_client_is_shared(self):
+        client = object()
+        original, storage.minio_client = storage.minio_client, client
+        self.addCleanup(setattr, storage, "minio_client", original)
+        self.assertIs(storage.get_minio_client(), client)
+        self.assertIs(storage.get_minio_client(), client)
+
+
+if __name__ == "__main__":
+    unittest.main()
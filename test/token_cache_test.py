@@ -0,0 +1,44 @@
+import unittest
+from datetime import timedelta
+
+from app.core.auth import security
+from app.core.token_cache import TokenCache
+
+from clock_helpers import FakeClock
+
+
+class TestTokenCache(unittest.TestCase):
+
+    def setUp(self):
+        self.token = security.create_access_token(uid="1", expiry=timedelta(minutes=5))
+        self.payload = security._decode_token(self.token)
+        self.expires_at = self.payload.exp.timestamp()
+        self.clock = FakeClock(self.expires_at - 60)
+        self.cache = TokenCache(max_entries=2, clock=self.clock)
+
+    def test_kept_until_expiry(self):
+        self.assertIsNone(self.cache.get(self.token))
+        self.cache.put(self.token, self.payload)
+        self.assertEqual(self.cache.get(self.token).sub, "1")
+        self.clock.now = self.expires_at
+        self.assertIsNone(self.cache.get(self.token))
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 2, "entries": 0})
+
+    def test_whole_token_is_the_key(self):
+        self.cache.put(self.token, self.payload)
+        header, _, signature = self.token.split(".")
+        forged = security.create_access_token(uid="2").split(".")[1]
+        self.assertIsNone(self.cache.get(f"{header}.{forged}.{signature}"))
+
+    def test_least_recently_used_is_evicted(self):
+        tokens = [security.create_access_token(uid=str(uid)) for uid in (1, 2, 3)]
+        for token in tokens[:2]:
+            self.cache.put(token, security._decode_token(token))
+        self.cache.get(tokens[0])
+        self.cache.put(tokens[2], security._decode_token(tokens[2]))
+        self.assertIsNone(self.cache.get(tokens[1]))
+        self.assertIsNotNone(self.cache.get(tokens[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from app.core.ttl_cache import TTLCache
+
+from clock_helpers import FakeClock
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TTLCache(max_entries=2, ttl=10, clock=self.clock)
+
+    def test_explicit_deadline_overrides_ttl(self):
+        self.cache.put("a", 1)
+        self.cache.put("b", 2, expires_at=5)
+        self.clock.now = 5
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), 1)
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 2, "entries": 0})
+
+    def test_without_ttl_entries_do_not_expire(self):
+        cache = TTLCache(max_entries=2, clock=self.clock)
+        cache.put("a", 1)
+        self.clock.now = 1e9
+        self.assertEqual(cache.get("a"), 1)
+        cache.pop("a")
+        self.assertEqual(len(cache), 0)
+
+    def test_zero_size_stores_nothing(self):
+        cache = TTLCache(max_entries=0, clock=self.clock)
+        cache.put("a", 1)
+        self.assertIsNone(cache.get("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
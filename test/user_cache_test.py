@@ -0,0 +1,57 @@
+import unittest
+
+from app.core.user_cache import UserCache
+from app.data.models import User
+
+from clock_helpers import FakeClock
+
+
+class TestUserCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = UserCache(max_entries=2, ttl=30, clock=self.clock)
+
+    def test_hit_returns_detached_copy(self):
+        self.assertIsNone(self.cache.get(1))
+        self.cache.put(User(id=1, email="student@example.com", status="active"))
+
+        user = self.cache.get(1)
+        self.assertEqual((user.id, user.email, user.status), (1, "student@example.com", "active"))
+        # Changing one copy does not leak into the next hit
+        user.email = "changed@example.com"
+        self.assertEqual(self.cache.get(1).email, "student@example.com")
+        self.assertEqual(self.cache.stats(), {"hits": 2, "misses": 1, "entries": 1})
+
+    def test_entries_expire(self):
+        self.cache.put(User(id=1, email="student@example.com"))
+        self.clock.now = 29
+        self.assertIsNotNone(self.cache.get(1))
+        self.clock.now = 31
+        self.assertIsNone(self.cache.get(1))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        for user_id in (1, 2):
+            self.cache.put(User(id=user_id))
+        self.cache.get(1)
+        self.cache.put(User(id=3))
+        self.assertIsNone(self.cache.get(2))
+        self.assertIsNotNone(self.cache.get(1))
+
+    def test_invalidate(self):
+        self.cache.put(User(id=1))
+        self.cache.put(User(id=2))
+        self.cache.invalidate(1)
+        self.cache.invalidate(5)
+        self.assertIsNone(self.cache.get(1))
+        self.assertIsNotNone(self.cache.get(2))
+
+    def test_disabled(self):
+        cache = UserCache(max_entries=0)
+        cache.put(User(id=1))
+        self.assertIsNone(cache.get(1))
+
+
+if __name__ == "__main__":
+    unittest.main()